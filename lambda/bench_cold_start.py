@@ -0,0 +1,67 @@
+"""Measure the import-time cost of the Lambda handler module, before and after lazy boto3.
+
+Cold starts pay for every module imported at load time, so this runs a fresh
+interpreter per sample with ``-X importtime``. It compares the handler as
+deployed, which imports boto3 only when a client is first needed, against
+the handler with boto3 imported at load time as it used to be.
+
+Usage:
+    python lambda/bench_cold_start.py [samples]
+"""
+
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(modules: List[str]) -> int:
+    """Import modules in a fresh interpreter and return their cumulative import time in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # Lines look like: "import time:  self [us] | cumulative | imported package",
+    # with nested imports indented. Sum the top-level entries of the modules.
+    total = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].startswith(" ") and parts[2][1:] in modules:
+            total += int(parts[1].strip())
+    if not total:
+        raise RuntimeError(f"No import time reported for {', '.join(modules)}")
+    return total
+
+
+def report(label: str, timings: List[float]) -> None:
+    print(
+        f"{label:<28} median={statistics.median(timings):7.1f}ms "
+        f"min={min(timings):7.1f}ms max={max(timings):7.1f}ms ({len(timings)} samples)"
+    )
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    lazy = [measure_import(["slack_event_handler"]) / 1000 for _ in range(samples)]
+    report("lazy boto3 (current)", lazy)
+
+    if importlib.util.find_spec("boto3") is None:
+        print("boto3 is not installed, skipping the eager-import comparison")
+        return
+
+    eager = [measure_import(["boto3", "slack_event_handler"]) / 1000 for _ in range(samples)]
+    report("eager boto3 (before)", eager)
+    saved = statistics.median(eager) - statistics.median(lazy)
+    print(f"Lazy boto3 saves {saved:.1f}ms ({saved / statistics.median(eager):.0%}) of import time per cold start")
+
+
+if __name__ == "__main__":
+    main()
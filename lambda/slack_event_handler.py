@@ -1,49 +1,303 @@
 """AWS Lambda function to handle Slack message shortcuts and trigger GitHub Actions."""
 
+import base64
 import hashlib
 import hmac
 import json
 import os
+import random
+import threading
 import time
-from typing import Any, Dict
+import urllib.parse
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
 from urllib.request import Request, urlopen
-from urllib.error import URLError
+from urllib.error import HTTPError, URLError
+
+SIGNING_SECRET_NAME = "lambda/slack-thread-summarizer-webhook/slack_signing_secret"
+GITHUB_TOKEN_SECRET_NAME = "lambda/slack-thread-summarizer-webhook/github_token"
+
+# AWS clients, created once per container. boto3 is imported lazily because
+# it dominates cold-start time and most requests only need the cached secrets.
+_aws_clients: Dict[str, Any] = {}
+
+
+def get_aws_client(service_name: str, **kwargs) -> Any:
+    """Return a boto3 client for the service, reusing it across invocations.
+
+    Args:
+        service_name: AWS service name, e.g. "secretsmanager"
+        **kwargs: Extra arguments for boto3.client on first creation
+
+    Returns:
+        The boto3 client
+    """
+    client = _aws_clients.get(service_name)
+    if client is None:
+        import boto3
+
+        client = boto3.client(service_name, **kwargs)
+        _aws_clients[service_name] = client
+    return client
+
+
+# Outbound requests share a token bucket per service and retry throttled or
+# transient failures. This mirrors summarizer-python/rate_limit.py, which the
+# Lambda cannot import because it is deployed as a single file.
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Statuses that mean the request was turned away unprocessed, so even a request that is not idempotent can be retried
+THROTTLED_STATUSES = {429}
+# GitHub asks clients to wait at least a minute after a secondary rate limit it gives no reset time for
+SECONDARY_RATE_LIMIT_DELAY = 60.0
+API_MAX_RETRIES = int(os.environ.get("API_MAX_RETRIES", "3"))
+# Lambda time is billed and bounded, so waits are capped much lower than in the workflow
+API_MAX_RETRY_DELAY = float(os.environ.get("API_MAX_RETRY_DELAY_SECONDS", "10"))
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can be paused when a server asks to back off."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+_buckets = {
+    "slack": TokenBucket(float(os.environ.get("SLACK_RATE_LIMIT", "1")), 10),
+    "github": TokenBucket(float(os.environ.get("GITHUB_RATE_LIMIT", "2")), 10),
+}
+
+
+def retry_after(error: HTTPError) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After, GitHub's rate-limit headers or a secondary rate limit."""
+    headers = error.headers or {}
+    if headers.get("Retry-After"):
+        try:
+            return max(0.0, float(headers["Retry-After"]))
+        except ValueError:
+            return None
+    if headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+        try:
+            return max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+        except ValueError:
+            return None
+    # A secondary rate limit may come without headers; GitHub then asks for at least a minute
+    if error.code == 403 and b"secondary rate limit" in error.read().lower():
+        return SECONDARY_RATE_LIMIT_DELAY
+    return None
+
+
+def urlopen_with_retries(req: Request, service: str, idempotent: bool = True) -> int:
+    """Send a request under the service's rate limit, retrying throttled and transient failures.
+
+    A request that is not idempotent is only retried when it was throttled
+    or could not be sent: after a 5xx the server may already have acted on
+    it, and sending it again would repeat that.
+
+    Args:
+        req: The request to send
+        service: Key of the token bucket to use, "slack" or "github"
+        idempotent: Whether sending the request twice is harmless
+
+    Returns:
+        HTTP status of the response
+    """
+    bucket = _buckets[service]
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            with urlopen(req) as response:
+                return response.status
+        except HTTPError as e:
+            delay = retry_after(e)
+            retryable_statuses = RETRYABLE_STATUSES if idempotent else THROTTLED_STATUSES
+            throttled = e.code in retryable_statuses or (e.code == 403 and delay is not None)
+            if attempt >= API_MAX_RETRIES or not throttled:
+                raise
+            if delay is not None:
+                delay = min(delay, API_MAX_RETRY_DELAY)
+                bucket.pause(delay)
+            else:
+                delay = random.uniform(0, min(API_MAX_RETRY_DELAY, 2 ** attempt))
+        except URLError:
+            if attempt >= API_MAX_RETRIES:
+                raise
+            delay = random.uniform(0, min(API_MAX_RETRY_DELAY, 2 ** attempt))
+        attempt += 1
+        print(f"{service} request to {req.full_url} failed, retry {attempt}/{API_MAX_RETRIES} in {delay:.1f}s")
+        time.sleep(delay)
+
+
+class SecretCache:
+    """Secret cache with a TTL and stale-while-revalidate refresh.
+
+    Fresh values are served from memory. Once a value is older than the TTL
+    it is still served while a background thread refetches it, so rotation is
+    picked up without adding a Secrets Manager round trip to the request.
+    Values older than max_stale are refetched synchronously.
+    """
+
+    def __init__(self, secret_names: List[str], ttl: float, max_stale: float, min_forced_interval: float = 30):
+        self.secret_names = secret_names
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.min_forced_interval = min_forced_interval
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+        self._values: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._last_forced = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self, secret_name: str) -> str:
+        """Return a secret, fetching or revalidating it as needed."""
+        age = time.monotonic() - self._fetched_at
+        value = self._values.get(secret_name)
+        if value is not None and age <= self.max_stale:
+            if age <= self.ttl:
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background()
+            return value
+
+        self.stats["misses"] += 1
+        self._refresh(list(dict.fromkeys([secret_name] + self.secret_names)))
+        return self._values[secret_name]
+
+    def force_refresh(self) -> bool:
+        """Refetch all secrets now, e.g. after a signature mismatch.
+
+        Forced refreshes are rate limited so invalid requests cannot turn
+        into a stream of Secrets Manager calls.
+
+        Returns:
+            True if any cached value changed
+        """
+        now = time.monotonic()
+        if now - self._last_forced < self.min_forced_interval:
+            return False
+        self._last_forced = now
+
+        previous = dict(self._values)
+        try:
+            self._refresh(self.secret_names)
+        except Exception as e:
+            print(f"Forced secret refresh failed: {e}")
+            return False
+        return self._values != previous
+
+    def log_stats(self) -> None:
+        """Print hit/miss/refresh counters."""
+        print("Secret cache: " + ", ".join(f"{name}={count}" for name, count in self.stats.items()))
+
+    def _refresh(self, secret_names: List[str]) -> None:
+        try:
+            secrets = fetch_secrets(secret_names)
+        except Exception:
+            self.stats["refresh_errors"] += 1
+            raise
+        with self._lock:
+            self._values.update(secrets)
+            self._fetched_at = time.monotonic()
+        self.stats["refreshes"] += 1
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                self._refresh(self.secret_names)
+            except Exception as e:
+                print(f"Background secret refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, daemon=True).start()
 
-import boto3
-from botocore.exceptions import ClientError
 
 # Cache for secrets to avoid repeated API calls
-_secrets_cache = {}
+_secret_cache = SecretCache(
+    [SIGNING_SECRET_NAME, GITHUB_TOKEN_SECRET_NAME],
+    ttl=float(os.environ.get("SECRETS_TTL_SECONDS", "300")),
+    max_stale=float(os.environ.get("SECRETS_MAX_STALE_SECONDS", "3600"))
+)
 
 
 def get_secret(secret_name: str) -> str:
     """Retrieve a secret from AWS Secrets Manager with caching.
 
+    On a cache miss, all secrets the function uses are fetched in a single
+    batched call.
+
     Args:
         secret_name: Name of the secret in Secrets Manager
 
     Returns:
         The secret value as a string
     """
-    # Return cached value if available
-    if secret_name in _secrets_cache:
-        return _secrets_cache[secret_name]
+    return _secret_cache.get(secret_name)
 
-    session = boto3.session.Session()
-    client = session.client(service_name='secretsmanager',
-                            region_name='eu-central-1')
 
-    try:
-        get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-        secret = get_secret_value_response['SecretString']
+def fetch_secrets(secret_names: List[str]) -> Dict[str, str]:
+    """Fetch several secrets from AWS Secrets Manager in one call.
 
-        # Cache the secret
-        _secrets_cache[secret_name] = secret
-        return secret
+    Args:
+        secret_names: Names of the secrets in Secrets Manager
+
+    Returns:
+        Dict of secret name to secret value
+    """
+    from botocore.exceptions import ClientError
+
+    client = get_aws_client("secretsmanager", region_name="eu-central-1")
+
+    try:
+        response = client.batch_get_secret_value(SecretIdList=secret_names)
     except ClientError as e:
-        print(f"Error retrieving secret {secret_name}: {e}")
+        print(f"Error retrieving secrets {secret_names}: {e}")
         raise
 
+    for error in response.get("Errors", []):
+        print(f"Error retrieving secret {error.get('SecretId')}: {error.get('ErrorCode')} {error.get('Message')}")
+
+    secrets = {secret["Name"]: secret["SecretString"] for secret in response.get("SecretValues", [])}
+    missing = [name for name in secret_names if name not in secrets]
+    if missing:
+        raise RuntimeError(f"Failed to retrieve secrets: {', '.join(missing)}")
+    return secrets
+
 
 def verify_slack_signature(event: Dict[str, Any], slack_signing_secret: str) -> bool:
     """Verify that the request came from Slack using the signing secret.
@@ -78,7 +332,6 @@ def verify_slack_signature(event: Dict[str, Any], slack_signing_secret: str) ->
 
     # If body is base64 encoded, decode it for signature verification
     if event.get("isBase64Encoded", False):
-        import base64
         body = base64.b64decode(body).decode("utf-8")
     sig_basestring = f"v0:{timestamp}:{body}"
 
@@ -114,8 +367,8 @@ def send_slack_response(response_url: str, message: str, message_link: str = Non
     )
 
     try:
-        with urlopen(req) as response:
-            print(f"Sent response to Slack: {response.status}")
+        status = urlopen_with_retries(req, "slack")
+        print(f"Sent response to Slack: {status}")
     except URLError as e:
         print(f"Error sending response to Slack: {e}")
 
@@ -132,6 +385,32 @@ def trigger_github_workflow(channel_id: str, message_ts: str, response_url: str,
     Returns:
         Dict with success status and optional error message
     """
+    return _dispatch_workflow({
+        "channel_id": channel_id,
+        "message_ts": message_ts,
+        "response_url": response_url
+    }, github_token)
+
+
+def trigger_github_batch_workflow(jobs: List[Dict[str, str]], github_token: str) -> Dict[str, Any]:
+    """Trigger one GitHub Actions workflow run that summarizes several threads.
+
+    Args:
+        jobs: Jobs with channel_id, message_ts and response_url
+        github_token: GitHub personal access token
+
+    Returns:
+        Dict with success status and optional error message
+    """
+    jobs_input = json.dumps([
+        {key: job[key] for key in ("channel_id", "message_ts", "response_url")}
+        for job in jobs
+    ])
+    return _dispatch_workflow({"jobs": jobs_input}, github_token)
+
+
+def _dispatch_workflow(inputs: Dict[str, str], github_token: str) -> Dict[str, Any]:
+    """Send a workflow_dispatch event with the given inputs."""
     repo_owner = os.environ["GITHUB_REPO_OWNER"]
     repo_name = os.environ["GITHUB_REPO_NAME"]
     repo_workflow= os.environ["GITHUB_REPO_WORKFLOW"]
@@ -140,11 +419,7 @@ def trigger_github_workflow(channel_id: str, message_ts: str, response_url: str,
 
     payload = {
         "ref": "main",
-        "inputs": {
-            "channel_id": channel_id,
-            "message_ts": message_ts,
-            "response_url": response_url
-        }
+        "inputs": inputs
     }
 
     headers = {
@@ -162,11 +437,12 @@ def trigger_github_workflow(channel_id: str, message_ts: str, response_url: str,
     )
 
     try:
-        with urlopen(req) as response:
-            return {
-                "status_code": response.status,
-                "success": True
-            }
+        # A dispatch that failed with a 5xx may still have started a run, so it is not retried then
+        status = urlopen_with_retries(req, "github", idempotent=False)
+        return {
+            "status_code": status,
+            "success": True
+        }
     except URLError as e:
         print(f"Error triggering GitHub workflow: {e}")
         return {
@@ -176,6 +452,327 @@ def trigger_github_workflow(channel_id: str, message_ts: str, response_url: str,
         }
 
 
+class JobQueue(ABC):
+    """Durable queue of summarization jobs, deduplicated per thread.
+
+    Jobs are dicts with channel_id, message_ts and response_url. A job for a
+    thread that was already enqueued within the dedupe window is dropped, so
+    double-clicks do not produce duplicate pull requests.
+    """
+
+    @abstractmethod
+    def enqueue(self, job: Dict[str, str]) -> bool:
+        """Add a job to the queue.
+
+        Returns:
+            False if the job was a duplicate and was not enqueued
+        """
+
+    @abstractmethod
+    def drain(self, max_jobs: int) -> List[Dict[str, str]]:
+        """Claim up to max_jobs pending jobs for dispatch."""
+
+    @abstractmethod
+    def acknowledge(self, jobs: List[Dict[str, str]]) -> None:
+        """Remove dispatched jobs; unacknowledged claims become visible again."""
+
+
+class SqliteJobQueue(JobQueue):
+    """SQLite-backed job queue, a local stand-in for SQS."""
+
+    def __init__(self, path: str, dedupe_window: int, visibility_timeout: int = 300):
+        import sqlite3
+
+        self.dedupe_window = dedupe_window
+        self.visibility_timeout = visibility_timeout
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel_id TEXT NOT NULL,
+                message_ts TEXT NOT NULL,
+                response_url TEXT,
+                enqueued_at REAL NOT NULL,
+                claimed_at REAL,
+                dispatched INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_thread ON jobs (channel_id, message_ts)")
+
+    def enqueue(self, job: Dict[str, str]) -> bool:
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            duplicate = self.conn.execute(
+                "SELECT 1 FROM jobs WHERE channel_id = ? AND message_ts = ? AND enqueued_at > ?",
+                (job["channel_id"], job["message_ts"], now - self.dedupe_window)
+            ).fetchone()
+            if not duplicate:
+                self.conn.execute(
+                    "INSERT INTO jobs (channel_id, message_ts, response_url, enqueued_at) VALUES (?, ?, ?, ?)",
+                    (job["channel_id"], job["message_ts"], job.get("response_url"), now)
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return not duplicate
+
+    def drain(self, max_jobs: int) -> List[Dict[str, str]]:
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                """SELECT id, channel_id, message_ts, response_url FROM jobs
+                WHERE dispatched = 0 AND (claimed_at IS NULL OR claimed_at < ?)
+                ORDER BY enqueued_at LIMIT ?""",
+                (now - self.visibility_timeout, max_jobs)
+            ).fetchall()
+            self.conn.executemany("UPDATE jobs SET claimed_at = ? WHERE id = ?", [(now, row[0]) for row in rows])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return [
+            {"id": row[0], "channel_id": row[1], "message_ts": row[2], "response_url": row[3]}
+            for row in rows
+        ]
+
+    def acknowledge(self, jobs: List[Dict[str, str]]) -> None:
+        self.conn.executemany("UPDATE jobs SET dispatched = 1 WHERE id = ?", [(job["id"],) for job in jobs])
+        # Dispatched rows are only kept as long as they are needed for dedupe
+        self.conn.execute(
+            "DELETE FROM jobs WHERE dispatched = 1 AND enqueued_at < ?",
+            (time.time() - self.dedupe_window,)
+        )
+
+
+class SqsJobQueue(JobQueue):
+    """Amazon SQS FIFO job queue.
+
+    Deduplication uses the FIFO queue's content-based dedupe ID, whose window
+    is fixed by SQS at five minutes.
+    """
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self.client = get_aws_client("sqs")
+
+    def enqueue(self, job: Dict[str, str]) -> bool:
+        # SQS drops duplicates silently, so every send reports success
+        self.client.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=json.dumps(job),
+            MessageGroupId="summarize-thread",
+            MessageDeduplicationId=f"{job['channel_id']}-{job['message_ts']}"
+        )
+        return True
+
+    def drain(self, max_jobs: int) -> List[Dict[str, str]]:
+        jobs = []
+        while len(jobs) < max_jobs:
+            response = self.client.receive_message(
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=min(10, max_jobs - len(jobs)),
+                WaitTimeSeconds=0
+            )
+            messages = response.get("Messages", [])
+            if not messages:
+                break
+            for message in messages:
+                job = json.loads(message["Body"])
+                job["receipt_handle"] = message["ReceiptHandle"]
+                jobs.append(job)
+        return jobs
+
+    def acknowledge(self, jobs: List[Dict[str, str]]) -> None:
+        for i in range(0, len(jobs), 10):
+            self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(index), "ReceiptHandle": job["receipt_handle"]}
+                    for index, job in enumerate(jobs[i:i + 10])
+                ]
+            )
+
+
+def get_job_queue() -> Optional[JobQueue]:
+    """Return the configured job queue, or None to dispatch every click directly.
+
+    JOB_QUEUE_URL selects an SQS FIFO queue; JOB_QUEUE_PATH selects the
+    SQLite stand-in used for local testing.
+    """
+    queue_url = os.environ.get("JOB_QUEUE_URL")
+    if queue_url:
+        return SqsJobQueue(queue_url)
+
+    queue_path = os.environ.get("JOB_QUEUE_PATH")
+    if queue_path:
+        return SqliteJobQueue(queue_path, int(os.environ.get("JOB_DEDUPE_WINDOW_SECONDS", "300")))
+
+    return None
+
+
+def dispatch_jobs(jobs: List[Dict[str, str]], github_token: str) -> Dict[str, Any]:
+    """Dispatch jobs as a single batch workflow run, dropping duplicate threads."""
+    unique_jobs = list({(job["channel_id"], job["message_ts"]): job for job in jobs}.values())
+    print(f"Dispatching {len(unique_jobs)} jobs ({len(jobs) - len(unique_jobs)} duplicates dropped)")
+    return trigger_github_batch_workflow(unique_jobs, github_token)
+
+
+def dispatch_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """Dispatch queued jobs to the summarizer in batches.
+
+    Invoked either by an SQS event source mapping, whose batching window
+    coalesces clicks, or on a schedule, in which case the queue is drained.
+
+    Args:
+        event: SQS event with Records, or any scheduled event
+        context: Lambda context
+
+    Returns:
+        Dict with the number of dispatched jobs
+    """
+    github_token = get_secret(GITHUB_TOKEN_SECRET_NAME)
+
+    records = event.get("Records", [])
+    if records:
+        # The event source mapping deletes the messages when we return
+        jobs = [json.loads(record["body"]) for record in records]
+        result = dispatch_jobs(jobs, github_token)
+        if not result["success"]:
+            raise RuntimeError(f"Failed to trigger workflow: {result.get('error')}")
+        return {"dispatched": len(jobs)}
+
+    queue = get_job_queue()
+    if queue is None:
+        print("No job queue configured, nothing to dispatch")
+        return {"dispatched": 0}
+
+    batch_size = int(os.environ.get("DISPATCH_BATCH_SIZE", "20"))
+    dispatched = 0
+    while True:
+        jobs = queue.drain(batch_size)
+        if not jobs:
+            break
+        result = dispatch_jobs(jobs, github_token)
+        if not result["success"]:
+            print(f"Failed to trigger workflow: {result.get('error')}")
+            break
+        queue.acknowledge(jobs)
+        dispatched += len(jobs)
+
+    return {"dispatched": dispatched}
+
+
+@contextmanager
+def _timed_stage(timings: Dict[str, float], name: str):
+    """Record the duration of a handler stage."""
+    stage_started = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[name] = time.monotonic() - stage_started
+
+
+def _log_timings(timings: Dict[str, float], started: float) -> None:
+    """Log per-stage timings and the total time since started."""
+    stages = ", ".join(f"{name}={elapsed * 1000:.0f}ms" for name, elapsed in timings.items())
+    print(f"Stage timings: {stages}, total={(time.monotonic() - started) * 1000:.0f}ms")
+
+
+def defer_work(work: Dict[str, Any], context: Any) -> None:
+    """Run slow shortcut work after the response to Slack has been sent.
+
+    In Lambda the function invokes itself asynchronously. Elsewhere, e.g.
+    when testing locally, a background thread stands in for the invocation.
+    If the invocation fails, e.g. without the lambda:InvokeFunction
+    permission or when throttled, the work runs inline instead: the response
+    to Slack is late, but the user still gets the acknowledgment and the job
+    is still dispatched.
+
+    Args:
+        work: Shortcut details passed to process_deferred_work
+        context: Lambda context, or None outside Lambda
+    """
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if function_arn:
+        try:
+            get_aws_client("lambda").invoke(
+                FunctionName=function_arn,
+                InvocationType="Event",
+                Payload=json.dumps({"deferred_work": work}).encode("utf-8")
+            )
+        except Exception as e:
+            print(f"Failed to defer work, running it inline: {e}")
+            process_deferred_work(work)
+    else:
+        threading.Thread(target=process_deferred_work, args=(work,)).start()
+
+
+def process_deferred_work(work: Dict[str, Any]) -> Dict[str, Any]:
+    """Send the acknowledgment message and hand the job to the summarizer.
+
+    Args:
+        work: Dict with channel_id, message_ts, response_url and message_link
+
+    Returns:
+        Dict with success status
+    """
+    started = time.monotonic()
+    timings: Dict[str, float] = {}
+    channel_id = work["channel_id"]
+    message_ts = work["message_ts"]
+    response_url = work["response_url"]
+    message_link = work.get("message_link")
+
+    # Send acknowledgment to user
+    with _timed_stage(timings, "ack_message"):
+        send_slack_response(
+            response_url,
+            ":hourglass_flowing_sand: Processing your request... I'll generate a summary and create a pull request. Check your GitHub Actions for progress.",
+            message_link
+        )
+
+    queue = get_job_queue()
+    if queue is not None:
+        # Queue the job; dispatch_handler sends it in a batch
+        job = {"channel_id": channel_id, "message_ts": message_ts, "response_url": response_url}
+        with _timed_stage(timings, "enqueue"):
+            enqueued = queue.enqueue(job)
+        if enqueued:
+            print(f"Queued job for channel={channel_id}, ts={message_ts}")
+        else:
+            print(f"Dropped duplicate job for channel={channel_id}, ts={message_ts}")
+        _log_timings(timings, started)
+        return {"success": True}
+
+    print(f"Triggering workflow for channel={channel_id}, ts={message_ts}")
+
+    # Trigger GitHub Actions workflow
+    try:
+        with _timed_stage(timings, "secrets"):
+            github_token = get_secret(GITHUB_TOKEN_SECRET_NAME)
+        with _timed_stage(timings, "dispatch"):
+            result = trigger_github_workflow(channel_id, message_ts, response_url, github_token)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+
+    if result["success"]:
+        print(f"Successfully triggered GitHub workflow")
+    else:
+        print(f"Failed to trigger workflow: {result.get('error')}")
+        # Send error message to user
+        send_slack_response(
+            response_url,
+            f":x: Failed to trigger workflow: {result.get('error', 'Unknown error')}",
+            message_link
+        )
+
+    _log_timings(timings, started)
+    return {"success": result["success"]}
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """Handle Slack message shortcut requests.
 
@@ -186,18 +783,22 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Returns:
         Response dict with statusCode and body
     """
+    # Slow work deferred by an earlier invocation of this function
+    if "deferred_work" in event:
+        return process_deferred_work(event["deferred_work"])
+
+    started = time.monotonic()
+    timings: Dict[str, float] = {}
     print(f"Received event: {json.dumps(event)}")
 
     # Parse body first to get response_url for error reporting
     body_str = event.get("body", "")
     if event.get("isBase64Encoded", False):
-        import base64
         body_str = base64.b64decode(body_str).decode("utf-8")
 
     # Try to extract response_url early for error reporting
     response_url_for_errors = None
     try:
-        import urllib.parse
         parsed = urllib.parse.parse_qs(body_str)
         if "payload" in parsed:
             payload_data = json.loads(parsed["payload"][0])
@@ -205,10 +806,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     except Exception:
         pass  # If we can't parse, continue without response_url
 
-    # Retrieve secrets from AWS Secrets Manager
+    # Retrieve the signing secret from AWS Secrets Manager
     try:
-        slack_signing_secret = get_secret("lambda/slack-thread-summarizer-webhook/slack_signing_secret")
-        github_token = get_secret("lambda/slack-thread-summarizer-webhook/github_token")
+        with _timed_stage(timings, "secrets"):
+            slack_signing_secret = get_secret(SIGNING_SECRET_NAME)
     except Exception as e:
         error_msg = str(e)
         print(f"Failed to retrieve secrets: {error_msg}")
@@ -229,7 +830,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
     # Verify Slack signature
-    if not verify_slack_signature(event, slack_signing_secret):
+    with _timed_stage(timings, "verify"):
+        is_valid = verify_slack_signature(event, slack_signing_secret)
+
+    # The signing secret may have been rotated since it was cached
+    if not is_valid:
+        with _timed_stage(timings, "secrets_refresh"):
+            refreshed = _secret_cache.force_refresh()
+        if refreshed:
+            print("Signing secret changed, retrying verification")
+            is_valid = verify_slack_signature(event, get_secret(SIGNING_SECRET_NAME))
+    _secret_cache.log_stats()
+
+    if not is_valid:
         print("Invalid Slack signature")
         return {
             "statusCode": 401,
@@ -239,7 +852,6 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # Parse URL-encoded payload (body_str already extracted above)
     try:
         # Extract payload from form data
-        import urllib.parse
         parsed = urllib.parse.parse_qs(body_str)
 
         # Payload is in the 'payload' field
@@ -276,31 +888,17 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         # Check if this is our shortcut
         if callback_id == expected_callback_id:
-            # Send immediate acknowledgment to user
-            if response_url:
-                send_slack_response(
-                    response_url,
-                    ":hourglass_flowing_sand: Processing your request... I'll generate a summary and create a pull request. Check your GitHub Actions for progress.",
-                    message_link
-                )
-
             if channel_id and message_ts and response_url:
-                print(f"Triggering workflow for channel={channel_id}, ts={message_ts}")
-
-                # Trigger GitHub Actions workflow
-                result = trigger_github_workflow(channel_id, message_ts, response_url, github_token)
-
-                if result["success"]:
-                    print(f"Successfully triggered GitHub workflow")
-                else:
-                    print(f"Failed to trigger workflow: {result.get('error')}")
-                    # Send error message to user
-                    if response_url:
-                        send_slack_response(
-                            response_url,
-                            f":x: Failed to trigger workflow: {result.get('error', 'Unknown error')}",
-                            message_link
-                        )
+                # Acknowledge Slack right away; the acknowledgment message and
+                # the workflow dispatch run after we return
+                with _timed_stage(timings, "defer"):
+                    defer_work({
+                        "channel_id": channel_id,
+                        "message_ts": message_ts,
+                        "response_url": response_url,
+                        "message_link": message_link
+                    }, context)
+                _log_timings(timings, started)
 
                 # Respond to Slack to acknowledge receipt
                 return {
@@ -0,0 +1,10 @@
+"""Shared test setup.
+
+The Lambda is deployed as a single file rather than a package, so the tests
+import it as the top-level module ``slack_event_handler``.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
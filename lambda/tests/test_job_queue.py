@@ -0,0 +1,277 @@
+"""Job queues, dispatch and deferred work in the Lambda, run offline."""
+
+import json
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+import slack_event_handler as handler
+
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/123456789012/summarize.fifo"
+
+
+def job(index: int, channel_id: str = "C1") -> Dict[str, str]:
+    return {
+        "channel_id": channel_id,
+        "message_ts": f"1700000000.{index:06d}",
+        "response_url": f"https://hooks.slack.com/actions/{index}"
+    }
+
+
+def threads(jobs: List[Dict[str, Any]]) -> List[str]:
+    return [job["message_ts"] for job in jobs]
+
+
+@pytest.fixture
+def sqlite_queue(tmp_path):
+    return handler.SqliteJobQueue(str(tmp_path / "jobs.db"), dedupe_window=300)
+
+
+@pytest.fixture
+def sqs(monkeypatch):
+    client = boto3.client("sqs", region_name="us-east-1", aws_access_key_id="test", aws_secret_access_key="test")
+    monkeypatch.setitem(handler._aws_clients, "sqs", client)
+    with Stubber(client) as stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+class Recorder:
+    """Stands in for the Slack response and GitHub dispatch calls, recording what they were sent."""
+
+    def __init__(self, success: bool = True):
+        self.success = success
+        self.messages: List[str] = []
+        self.dispatched: List[List[Dict[str, str]]] = []
+
+    def send_slack_response(self, response_url: str, message: str, message_link: str = None) -> None:
+        self.messages.append(message)
+
+    def trigger_github_workflow(self, channel_id: str, message_ts: str, response_url: str, github_token: str):
+        return self.trigger_github_batch_workflow([{"channel_id": channel_id, "message_ts": message_ts}], github_token)
+
+    def trigger_github_batch_workflow(self, jobs: List[Dict[str, str]], github_token: str):
+        assert github_token == "ghp-test"
+        self.dispatched.append(jobs)
+        return {"success": True} if self.success else {"success": False, "error": "HTTP Error 422"}
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(handler, "send_slack_response", recorder.send_slack_response)
+    monkeypatch.setattr(handler, "trigger_github_workflow", recorder.trigger_github_workflow)
+    monkeypatch.setattr(handler, "trigger_github_batch_workflow", recorder.trigger_github_batch_workflow)
+    monkeypatch.setattr(handler, "get_secret", lambda name: "ghp-test")
+    return recorder
+
+
+def test_sqlite_queue_drains_in_enqueue_order(sqlite_queue):
+    for index in range(5):
+        assert sqlite_queue.enqueue(job(index))
+
+    first = sqlite_queue.drain(3)
+    second = sqlite_queue.drain(3)
+
+    assert threads(first) == threads([job(0), job(1), job(2)])
+    assert threads(second) == threads([job(3), job(4)])
+    assert first[0]["response_url"] == job(0)["response_url"]
+
+
+def test_sqlite_queue_drops_duplicate_threads(sqlite_queue):
+    assert sqlite_queue.enqueue(job(0))
+    assert not sqlite_queue.enqueue(job(0))
+    # The same message in another channel is another thread
+    assert sqlite_queue.enqueue(job(0, channel_id="C2"))
+
+    assert len(sqlite_queue.drain(10)) == 2
+
+
+def test_sqlite_queue_deduplicates_dispatched_jobs_within_the_window(sqlite_queue):
+    sqlite_queue.enqueue(job(0))
+    sqlite_queue.acknowledge(sqlite_queue.drain(10))
+
+    assert not sqlite_queue.enqueue(job(0))
+    assert sqlite_queue.drain(10) == []
+
+
+def test_sqlite_queue_accepts_a_thread_again_after_the_window(tmp_path):
+    queue = handler.SqliteJobQueue(str(tmp_path / "jobs.db"), dedupe_window=0)
+    queue.enqueue(job(0))
+    queue.acknowledge(queue.drain(10))
+
+    assert queue.enqueue(job(0))
+
+
+def test_sqlite_queue_redelivers_unacknowledged_claims(tmp_path):
+    queue = handler.SqliteJobQueue(str(tmp_path / "jobs.db"), dedupe_window=300, visibility_timeout=-1)
+    queue.enqueue(job(0))
+
+    assert threads(queue.drain(10)) == threads([job(0)])
+    # Claimed but never acknowledged, e.g. because the dispatch failed
+    assert threads(queue.drain(10)) == threads([job(0)])
+
+
+def test_sqlite_queue_hides_claimed_jobs(sqlite_queue):
+    sqlite_queue.enqueue(job(0))
+    sqlite_queue.drain(10)
+
+    assert sqlite_queue.drain(10) == []
+
+
+def test_sqs_queue_enqueues_with_a_dedupe_id_per_thread(sqs):
+    sqs.add_response(
+        "send_message",
+        {"MessageId": "m0"},
+        {
+            "QueueUrl": QUEUE_URL,
+            "MessageBody": json.dumps(job(0)),
+            "MessageGroupId": "summarize-thread",
+            "MessageDeduplicationId": "C1-1700000000.000000"
+        }
+    )
+
+    assert handler.SqsJobQueue(QUEUE_URL).enqueue(job(0))
+
+
+def test_sqs_queue_drains_across_receives_and_acknowledges_in_batches(sqs):
+    messages = [{"MessageId": f"m{i}", "ReceiptHandle": f"r{i}", "Body": json.dumps(job(i))} for i in range(12)]
+    sqs.add_response(
+        "receive_message",
+        {"Messages": messages[:10]},
+        {"QueueUrl": QUEUE_URL, "MaxNumberOfMessages": 10, "WaitTimeSeconds": 0}
+    )
+    sqs.add_response(
+        "receive_message",
+        {"Messages": messages[10:]},
+        {"QueueUrl": QUEUE_URL, "MaxNumberOfMessages": 5, "WaitTimeSeconds": 0}
+    )
+    sqs.add_response(
+        "receive_message",
+        {},
+        {"QueueUrl": QUEUE_URL, "MaxNumberOfMessages": 3, "WaitTimeSeconds": 0}
+    )
+    for start, end in ((0, 10), (10, 12)):
+        sqs.add_response(
+            "delete_message_batch",
+            {"Successful": [{"Id": str(i)} for i in range(end - start)], "Failed": []},
+            {
+                "QueueUrl": QUEUE_URL,
+                "Entries": [{"Id": str(i - start), "ReceiptHandle": f"r{i}"} for i in range(start, end)]
+            }
+        )
+    queue = handler.SqsJobQueue(QUEUE_URL)
+
+    jobs = queue.drain(15)
+    queue.acknowledge(jobs)
+
+    assert threads(jobs) == threads([job(i) for i in range(12)])
+    assert jobs[0]["receipt_handle"] == "r0"
+
+
+def test_deferred_work_is_queued_when_a_queue_is_configured(recorder, sqlite_queue, monkeypatch):
+    monkeypatch.setattr(handler, "get_job_queue", lambda: sqlite_queue)
+
+    assert handler.process_deferred_work(job(0)) == {"success": True}
+    # A second click on the same thread acknowledges but is not queued again
+    assert handler.process_deferred_work(job(0)) == {"success": True}
+
+    assert len(recorder.messages) == 2
+    assert recorder.dispatched == []
+    assert threads(sqlite_queue.drain(10)) == threads([job(0)])
+
+
+def test_deferred_work_is_dispatched_without_a_queue(recorder, monkeypatch):
+    monkeypatch.setattr(handler, "get_job_queue", lambda: None)
+
+    assert handler.process_deferred_work(job(0)) == {"success": True}
+
+    assert threads(recorder.dispatched[0]) == threads([job(0)])
+    assert recorder.messages[0].startswith(":hourglass_flowing_sand:")
+
+
+def test_failed_dispatch_is_reported_to_the_user(recorder, monkeypatch):
+    monkeypatch.setattr(handler, "get_job_queue", lambda: None)
+    recorder.success = False
+
+    assert handler.process_deferred_work(job(0)) == {"success": False}
+
+    assert recorder.messages[-1] == ":x: Failed to trigger workflow: HTTP Error 422"
+
+
+def test_dispatch_handler_dispatches_sqs_records_once_per_thread(recorder):
+    records = [{"body": json.dumps(job(index))} for index in (0, 1, 0)]
+
+    assert handler.dispatch_handler({"Records": records}, None) == {"dispatched": 3}
+
+    assert [threads(jobs) for jobs in recorder.dispatched] == [threads([job(0), job(1)])]
+
+
+def test_dispatch_handler_drains_the_queue_in_batches(recorder, sqlite_queue, monkeypatch):
+    monkeypatch.setattr(handler, "get_job_queue", lambda: sqlite_queue)
+    monkeypatch.setenv("DISPATCH_BATCH_SIZE", "2")
+    for index in range(5):
+        sqlite_queue.enqueue(job(index))
+
+    assert handler.dispatch_handler({}, None) == {"dispatched": 5}
+
+    assert [len(jobs) for jobs in recorder.dispatched] == [2, 2, 1]
+    assert sqlite_queue.drain(10) == []
+
+
+def test_dispatch_handler_leaves_jobs_queued_when_dispatch_fails(recorder, tmp_path, monkeypatch):
+    queue = handler.SqliteJobQueue(str(tmp_path / "jobs.db"), dedupe_window=300, visibility_timeout=-1)
+    monkeypatch.setattr(handler, "get_job_queue", lambda: queue)
+    recorder.success = False
+    queue.enqueue(job(0))
+
+    assert handler.dispatch_handler({}, None) == {"dispatched": 0}
+
+    assert threads(queue.drain(10)) == threads([job(0)])
+
+
+def test_defer_work_uses_a_thread_without_a_lambda_context(monkeypatch):
+    done = threading.Event()
+    ran_on: List[threading.Thread] = []
+
+    def process(work):
+        ran_on.append(threading.current_thread())
+        done.set()
+
+    monkeypatch.setattr(handler, "process_deferred_work", process)
+
+    handler.defer_work(job(0), None)
+
+    assert done.wait(5)
+    assert ran_on[0] is not threading.current_thread()
+
+
+def test_defer_work_invokes_the_function_asynchronously(monkeypatch):
+    invocations: List[Dict[str, Any]] = []
+    monkeypatch.setitem(handler._aws_clients, "lambda", SimpleNamespace(invoke=lambda **kwargs: invocations.append(kwargs)))
+    monkeypatch.setattr(handler, "process_deferred_work", lambda work: pytest.fail("work ran in this invocation"))
+    context = SimpleNamespace(invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:webhook")
+
+    handler.defer_work(job(0), context)
+
+    [invocation] = invocations
+    assert invocation["InvocationType"] == "Event"
+    assert json.loads(invocation["Payload"]) == {"deferred_work": job(0)}
+
+
+def test_defer_work_runs_inline_when_the_invocation_fails(monkeypatch):
+    def invoke(**kwargs):
+        raise RuntimeError("not authorized to perform: lambda:InvokeFunction")
+
+    processed: List[Dict[str, Any]] = []
+    monkeypatch.setitem(handler._aws_clients, "lambda", SimpleNamespace(invoke=invoke))
+    monkeypatch.setattr(handler, "process_deferred_work", processed.append)
+    context = SimpleNamespace(invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:webhook")
+
+    handler.defer_work(job(0), context)
+
+    assert processed == [job(0)]
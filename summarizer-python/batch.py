@@ -0,0 +1,309 @@
+"""Batch entry point: summarize many Slack threads in one process."""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from . import metrics
+from .config import AppConfig
+from .main import (
+    EmptyThreadError,
+    NoNewRepliesError,
+    build_message_link,
+    close_kb_index,
+    close_summary_cache,
+    close_vector_index,
+    create_kb_mirror,
+    create_summarizer,
+    open_kb_index,
+    open_summary_cache,
+    open_vector_index,
+    process_thread,
+)
+from .metadata_store import MetadataStore
+from .services.github_service import GitHubService, PendingSummary, RepoBase
+from .services.slack_service import SlackService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchJob:
+    """A single thread to summarize."""
+    channel_id: str
+    message_ts: str
+    response_url: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single batch job."""
+    job: BatchJob
+    pr_url: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        """Whether the job produced a pull request."""
+        return self.error is None
+
+
+class PullRequestBatcher:
+    """Collects the summaries of a batch and opens their pull requests together.
+
+    Jobs hand in their summary and wait. Once every job has either handed
+    one in or finished without one, GitHubService.create_pull_requests
+    groups the summaries by target article, so threads on the same topic
+    end up in a single commit and pull request instead of conflicting ones.
+    The pull requests are built on the base resolved for the whole batch,
+    or, if there is none, on the default branch's head at that point.
+    """
+
+    def __init__(self, github_service: GitHubService, jobs: int, base: Optional[RepoBase] = None):
+        """Initialize the batcher.
+
+        Args:
+            github_service: Service that opens the pull requests
+            jobs: Number of jobs in the batch
+            base: Repo state shared by the batch's jobs, if it could be resolved
+        """
+        self.github_service = github_service
+        self.base = base
+        self._outstanding = jobs
+        self._pending: List[Tuple[PendingSummary, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def submit(self, pending: PendingSummary) -> str:
+        """Hand in a job's summary and wait for its pull request.
+
+        Returns:
+            URL of the pull request the summary went into
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((pending, future))
+        self._job_done()
+        return await future
+
+    def skip(self) -> None:
+        """Record that a job finished without a summary."""
+        self._job_done()
+
+    def _job_done(self) -> None:
+        self._outstanding -= 1
+        if self._outstanding == 0 and self._pending:
+            # A fresh context keeps the pull requests from being timed as part of whichever job came last
+            self._flush_task = asyncio.create_task(self._flush(), context=contextvars.Context())
+
+    async def _flush(self) -> None:
+        """Open the pull requests for every summary handed in."""
+        pending, self._pending = self._pending, []
+        summaries = [summary for summary, _ in pending]
+        try:
+            base = self.base
+            if base is None:
+                # The jobs resolved their own bases at different times; resolve it once
+                # more so every pull request builds on the default branch's head
+                base = await asyncio.to_thread(
+                    self.github_service.resolve_base,
+                    [summary.article.file_path for summary in summaries if summary.article]
+                )
+            results = await asyncio.to_thread(self.github_service.create_pull_requests, summaries, base)
+        except Exception as e:
+            results = [e] * len(pending)
+        for (_, future), result in zip(pending, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def resolve_batch_base(
+    config: AppConfig, github_service: GitHubService, jobs: List[BatchJob]
+) -> Optional[RepoBase]:
+    """Resolve the knowledge base repo once for every job in a batch.
+
+    The articles earlier runs wrote for the jobs' threads are fetched along
+    with it, where the API allows.
+
+    Returns:
+        The shared base, or None if it could not be resolved, in which case
+        each job resolves its own
+    """
+    prefetch = []
+    if config.ai.incremental:
+        for job in jobs:
+            previous = github_service.previous_summary(job.channel_id, job.message_ts)
+            if previous:
+                prefetch.append(previous["file_path"])
+    try:
+        return await asyncio.to_thread(github_service.resolve_base, list(dict.fromkeys(prefetch)))
+    except Exception as e:
+        logger.warning(f"Could not resolve the knowledge base repo for the batch, resolving it per job: {e}")
+        return None
+
+
+def parse_jobs(text: str) -> List[BatchJob]:
+    """Parse jobs from a JSON array or JSON Lines text.
+
+    Each job is an object with ``channel_id``, ``message_ts`` and an optional
+    ``response_url``.
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    if text.startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    return [
+        BatchJob(
+            channel_id=item["channel_id"],
+            message_ts=item["message_ts"],
+            response_url=item.get("response_url") or None
+        )
+        for item in items
+    ]
+
+
+async def run_batch(jobs: List[BatchJob]) -> List[BatchResult]:
+    """Process jobs with bounded concurrency, sharing one set of services.
+
+    Unless consolidation is disabled, the pull requests are opened once
+    every job has its summary, one per target article.
+    """
+    config = AppConfig.load()
+
+    metadata_store = MetadataStore(
+        config.cache.metadata_path,
+        ttl=config.cache.metadata_ttl,
+        thread_ttl=config.cache.thread_ttl
+    )
+    metadata_store.load()
+    summary_cache = open_summary_cache(config)
+    kb_index = open_kb_index(config)
+    vector_index = open_vector_index(config)
+    try:
+        slack_service = SlackService(config.slack, metadata_store)
+        github_service = GitHubService(
+            config.github, metadata_store, kb_index, create_kb_mirror(config), vector_index
+        )
+        summarizer = create_summarizer(config)
+        semaphore = asyncio.Semaphore(max(1, config.batch.concurrency))
+
+        # Jobs build on the same repo state, so it is resolved once rather than per job
+        base = await resolve_batch_base(config, github_service, jobs)
+        batcher = PullRequestBatcher(github_service, len(jobs), base) if config.batch.consolidate else None
+
+        async def run_job(job: BatchJob) -> BatchResult:
+            await semaphore.acquire()
+            waiting = False
+
+            async def open_pull_request(pending: PendingSummary, base: RepoBase) -> str:
+                nonlocal waiting
+                # Let the remaining jobs summarize while this one waits for the batch
+                waiting = True
+                semaphore.release()
+                return await batcher.submit(pending)
+
+            logger.info(f"Processing thread: channel={job.channel_id}, message={job.message_ts}")
+            try:
+                with metrics.span("thread", channel_id=job.channel_id, message_ts=job.message_ts):
+                    pr_url = await process_thread(
+                        config,
+                        slack_service,
+                        summarizer,
+                        github_service,
+                        job.channel_id,
+                        job.message_ts,
+                        job.response_url,
+                        summary_cache,
+                        open_pull_request if batcher else None,
+                        base
+                    )
+                return BatchResult(job=job, pr_url=pr_url)
+            except NoNewRepliesError:
+                return BatchResult(job=job)
+            except EmptyThreadError as e:
+                return BatchResult(job=job, error=str(e))
+            except Exception as e:
+                logger.error(f"Failed to process thread {job.channel_id}/{job.message_ts}: {e}", exc_info=True)
+                if job.response_url:
+                    try:
+                        await asyncio.to_thread(
+                            slack_service.update_ephemeral_message,
+                            response_url=job.response_url,
+                            text=f":x: Failed to process thread: {e}",
+                            message_link=build_message_link(config.slack.workspace_name, job.channel_id, job.message_ts)
+                        )
+                    except Exception as update_error:
+                        logger.error(f"Failed to update ephemeral message with error: {update_error}")
+                return BatchResult(job=job, error=str(e))
+            finally:
+                if not waiting:
+                    semaphore.release()
+                    if batcher:
+                        batcher.skip()
+
+        return await asyncio.gather(*(run_job(job) for job in jobs))
+    finally:
+        close_summary_cache(summary_cache)
+        close_kb_index(kb_index)
+        close_vector_index(vector_index)
+        metadata_store.save()
+        metrics.emit(otel=config.metrics.otel, service_name=config.metrics.service_name)
+
+
+def main():
+    """Batch main function.
+
+    Reads jobs from the file given as the first argument, or from stdin.
+    """
+    logger.info("Starting Slack Thread Summarizer in batch mode...")
+
+    if len(sys.argv) > 1 and sys.argv[1] != "-":
+        with open(sys.argv[1]) as f:
+            jobs = parse_jobs(f.read())
+    else:
+        jobs = parse_jobs(sys.stdin.read())
+
+    if not jobs:
+        logger.error("No jobs to process")
+        sys.exit(1)
+
+    logger.info(f"Processing {len(jobs)} threads")
+    results = asyncio.run(run_batch(jobs))
+
+    failed = [result for result in results if not result.success]
+    for result in results:
+        print(json.dumps({
+            "channel_id": result.job.channel_id,
+            "message_ts": result.job.message_ts,
+            "success": result.success,
+            "pr_url": result.pr_url,
+            "error": result.error
+        }))
+    logger.info(f"Batch finished: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+
+    # Write to GitHub step summary if available
+    if os.getenv("GITHUB_STEP_SUMMARY"):
+        with open(os.getenv("GITHUB_STEP_SUMMARY"), "a") as f:
+            f.write("### Slack Thread Summarizer (batch)\n\n")
+            f.write("| Channel | Message | Result |\n|---|---|---|\n")
+            for result in results:
+                outcome = (result.pr_url or "no new replies") if result.success else f":x: {result.error}"
+                f.write(f"| {result.job.channel_id} | {result.job.message_ts} | {outcome} |\n")
+    metrics.write_step_summary()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark merging summaries into large knowledge base articles.
+
+Grows synthetic articles by merging one summary after another into them, as
+happens to articles extended by many threads, and times the article document
+model against the regex-based merge it replaced. That both render the same
+articles is checked by tests/test_article.py.
+
+Usage:
+    python -m summarizer-python.benchmarks.merge [extensions]
+"""
+
+import random
+import re
+import sys
+import time
+
+from ..services.article import merge_articles
+
+SIZES = [10, 100, 500, 2000]
+
+_WORDS = "redis cluster failover replica sentinel kubernetes pod memory latency postgres vacuum index".split()
+
+
+def legacy_merge_articles(existing_content: str, new_summary: str, new_slack_link: str) -> str:
+    """The regex-based merge that GitHubService used before, kept as the baseline and reference output."""
+    # Extract existing sources section
+    sources_regex = re.compile(r"---\s*\*\*Source[s]?:\*\*(.+)$", re.DOTALL)
+    existing_sources_match = sources_regex.search(existing_content)
+    existing_sources = existing_sources_match.group(1).strip() if existing_sources_match else ""
+
+    # Remove sources section from existing content
+    content_without_sources = sources_regex.sub("", existing_content).strip()
+
+    # Extract keywords from new summary and merge with existing
+    new_keywords_regex = re.compile(r"\*\*Keywords:\*\*\s*(.+)")
+    new_keywords_match = new_keywords_regex.search(new_summary)
+    new_keywords = [k.strip() for k in new_keywords_match.group(1).split(",")] if new_keywords_match else []
+
+    existing_keywords_match = new_keywords_regex.search(content_without_sources)
+    existing_keywords = [k.strip() for k in existing_keywords_match.group(1).split(",")] if existing_keywords_match else []
+
+    # Merge keywords (deduplicate)
+    merged_keywords = list(dict.fromkeys(existing_keywords + new_keywords))[:10]
+
+    # Update keywords line in existing content
+    if existing_keywords_match and merged_keywords:
+        content_with_updated_keywords = content_without_sources.replace(
+            existing_keywords_match.group(0),
+            f"**Keywords:** {', '.join(merged_keywords)}"
+        )
+    elif merged_keywords:
+        # Add keywords after title if not present
+        lines = content_without_sources.split("\n")
+        title_index = next((i for i, line in enumerate(lines) if line.startswith("#")), -1)
+        if title_index >= 0 and title_index + 1 < len(lines):
+            lines.insert(title_index + 1, "")
+            lines.insert(title_index + 2, f"**Keywords:** {', '.join(merged_keywords)}")
+            content_with_updated_keywords = "\n".join(lines)
+        else:
+            content_with_updated_keywords = content_without_sources
+    else:
+        content_with_updated_keywords = content_without_sources
+
+    # Extract main content from new summary (without title and keywords)
+    new_summary_lines = new_summary.split("\n")
+    new_content_start = next(
+        (i for i, line in enumerate(new_summary_lines)
+         if not line.startswith("#") and "**Keywords:**" not in line and line.strip()),
+        0
+    )
+    new_content = "\n".join(new_summary_lines[new_content_start:]) if new_content_start >= 0 else new_summary
+
+    # Build new sources list
+    sources_list = []
+
+    # Parse existing sources
+    if existing_sources:
+        if existing_sources.startswith("- [Slack Thread]"):
+            sources_list.append(existing_sources.removeprefix("- "))
+        elif "\n- [Slack Thread]" in existing_sources:
+            for line in existing_sources.split("\n"):
+                if line.strip().startswith("- [Slack Thread]"):
+                    sources_list.append(line.strip().removeprefix("- "))
+        else:
+            sources_list.append(f"[Slack Thread]({existing_sources})")
+
+    # Add new source
+    sources_list.append(f"[Slack Thread]({new_slack_link})")
+
+    sources_section = (
+        f"**Source:** {sources_list[0]}" if len(sources_list) == 1
+        else "**Sources:**\n" + "\n".join(f"- {s}" for s in sources_list)
+    )
+
+    return f"""{content_with_updated_keywords}
+
+## Additional Context
+
+{new_content}
+
+---
+
+{sources_section}"""
+
+
+def synthetic_summary(index: int, rng: random.Random) -> str:
+    """Write a summary with a title, possibly keywords, and a few sections."""
+    sections = []
+    for section in range(rng.randint(1, 4)):
+        paragraph = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 120)))
+        sections.append(f"## Section {index}.{section}\n\n{paragraph}\n\n```\nkubectl get pods\n```")
+    keywords = ", ".join(rng.sample(_WORDS, rng.randint(0, 5)))
+    keywords_line = f"**Keywords:** {keywords}\n\n" if keywords else ""
+    return f"# Topic {index}\n\n{keywords_line}" + "\n\n".join(sections)
+
+
+def grow(merge, extensions: int) -> float:
+    """Extend an article with a summary extensions times.
+
+    Returns:
+        Seconds spent in merge
+    """
+    rng = random.Random(extensions)
+    article = synthetic_summary(0, rng) + "\n\n---\n\n**Source:** [Slack Thread](https://ws.slack.com/archives/C1/p0)"
+    elapsed = 0.0
+    for i in range(1, extensions + 1):
+        summary = synthetic_summary(i, rng)
+        started = time.perf_counter()
+        article = merge(article, summary, f"https://ws.slack.com/archives/C1/p{i}")
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def main():
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else SIZES
+    print(f"{'extensions':>10} {'legacy ms/merge':>16} {'model ms/merge':>15} {'speedup':>8}")
+    for extensions in sizes:
+        legacy = grow(legacy_merge_articles, extensions)
+        model = grow(merge_articles, extensions)
+        print(
+            f"{extensions:>10} {legacy / extensions * 1000:>16.3f} {model / extensions * 1000:>15.3f} "
+            f"{legacy / model:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
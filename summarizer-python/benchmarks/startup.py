@@ -0,0 +1,80 @@
+"""Benchmark summarizer startup import time.
+
+Runs a fresh interpreter per sample and reports how long importing the
+entry point and each provider module takes, SDKs included. Provider SDKs are
+now only imported when that provider is selected, so the entry point is then
+compared with importing it along with every provider, as it used to.
+
+Usage:
+    python -m summarizer-python.benchmarks.startup [samples]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+PACKAGE = __package__.rsplit(".", 1)[0]
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENTRY_POINT = f"{PACKAGE}.main"
+PROVIDERS = [
+    f"{PACKAGE}.services.claude_service",
+    f"{PACKAGE}.services.gemini_service",
+    f"{PACKAGE}.services.bedrock_service",
+]
+
+
+def measure_import(*modules: str) -> int:
+    """Import modules in a fresh interpreter and return how long that took in microseconds.
+
+    The imports are timed as a whole rather than read from ``-X importtime``,
+    whose per-module entries do not always nest an SDK under the module that
+    imports it.
+    """
+    imports = "; ".join(f"importlib.import_module('{module}')" for module in modules)
+    code = f"import importlib, time; started = time.perf_counter(); {imports}; print(time.perf_counter() - started)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    return int(float(result.stdout.strip().splitlines()[-1]) * 1e6)
+
+
+def report(label: str, timings: List[float]) -> None:
+    print(
+        f"{label:<50} median={statistics.median(timings):7.1f}ms "
+        f"min={min(timings):7.1f}ms max={max(timings):7.1f}ms ({len(timings)} samples)"
+    )
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    lazy = [measure_import(ENTRY_POINT) / 1000 for _ in range(samples)]
+    report(ENTRY_POINT, lazy)
+
+    installed = []
+    for module in PROVIDERS:
+        try:
+            timings = [measure_import(module) / 1000 for _ in range(samples)]
+        except ImportError as e:
+            print(f"{module:<50} skipped: {e}")
+            continue
+        installed.append(module)
+        report(module, timings)
+
+    if not installed:
+        return
+    # Importing every provider's SDK at startup is what the entry point did before the registry
+    eager = [measure_import(ENTRY_POINT, *installed) / 1000 for _ in range(samples)]
+    report("main with providers imported eagerly (before)", eager)
+    saved = statistics.median(eager) - statistics.median(lazy)
+    print(
+        f"Lazy providers save {saved:.1f}ms ({saved / statistics.median(eager):.0%}) of startup import time"
+        f" with {len(installed)} of {len(PROVIDERS)} provider SDKs installed"
+    )
+
+
+if __name__ == "__main__":
+    main()
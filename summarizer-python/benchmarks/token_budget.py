@@ -0,0 +1,67 @@
+"""Benchmark token budgeting across thread sizes.
+
+Reports the time spent fitting a thread into the budget, alongside the
+estimated prompt tokens sent with and without budgeting as latency and cost
+proxies.
+
+Usage:
+    python -m summarizer-python.benchmarks.token_budget [max_input_tokens]
+"""
+
+import random
+import sys
+import time
+
+from ..models import SlackMessage
+from ..services.token_budget import TokenBudget, estimate_tokens
+
+SIZES = [10, 100, 1000, 5000, 20000]
+
+# Illustrative input price in USD per million tokens
+PRICE_PER_MTOK = 3.0
+
+_FILLER = ["thanks!", "+1", "same here", "looking", "ok will try", "nice"]
+_WORDS = (
+    "redis cluster failover replica sentinel timeout connection pool kubernetes "
+    "deployment rollout memory latency index query postgres vacuum autoscaler "
+    "config terraform module alert threshold dashboard metric retention shard"
+).split()
+
+
+def synthetic_thread(size: int, seed: int = 0):
+    """Build a thread mixing technical replies and short acknowledgments."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(size):
+        if i and rng.random() < 0.4:
+            text = rng.choice(_FILLER)
+        else:
+            text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(10, 80)))
+            if rng.random() < 0.1:
+                text += "\n```\nkubectl rollout restart deployment/api\n```"
+        messages.append(SlackMessage(user=f"U{i % 7}", username="", text=text, timestamp=f"{1700000000 + i}.000100"))
+    return messages
+
+
+def main():
+    max_tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    budget = TokenBudget(max_tokens)
+
+    print(f"Budget: {max_tokens} tokens, input price proxy: ${PRICE_PER_MTOK}/Mtok")
+    print(f"{'messages':>9} {'fit ms':>8} {'raw tok':>10} {'budget tok':>10} {'kept':>6} {'raw $':>9} {'budget $':>9}")
+    for size in SIZES:
+        messages = synthetic_thread(size)
+        unbudgeted = sum(estimate_tokens(message.text) + 1 for message in messages)
+
+        started = time.perf_counter()
+        result = budget.fit(messages)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        print(
+            f"{size:>9} {elapsed:>8.1f} {unbudgeted:>10} {result.tokens:>10} {len(result.messages):>6} "
+            f"${unbudgeted * PRICE_PER_MTOK / 1e6:>8.4f} ${result.tokens * PRICE_PER_MTOK / 1e6:>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
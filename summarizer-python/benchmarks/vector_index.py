@@ -0,0 +1,118 @@
+"""Benchmark the knowledge base vector index on a large synthetic knowledge base.
+
+Builds the index over synthetic articles, then reports build and incremental
+update time, lookup latency, matrix size, and how often a rewritten article
+on the same topic is matched (duplicates) versus an article on a new topic
+(false positives) at the configured similarity threshold. The keyword index
+is measured alongside for comparison.
+
+Usage:
+    python -m summarizer-python.benchmarks.vector_index [articles] [threshold]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from ..kb_index import KBIndex, parse_article
+from ..vector_index import HashingEmbedder, VectorIndex
+
+QUERIES = 200
+UPDATES = 50
+
+_SYLLABLES = "ka lo mi ne ru sa ti vo be da fe gi ho ju ke la mo nu pi re si to vu xe yo ze".split()
+
+
+def synthetic_vocabulary(size: int, rng: random.Random):
+    """Build distinct pseudo-words so topics do not share terms by accident."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_article(topic, common, rng: random.Random) -> str:
+    """Write an article about a topic, mixing its terms with common vocabulary."""
+    title = " ".join(rng.sample(topic, 4)).title()
+    keywords = ", ".join(rng.sample(topic, 5))
+    paragraphs = []
+    for _ in range(rng.randint(3, 8)):
+        words = [rng.choice(topic) if rng.random() < 0.4 else rng.choice(common) for _ in range(rng.randint(30, 80))]
+        paragraphs.append(" ".join(words) + ".")
+    return f"# {title}\n\n**Keywords:** {keywords}\n\n" + "\n\n".join(paragraphs)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.35
+    rng = random.Random(0)
+
+    vocabulary = synthetic_vocabulary(count * 8 + 2000, rng)
+    common = vocabulary[:2000]
+    topics = [vocabulary[2000 + i * 8:2000 + (i + 1) * 8] + rng.sample(vocabulary[2000:], 12) for i in range(count)]
+    articles = [(f"knowledge-base/article-{i}.md", synthetic_article(topic, common, rng)) for i, topic in enumerate(topics)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        vector_index = VectorIndex(os.path.join(directory, "vectors"), HashingEmbedder())
+        kb_index = KBIndex(os.path.join(directory, "kb_index.sqlite"))
+        kb_index.open()
+
+        started = time.perf_counter()
+        vector_index.update("bench/kb", "c1", articles, rebuild=True)
+        vector_build = time.perf_counter() - started
+        started = time.perf_counter()
+        kb_index.update("bench/kb", "c1", articles, rebuild=True)
+        keyword_build = time.perf_counter() - started
+
+        changed = [(path, synthetic_article(topics[i], common, rng)) for i, (path, _) in enumerate(rng.sample(articles, UPDATES))]
+        started = time.perf_counter()
+        vector_index.update("bench/kb", "c2", changed)
+        vector_update = time.perf_counter() - started
+
+        # Rewrites of existing articles should match them, articles on new topics should not
+        duplicates = rng.sample(range(count), QUERIES)
+        new_topics = [rng.sample(vocabulary[2000:], 20) for _ in range(QUERIES)]
+        results = {"vector": ([], 0, 0), "keyword": ([], 0, 0)}
+        for name, search in (
+            ("vector", lambda text: vector_index.search(text, k=1)),
+            # The keyword index is queried with the title and keywords, as when matching summaries
+            ("keyword", lambda text: kb_index.search("\n".join(parse_article(text)[:2]), limit=1)),
+        ):
+            latencies, hits, false_positives = [], 0, 0
+            for i in duplicates:
+                query = synthetic_article(topics[i], common, rng)
+                started = time.perf_counter()
+                matches = search(query)
+                latencies.append(time.perf_counter() - started)
+                hits += bool(matches) and matches[0][0] == f"knowledge-base/article-{i}.md" and matches[0][1] >= threshold
+            for topic in new_topics:
+                matches = search(synthetic_article(topic, common, rng))
+                false_positives += bool(matches) and matches[0][1] >= threshold
+            results[name] = (latencies, hits, false_positives)
+
+        matrix_mb = os.path.getsize(vector_index.vectors_path) / 1e6
+        vector_index.close()
+        kb_index.close()
+
+    print(f"Articles: {count}, threshold: {threshold}, matrix: {matrix_mb:.1f} MB")
+    print(f"Vector index build: {vector_build:.2f}s, update of {UPDATES} articles: {vector_update * 1000:.1f}ms")
+    print(f"Keyword index build: {keyword_build:.2f}s")
+    print(f"{'index':>8} {'p50 ms':>8} {'p95 ms':>8} {'dup hits':>9} {'false pos':>10}")
+    for name, (latencies, hits, false_positives) in results.items():
+        print(
+            f"{name:>8} {statistics.median(latencies) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f} "
+            f"{hits / QUERIES:>9.0%} {false_positives / QUERIES:>10.0%}"
+        )
+    print("Keyword scores are BM25 normalized to 0..1 and compared to the same threshold")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
 """Configuration management for the summarizer."""
 
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 @dataclass
 class AIConfig:
     """AI provider configuration."""
     provider: str
+    max_input_tokens: int = 50000
+    max_output_tokens: int = 4096
+    map_reduce: bool = True
+    map_concurrency: int = 4
+    stream: bool = True
+    incremental: bool = True
+    providers: List[str] = field(default_factory=list)
+    provider_timeout: float = 300.0
+    hedge: bool = False
+    hedge_after: float = 30.0
+    rate_limit: float = 2.0
+    max_retries: int = 5
 
 
 @dataclass
@@ -16,6 +28,13 @@ class SlackConfig:
     """Slack API configuration."""
     bot_token: str
     workspace_name: str
+    page_size: int = 200
+    max_messages: int = 5000
+    progress_interval: float = 5.0
+    max_progress_updates: int = 3
+    progress_preview_chars: int = 500
+    rate_limit: float = 1.0
+    max_retries: int = 5
 
 
 @dataclass
@@ -46,6 +65,68 @@ class GitHubConfig:
     repo_owner: str
     repo_name: str
     branch_prefix: str = "kb/add-"
+    rate_limit: float = 2.0
+    max_retries: int = 5
+    use_graphql: bool = False
+    # Score from 0 to 1 an indexed article needs to be extended instead of a new one being created
+    match_min_score: float = 0.35
+    # Cosine similarity an article needs in the vector index to be extended instead of a new one being created
+    similarity_threshold: float = 0.35
+
+
+@dataclass
+class CacheConfig:
+    """Persistent cache configuration."""
+    directory: str = ""
+    metadata_ttl: int = 86400
+    thread_ttl: int = 90 * 86400
+    summaries: bool = True
+    summary_max_bytes: int = 50 * 1024 * 1024
+    kb_index: bool = True
+    kb_mirror: bool = False
+    vector_index: bool = False
+    embedder: str = "hashing"
+
+    @property
+    def metadata_path(self) -> Optional[str]:
+        """Path of the metadata store file, or None if caching is disabled."""
+        return os.path.join(self.directory, "metadata.json") if self.directory else None
+
+    @property
+    def summary_path(self) -> Optional[str]:
+        """Path of the summary cache database, or None if caching is disabled."""
+        return os.path.join(self.directory, "summaries.sqlite") if self.directory else None
+
+    @property
+    def kb_index_path(self) -> Optional[str]:
+        """Path of the knowledge base index database, or None if caching is disabled."""
+        return os.path.join(self.directory, "kb_index.sqlite") if self.directory else None
+
+    @property
+    def vector_index_path(self) -> Optional[str]:
+        """Directory of the knowledge base vector index, or None if caching is disabled."""
+        return os.path.join(self.directory, "kb_vectors") if self.directory else None
+
+    @property
+    def kb_mirror_path(self) -> Optional[str]:
+        """Path of the local knowledge base clone, or None if caching is disabled."""
+        return os.path.join(self.directory, "kb-mirror") if self.directory else None
+
+
+@dataclass
+class BatchConfig:
+    """Batch mode configuration."""
+    concurrency: int = 4
+    # Open one pull request per article for all summaries that target it
+    consolidate: bool = True
+
+
+@dataclass
+class MetricsConfig:
+    """Metrics export configuration."""
+    # Export spans and counters with the OpenTelemetry SDK, configured by OTEL_EXPORTER_OTLP_* variables
+    otel: bool = False
+    service_name: str = "slack-thread-summarizer"
 
 
 @dataclass
@@ -57,17 +138,44 @@ class AppConfig:
     gemini: GeminiConfig
     bedrock: BedrockConfig
     github: GitHubConfig
+    cache: CacheConfig
+    batch: BatchConfig
+    metrics: MetricsConfig
 
     @classmethod
     def load(cls) -> "AppConfig":
         """Load configuration from environment variables."""
         ai_provider = os.getenv("AI_PROVIDER", "gemini")
+        max_retries = int(os.getenv("API_MAX_RETRIES", "5"))
+        # AI_PROVIDERS lists fallbacks in order; its first entry is the primary provider
+        ai_providers = [name.strip() for name in os.getenv("AI_PROVIDERS", ai_provider).split(",") if name.strip()]
 
         return cls(
-            ai=AIConfig(provider=ai_provider),
+            ai=AIConfig(
+                provider=ai_providers[0] if ai_providers else ai_provider,
+                max_input_tokens=int(os.getenv("AI_MAX_INPUT_TOKENS", "50000")),
+                max_output_tokens=int(os.getenv("AI_MAX_OUTPUT_TOKENS", "4096")),
+                map_reduce=os.getenv("AI_MAP_REDUCE", "true").lower() == "true",
+                map_concurrency=int(os.getenv("AI_MAP_CONCURRENCY", "4")),
+                stream=os.getenv("AI_STREAM", "true").lower() == "true",
+                incremental=os.getenv("AI_INCREMENTAL", "true").lower() == "true",
+                providers=ai_providers,
+                provider_timeout=float(os.getenv("AI_PROVIDER_TIMEOUT", "300")),
+                hedge=os.getenv("AI_HEDGE", "false").lower() == "true",
+                hedge_after=float(os.getenv("AI_HEDGE_AFTER", "30")),
+                rate_limit=float(os.getenv("AI_RATE_LIMIT", "2")),
+                max_retries=max_retries
+            ),
             slack=SlackConfig(
                 bot_token=os.getenv("SLACK_BOT_TOKEN", ""),
-                workspace_name=os.getenv("SLACK_WORKSPACE_NAME", "")
+                workspace_name=os.getenv("SLACK_WORKSPACE_NAME", ""),
+                page_size=int(os.getenv("SLACK_PAGE_SIZE", "200")),
+                max_messages=int(os.getenv("SLACK_MAX_MESSAGES", "5000")),
+                progress_interval=float(os.getenv("SLACK_PROGRESS_INTERVAL", "5")),
+                max_progress_updates=int(os.getenv("SLACK_MAX_PROGRESS_UPDATES", "3")),
+                progress_preview_chars=int(os.getenv("SLACK_PROGRESS_PREVIEW_CHARS", "500")),
+                rate_limit=float(os.getenv("SLACK_RATE_LIMIT", "1")),
+                max_retries=max_retries
             ),
             claude=ClaudeConfig(
                 api_key=os.getenv("ANTHROPIC_API_KEY", ""),
@@ -85,6 +193,30 @@ class AppConfig:
                 token=os.getenv("GITHUB_TOKEN", ""),
                 repo_owner=os.getenv("KB_REPO_OWNER", ""),
                 repo_name=os.getenv("KB_REPO_NAME", ""),
-                branch_prefix=os.getenv("GITHUB_BRANCH_PREFIX", "kb/add-")
+                branch_prefix=os.getenv("GITHUB_BRANCH_PREFIX", "kb/add-"),
+                rate_limit=float(os.getenv("GITHUB_RATE_LIMIT", "2")),
+                max_retries=max_retries,
+                use_graphql=os.getenv("GITHUB_USE_GRAPHQL", "false").lower() == "true",
+                match_min_score=float(os.getenv("KB_MATCH_MIN_SCORE", "0.35")),
+                similarity_threshold=float(os.getenv("KB_SIMILARITY_THRESHOLD", "0.35"))
+            ),
+            cache=CacheConfig(
+                directory=os.getenv("SUMMARIZER_CACHE_DIR", ""),
+                metadata_ttl=int(os.getenv("SLACK_METADATA_TTL", "86400")),
+                thread_ttl=int(os.getenv("THREAD_STATE_TTL", str(90 * 86400))),
+                summaries=os.getenv("SUMMARY_CACHE", "true").lower() == "true",
+                summary_max_bytes=int(os.getenv("SUMMARY_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+                kb_index=os.getenv("KB_INDEX", "true").lower() == "true",
+                kb_mirror=os.getenv("KB_MIRROR", "false").lower() == "true",
+                vector_index=os.getenv("KB_VECTOR_INDEX", "false").lower() == "true",
+                embedder=os.getenv("KB_EMBEDDER", "hashing")
+            ),
+            batch=BatchConfig(
+                concurrency=int(os.getenv("SUMMARIZER_BATCH_CONCURRENCY", "4")),
+                consolidate=os.getenv("SUMMARIZER_BATCH_CONSOLIDATE", "true").lower() == "true"
+            ),
+            metrics=MetricsConfig(
+                otel=os.getenv("METRICS_OTEL", "false").lower() == "true",
+                service_name=os.getenv("OTEL_SERVICE_NAME", "slack-thread-summarizer")
             )
         )
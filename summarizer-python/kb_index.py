@@ -0,0 +1,262 @@
+"""Persisted inverted index of knowledge base articles for matching summaries to articles."""
+
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .services.article import ArticleDocument
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenizing or weighting changes so persisted indexes are rebuilt
+INDEX_VERSION = "2"
+
+_TERM_RE = re.compile(r"[a-z0-9]+")
+
+# Common words that say nothing about an article's topic
+STOPWORDS = frozenset("""
+    about after also and any are because been before but can could did does doing for from had has have
+    how into its just more most not now off once only other our out over same should some such than that
+    the their them then there these they this those through too under until use used using very was were
+    what when where which while who why will with would you your
+""".split())
+
+# Weight of a term occurrence by the part of the article it appears in
+TITLE_WEIGHT = 3.0
+KEYWORDS_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+
+# Suffixes stripped so that e.g. "restarts" and "restarting" match "restart"
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def stem(term: str) -> str:
+    """Strip a common English suffix, keeping at least three characters."""
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase, stemmed index terms, dropping short words and stopwords."""
+    return [stem(term) for term in _TERM_RE.findall(text.lower()) if len(term) > 2 and term not in STOPWORDS]
+
+
+def parse_article(content: str) -> Tuple[str, str, str]:
+    """Split a markdown article into its title, keywords line and body.
+
+    The article is parsed like it is for merges, by ArticleDocument. The
+    title and keywords lines are left out of the body, as they are weighted
+    on their own, and so is the sources section, since it only holds links.
+    """
+    document = ArticleDocument.parse(content)
+    body = document.body
+    spans = [document.keywords_span] if document.keywords_span else []
+    if document.title_end >= 0:
+        spans.append((body.rfind("\n", 0, document.title_end) + 1, document.title_end))
+    for start, end in sorted(spans, reverse=True):
+        body = body[:start] + body[end:]
+    return document.title or "", ", ".join(document.keywords), body
+
+
+def weighted_terms(content: str) -> Counter:
+    """Term frequencies of an article, weighted by where each term appears."""
+    title, keywords, body = parse_article(content)
+    terms: Counter = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (keywords, KEYWORDS_WEIGHT), (body, BODY_WEIGHT)):
+        for term in tokenize(text):
+            terms[term] += weight
+    return terms
+
+
+class KBIndex:
+    """Inverted index of knowledge base articles with BM25 scoring.
+
+    The index records the commit it was built from, so callers can bring it
+    up to date with only the articles changed since. Like the summary cache,
+    the database lives in the cache directory and is restored from and saved
+    to the GitHub Actions cache around a run.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """Initialize the index.
+
+        Args:
+            path: SQLite file to persist the index to, or None for in-memory only
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Open the database, creating its schema if needed."""
+        try:
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS docs (path TEXT PRIMARY KEY, title TEXT NOT NULL, length REAL NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS postings ("
+                " term TEXT NOT NULL, path TEXT NOT NULL, tf REAL NOT NULL,"
+                " PRIMARY KEY (term, path)) WITHOUT ROWID;"
+                "CREATE INDEX IF NOT EXISTS postings_path ON postings (path);"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open knowledge base index {self.path}: {e}")
+            return
+        self._conn = conn
+        logger.debug(f"Opened knowledge base index {self.path or ':memory:'}")
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not close knowledge base index {self.path}: {e}")
+            self._conn = None
+
+    @property
+    def available(self) -> bool:
+        """Whether the database could be opened."""
+        return self._conn is not None
+
+    def state(self) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (repository, commit) the index was last built from.
+
+        Both are None for an empty index or one built by another version.
+        """
+        with self._lock:
+            if self._conn is None:
+                return None, None
+            meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if meta.get("version") != INDEX_VERSION:
+            return None, None
+        return meta.get("repo"), meta.get("commit")
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                return 0
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def contains(self, path: str) -> bool:
+        """Whether an article is in the index."""
+        with self._lock:
+            if self._conn is None:
+                return False
+            return self._conn.execute("SELECT 1 FROM docs WHERE path = ?", (path,)).fetchone() is not None
+
+    def update(
+        self,
+        repo: str,
+        commit: str,
+        articles: Iterable[Tuple[str, str]],
+        removed: Iterable[str] = (),
+        rebuild: bool = False
+    ) -> None:
+        """Index articles and record the commit the index now reflects.
+
+        Args:
+            repo: Full name of the knowledge base repository
+            commit: Commit the given changes bring the index up to
+            articles: (path, content) of added or modified articles
+            removed: Paths of deleted articles
+            rebuild: Drop everything indexed so far first
+        """
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                if rebuild:
+                    self._conn.execute("DELETE FROM postings")
+                    self._conn.execute("DELETE FROM docs")
+                for path in removed:
+                    self._remove(path)
+                count = 0
+                for path, content in articles:
+                    self._remove(path)
+                    terms = weighted_terms(content)
+                    self._conn.execute(
+                        "INSERT INTO docs (path, title, length) VALUES (?, ?, ?)",
+                        (path, parse_article(content)[0], sum(terms.values()))
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO postings (term, path, tf) VALUES (?, ?, ?)",
+                        [(term, path, tf) for term, tf in terms.items()]
+                    )
+                    count += 1
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("version", INDEX_VERSION), ("repo", repo), ("commit", commit)]
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.warning(f"Could not update knowledge base index: {e}")
+                return
+        logger.debug(f"{'Rebuilt' if rebuild else 'Updated'} knowledge base index at {commit}: {count} articles indexed")
+
+    def search(self, text: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Rank articles against text with BM25.
+
+        Scores are divided by the highest score any article could reach for
+        the query, so they fall between 0 and 1 and can be compared to a
+        fixed threshold whatever the query length.
+
+        Returns:
+            Up to limit (path, score) pairs, best first
+        """
+        query = Counter(tokenize(text))
+        if not query:
+            return []
+
+        with self._lock:
+            if self._conn is None:
+                return []
+            count, avg_length = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not count:
+                return []
+            placeholders = ",".join("?" * len(query))
+            postings = self._conn.execute(
+                f"SELECT p.term, p.path, p.tf, d.length FROM postings p JOIN docs d ON d.path = p.path"
+                f" WHERE p.term IN ({placeholders})",
+                list(query)
+            ).fetchall()
+
+        by_term: Dict[str, List[Tuple[str, float, float]]] = {}
+        for term, path, tf, length in postings:
+            by_term.setdefault(term, []).append((path, tf, length))
+
+        scores: Dict[str, float] = {}
+        best_possible = 0.0
+        for term, weight in query.items():
+            matches = by_term.get(term, [])
+            idf = math.log(1 + (count - len(matches) + 0.5) / (len(matches) + 0.5))
+            best_possible += weight * idf * (self.k1 + 1)
+            for path, tf, length in matches:
+                norm = self.k1 * (1 - self.b + self.b * length / (avg_length or 1))
+                scores[path] = scores.get(path, 0.0) + weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(path, score / best_possible) for path, score in ranked] if best_possible else []
+
+    def _remove(self, path: str) -> None:
+        """Drop an article from the index. Callers hold the lock."""
+        self._conn.execute("DELETE FROM postings WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM docs WHERE path = ?", (path,))
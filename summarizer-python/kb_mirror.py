@@ -0,0 +1,202 @@
+"""Local shallow clone of the knowledge base repo, kept in the cache directory."""
+
+import base64
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Identity of commits made in the mirror when git has none configured
+DEFAULT_AUTHOR_NAME = "github-actions[bot]"
+DEFAULT_AUTHOR_EMAIL = "41898283+github-actions[bot]@users.noreply.github.com"
+
+
+class KBMirrorError(Exception):
+    """Raised when a git command in the mirror fails."""
+
+
+class KBMirror:
+    """Shallow, single-branch clone of the knowledge base repo without a checkout.
+
+    The clone lives in the cache directory, so it is restored from the
+    GitHub Actions cache and only needs a single fetch to catch up with the
+    default branch. Files are read straight from git objects and commits are
+    built with plumbing commands, so no working tree is ever written. The
+    token is passed per command and never stored in the clone, which ends up
+    in the Actions cache.
+    """
+
+    def __init__(self, path: str, url: str, token: str = ""):
+        """Initialize the mirror.
+
+        Args:
+            path: Directory of the clone
+            url: HTTPS URL of the repository
+            token: GitHub token used to fetch and push
+        """
+        self.path = path
+        self.url = url
+        self.token = token
+        self._lock = threading.Lock()
+
+    def sync(self) -> Tuple[str, str]:
+        """Clone the repo or fast-forward the clone to the remote default branch.
+
+        Returns:
+            (default branch, head commit SHA)
+        """
+        with self._lock:
+            if os.path.isdir(os.path.join(self.path, ".git")):
+                try:
+                    self._git("fetch", "--depth=1", "--prune", "origin", network=True)
+                except KBMirrorError as e:
+                    # E.g. the default branch was renamed; start over
+                    logger.warning(f"Could not update knowledge base mirror, cloning it again: {e}")
+                    shutil.rmtree(self.path)
+                    self._clone()
+            else:
+                self._clone()
+
+            branch = self._git("symbolic-ref", "--short", "refs/remotes/origin/HEAD").strip().removeprefix("origin/")
+            sha = self._git("rev-parse", f"refs/remotes/origin/{branch}").strip()
+        logger.debug(f"Knowledge base mirror is at {branch}@{sha}")
+        return branch, sha
+
+    def list_files(self, commit: str, directory: str) -> List[str]:
+        """Paths of the files directly inside directory at commit."""
+        output = self._git("ls-tree", "-z", "--name-only", commit, f"{directory}/")
+        return [path for path in output.split("\0") if path]
+
+    def has_commit(self, commit: str) -> bool:
+        """Whether the commit's objects are in the mirror."""
+        try:
+            self._git("cat-file", "-e", f"{commit}^{{commit}}")
+            return True
+        except KBMirrorError:
+            return False
+
+    def read(self, commit: str, path: str) -> Optional[str]:
+        """Text of a file at commit, or None if it does not exist."""
+        return self.read_many(commit, [path]).get(path)
+
+    def read_many(self, commit: str, paths: Sequence[str]) -> Dict[str, str]:
+        """Text of several files at commit with one git process, skipping missing ones."""
+        if not paths:
+            return {}
+        output = self._git_raw(
+            ["cat-file", "--batch"],
+            input="".join(f"{commit}:{path}\n" for path in paths).encode("utf-8")
+        )
+
+        files = {}
+        offset = 0
+        for path in paths:
+            header_end = output.index(b"\n", offset)
+            header = output[offset:header_end].decode("utf-8")
+            offset = header_end + 1
+            if header.endswith(" missing"):
+                continue
+            size = int(header.rsplit(" ", 1)[1])
+            files[path] = output[offset:offset + size].decode("utf-8", errors="replace")
+            # Contents are followed by a newline
+            offset += size + 1
+        return files
+
+    def changed_files(self, since: str, commit: str, directory: str) -> List[Tuple[str, str]]:
+        """List (status, path) of files in directory changed between two commits.
+
+        Renames are reported as a deletion and an addition.
+        """
+        output = self._git("diff-tree", "-r", "-z", "--no-renames", "--name-status", since, commit, "--", f"{directory}/")
+        fields = [field for field in output.split("\0") if field]
+        return list(zip(fields[0::2], fields[1::2]))
+
+    def commit_file(self, parent: str, branch: str, path: str, content: str, message: str) -> str:
+        """Commit a file on top of parent and push it as a new branch.
+
+        Returns:
+            SHA of the new commit
+        """
+        blob = self._git_raw(["hash-object", "-w", "--stdin"], input=content.encode("utf-8")).decode().strip()
+
+        # A throwaway index keeps concurrent commits apart and leaves the clone untouched
+        fd, index_path = tempfile.mkstemp(prefix="kb-index-")
+        os.close(fd)
+        os.unlink(index_path)
+        try:
+            env = {"GIT_INDEX_FILE": index_path}
+            self._git("read-tree", parent, env=env)
+            self._git("update-index", "--add", "--cacheinfo", f"100644,{blob},{path}", env=env)
+            tree = self._git("write-tree", env=env).strip()
+        finally:
+            if os.path.exists(index_path):
+                os.unlink(index_path)
+
+        env = {
+            "GIT_AUTHOR_NAME": os.getenv("GIT_AUTHOR_NAME", DEFAULT_AUTHOR_NAME),
+            "GIT_AUTHOR_EMAIL": os.getenv("GIT_AUTHOR_EMAIL", DEFAULT_AUTHOR_EMAIL),
+            "GIT_COMMITTER_NAME": os.getenv("GIT_COMMITTER_NAME", DEFAULT_AUTHOR_NAME),
+            "GIT_COMMITTER_EMAIL": os.getenv("GIT_COMMITTER_EMAIL", DEFAULT_AUTHOR_EMAIL),
+        }
+        commit = self._git("commit-tree", tree, "-p", parent, "-m", message, env=env).strip()
+        self._git("push", "origin", f"{commit}:refs/heads/{branch}", network=True)
+        return commit
+
+    def _clone(self) -> None:
+        """Make a shallow clone of the default branch without checking it out."""
+        logger.info(f"Cloning knowledge base into {self.path}")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._git_raw(
+            ["clone", "--depth=1", "--single-branch", "--no-checkout", "--quiet", self.url, self.path],
+            network=True,
+            in_repo=False
+        )
+
+    def _git(self, *args: str, env: Optional[Dict[str, str]] = None, network: bool = False) -> str:
+        """Run a git command in the clone and return its output as text."""
+        return self._git_raw(list(args), env=env, network=network).decode("utf-8")
+
+    def _git_raw(
+        self,
+        args: List[str],
+        input: Optional[bytes] = None,
+        env: Optional[Dict[str, str]] = None,
+        network: bool = False,
+        in_repo: bool = True
+    ) -> bytes:
+        """Run a git command and return its raw output.
+
+        Args:
+            args: Arguments after "git"
+            input: Bytes to pass on stdin
+            env: Extra environment variables
+            network: Authenticate the command against GitHub
+            in_repo: Run the command inside the clone
+        """
+        command = ["git"]
+        if network and self.token:
+            credentials = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+            command += ["-c", f"http.extraHeader=AUTHORIZATION: basic {credentials}"]
+        if in_repo:
+            command += ["-C", self.path]
+        command += args
+
+        try:
+            result = subprocess.run(
+                command,
+                input=input,
+                capture_output=True,
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0", **(env or {})},
+                check=True
+            )
+        except FileNotFoundError as e:
+            raise KBMirrorError("git is not installed") from e
+        except subprocess.CalledProcessError as e:
+            # Drop the original error, its command line may carry the token
+            raise KBMirrorError(f"git {args[0]} failed: {e.stderr.decode('utf-8', errors='replace').strip()}") from None
+        return result.stdout
@@ -1,15 +1,28 @@
 """Main entry point for the Slack Thread Summarizer."""
 
+import asyncio
 import logging
 import os
 import sys
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
+from . import metrics
 from .config import AppConfig
+from .kb_index import KBIndex
+from .kb_mirror import KBMirror
+from .metadata_store import MetadataStore
+from .summary_cache import SummaryCache, summary_cache_key
 from .services.slack_service import SlackService
-from .services.gemini_service import GeminiService
-from .services.claude_service import ClaudeService
-from .services.bedrock_service import BedrockService
-from .services.github_service import GitHubService
+from .services.github_service import GitHubService, PendingSummary, RepoBase, ThreadArticle
+from .services.progress import StreamProgress
+from .services.prompts import PROMPT_VERSION
+from .services.provider import SummaryProvider, create_provider
+from .services.router import ProviderRouter
+
+if TYPE_CHECKING:
+    from .vector_index import VectorIndex
 
 # Configure logging
 logging.basicConfig(
@@ -19,107 +32,436 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def main():
-    """Main function."""
-    logger.info("Starting Slack Thread Summarizer...")
+class EmptyThreadError(Exception):
+    """Raised when a thread has no messages to summarize."""
 
-    if len(sys.argv) < 3:
-        logger.error("Usage: <channel_id> <message_ts>")
-        sys.exit(1)
 
-    channel_id = sys.argv[1]
-    message_ts = sys.argv[2]
+class NoNewRepliesError(Exception):
+    """Raised when a thread has no replies since its article was written."""
+
+
+def create_summarizer(config: AppConfig) -> SummaryProvider:
+    """Create the summary service for the configured AI provider.
+
+    With several providers in AI_PROVIDERS, they are wrapped in a router
+    that fails over between them and optionally hedges slow requests.
+    """
+    if len(config.ai.providers) > 1:
+        summarizer = ProviderRouter(
+            [create_provider(name, config) for name in config.ai.providers],
+            timeout=config.ai.provider_timeout,
+            hedge=config.ai.hedge,
+            hedge_after=config.ai.hedge_after
+        )
+    else:
+        summarizer = create_provider(config.ai.provider, config)
+    logger.info(f"Generating summaries with {summarizer.name}")
+    return summarizer
+
+
+def open_summary_cache(config: AppConfig) -> Optional[SummaryCache]:
+    """Open the summary cache, or return None if it is disabled."""
+    if not config.cache.summaries:
+        return None
+    summary_cache = SummaryCache(config.cache.summary_path, max_bytes=config.cache.summary_max_bytes)
+    summary_cache.open()
+    return summary_cache
 
-    logger.info(f"Processing thread: channel={channel_id}, message={message_ts}")
 
+def summary_models(config: AppConfig, summarizer: SummaryProvider) -> List[Tuple[str, SummaryProvider]]:
+    """Providers that may have generated a cached summary, with their names, in order of preference.
+
+    Summaries are cached under the provider and model that generated them.
+    Behind a router, any of its providers may have answered, so each is
+    looked up in turn.
+    """
+    if isinstance(summarizer, ProviderRouter):
+        return list(zip(config.ai.providers, summarizer.providers))
+    return [(config.ai.provider, summarizer)]
+
+
+def close_summary_cache(summary_cache: Optional[SummaryCache]) -> None:
+    """Log the cache hit ratio and close the summary cache."""
+    if summary_cache is None:
+        return
+    hits, misses = summary_cache.stats()
+    hit_ratio = summary_cache.hit_ratio()
+    if hit_ratio is not None:
+        logger.info(f"Summary cache hit ratio: {hit_ratio:.0%} ({hits} hits, {misses} misses)")
+    summary_cache.close()
+
+
+def open_kb_index(config: AppConfig) -> Optional[KBIndex]:
+    """Open the knowledge base index, or return None if it is disabled.
+
+    The index is only kept with a cache directory: rebuilding it on every
+    run would cost more than the listing it replaces.
+    """
+    if not config.cache.kb_index or not config.cache.kb_index_path:
+        return None
+    kb_index = KBIndex(config.cache.kb_index_path)
+    kb_index.open()
+    return kb_index if kb_index.available else None
+
+
+def close_kb_index(kb_index: Optional[KBIndex]) -> None:
+    """Close the knowledge base index."""
+    if kb_index is not None:
+        kb_index.close()
+
+
+def open_vector_index(config: AppConfig) -> Optional["VectorIndex"]:
+    """Open the knowledge base vector index, or return None if it is disabled.
+
+    NumPy and the embedder are only imported here, so runs without the
+    vector index do not need them.
+    """
+    if not config.cache.vector_index or not config.cache.vector_index_path:
+        return None
     try:
-        config = AppConfig.load()
+        from .vector_index import VectorIndex, create_embedder
+        embedder = create_embedder(config.cache.embedder)
+    except (ImportError, AttributeError, ValueError) as e:
+        logger.warning(f"Could not load the vector index, matching articles without it: {e}")
+        return None
+    vector_index = VectorIndex(config.cache.vector_index_path, embedder, config.cache.embedder)
+    vector_index.open()
+    return vector_index
 
-        slack_service = SlackService(config.slack)
-        github_service = GitHubService(config.github)
-        response_url = os.getenv("SLACK_RESPONSE_URL")
 
-        # Fetch thread
-        logger.info("Fetching thread...")
-        thread = slack_service.fetch_thread(channel_id, message_ts)
+def close_vector_index(vector_index: Optional["VectorIndex"]) -> None:
+    """Flush the knowledge base vector index to disk."""
+    if vector_index is not None:
+        vector_index.close()
 
-        if not thread.messages:
-            logger.error("No messages found in thread")
-            if response_url:
-                workspace_name = config.slack.workspace_name
-                message_id = message_ts.replace(".", "")
-                message_link = f"https://{workspace_name}.slack.com/archives/{channel_id}/p{message_id}" if workspace_name else None
-                slack_service.update_ephemeral_message(
+
+def create_kb_mirror(config: AppConfig) -> Optional[KBMirror]:
+    """Create the local knowledge base mirror, or return None if it is disabled."""
+    if not config.cache.kb_mirror or not config.cache.kb_mirror_path:
+        return None
+    return KBMirror(
+        config.cache.kb_mirror_path,
+        f"https://github.com/{config.github.repo_owner}/{config.github.repo_name}.git",
+        config.github.token
+    )
+
+
+def build_message_link(workspace_name: str, channel_id: str, message_ts: str) -> Optional[str]:
+    """Build a link to the original Slack message."""
+    if not workspace_name:
+        return None
+    message_id = message_ts.replace(".", "")
+    return f"https://{workspace_name}.slack.com/archives/{channel_id}/p{message_id}"
+
+
+@contextmanager
+def timed_phase(timings: Dict[str, float], name: str):
+    """Record and log the wall-clock duration of a pipeline phase, also as a metrics span."""
+    started = time.monotonic()
+    try:
+        with metrics.span(name):
+            yield
+    finally:
+        timings[name] = time.monotonic() - started
+        logger.info(f"Phase {name} took {timings[name]:.2f}s")
+
+
+async def process_thread(
+    config: AppConfig,
+    slack_service: SlackService,
+    summarizer: SummaryProvider,
+    github_service: GitHubService,
+    channel_id: str,
+    message_ts: str,
+    response_url: Optional[str],
+    summary_cache: Optional[SummaryCache] = None,
+    open_pull_request: Optional[Callable[[PendingSummary, RepoBase], Awaitable[str]]] = None,
+    base: Optional[RepoBase] = None
+) -> str:
+    """Summarize a thread and open a pull request with the result.
+
+    Steps that do not depend on each other overlap: the knowledge base repo
+    is resolved while the thread is fetched and summarized, and progress
+    updates are sent to Slack without waiting for them. While the summary
+    streams in, the part written so far is shown at most every
+    progress_interval seconds, within the slack.max_progress_updates budget. A summary found in
+    summary_cache for the same thread content skips the AI call entirely.
+
+    If an earlier run's article for this thread has been merged, only the
+    replies posted since are fetched and summarized into a section that is
+    added to that article.
+
+    The pull request is opened by open_pull_request if given, e.g. to
+    consolidate summaries of several threads into one pull request. It is
+    built on base if given, e.g. resolved once for a whole batch, instead of
+    the repo state resolved here.
+
+    Returns:
+        URL of the created pull request
+    """
+    timings: Dict[str, float] = {}
+    pending_updates: Set[asyncio.Task] = set()
+    message_link = build_message_link(config.slack.workspace_name, channel_id, message_ts)
+
+    update_lock = asyncio.Lock()
+    progress_sent = 0
+
+    async def post_update(text: str) -> None:
+        # Updates replace each other, so they must land in the order they were sent
+        async with update_lock:
+            await asyncio.to_thread(
+                slack_service.update_ephemeral_message,
+                response_url=response_url,
+                text=text,
+                message_link=message_link
+            )
+
+    def send_progress(text: str, reserve: int = 0) -> None:
+        """Send a progress update without waiting for it.
+
+        Slack accepts a limited number of updates per response_url, so at most
+        max_progress_updates are sent, keeping ``reserve`` of them for later.
+        """
+        nonlocal progress_sent
+        if not response_url or progress_sent >= config.slack.max_progress_updates - reserve:
+            return
+        progress_sent += 1
+        task = asyncio.create_task(post_update(text))
+        pending_updates.add(task)
+        task.add_done_callback(pending_updates.discard)
+
+    async def send_final(text: str) -> None:
+        # Progress updates must land before the final one replaces them
+        if pending_updates:
+            await asyncio.gather(*pending_updates, return_exceptions=True)
+        if response_url:
+            with timed_phase(timings, "update_message"):
+                await asyncio.to_thread(
+                    slack_service.update_ephemeral_message,
                     response_url=response_url,
-                    text=":x: Failed to fetch thread: No messages found",
+                    text=text,
                     message_link=message_link
                 )
-            sys.exit(1)
 
-        logger.info(f"Fetched {len(thread.messages)} messages")
-        message_count = len(thread.messages)
+    # Look up the thread's previous article while its new replies are fetched
+    previous = github_service.previous_summary(channel_id, message_ts) if config.ai.incremental else None
+
+    if base is None:
+        base_task = asyncio.create_task(asyncio.to_thread(
+            github_service.resolve_base, [previous["file_path"]] if previous else []
+        ))
+        # Failures surface when the task is awaited; this only marks them retrieved
+        base_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    else:
+        base_task = asyncio.get_running_loop().create_future()
+        base_task.set_result(base)
+
+    article_task = None
+    if previous:
+        async def load_article() -> Optional[ThreadArticle]:
+            base = await base_task
+            return await asyncio.to_thread(github_service.load_thread_article, channel_id, message_ts, base)
+
+        article_task = asyncio.create_task(load_article())
+        article_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    try:
+        # Fetch thread
+        logger.info("Fetching thread...")
+        with timed_phase(timings, "fetch_thread"):
+            thread = await asyncio.to_thread(
+                slack_service.fetch_thread, channel_id, message_ts, previous["last_ts"] if previous else None
+            )
+
+        article = None
+        if article_task:
+            try:
+                article = await article_task
+            except Exception as e:
+                logger.warning(f"Could not load the thread's previous article: {e}")
+            if article is None:
+                logger.info("Thread has no merged article yet, summarizing it in full")
+                with timed_phase(timings, "refetch_thread"):
+                    thread = await asyncio.to_thread(slack_service.fetch_thread, channel_id, message_ts)
+            elif article.last_ts != previous["last_ts"]:
+                # The last pull request is still open, so its replies are summarized again
+                logger.info(f"Fetching the replies since {article.last_ts}, the last merged summary")
+                with timed_phase(timings, "refetch_thread"):
+                    thread = await asyncio.to_thread(
+                        slack_service.fetch_thread, channel_id, message_ts, article.last_ts
+                    )
+
+        replies = []
+        if article:
+            replies = [message for message in thread.messages if float(message.timestamp) > float(article.last_ts)]
+            if not replies:
+                logger.info(f"No new replies since {article.last_ts}")
+                await send_final(":information_source: No new replies since the last summary, nothing to add")
+                raise NoNewRepliesError(f"No new replies since {article.last_ts}")
+
+        if not thread.messages:
+            logger.error("No messages found in thread")
+            await send_final(":x: Failed to fetch thread: No messages found")
+            raise EmptyThreadError("No messages found in thread")
 
         # Get the last message timestamp for deeplink
-        last_message_ts = thread.messages[-1].timestamp if thread.messages else message_ts
-
-        # Summarize using configured provider
-        provider = config.ai.provider.lower()
-        if provider == "claude":
-            logger.info("Generating summary with Claude...")
-            claude_service = ClaudeService(config.claude)
-            summary = claude_service.summarize(thread)
-        elif provider == "gemini":
-            logger.info("Generating summary with Gemini...")
-            gemini_service = GeminiService(config.gemini)
-            summary = gemini_service.summarize(thread)
-        elif provider == "bedrock":
-            logger.info("Generating summary with Amazon Bedrock...")
-            bedrock_service = BedrockService(config.bedrock)
-            summary = bedrock_service.summarize(thread)
+        last_message_ts = thread.messages[-1].timestamp
+
+        # Streamed text arrives on the summarizer's thread; progress is sent from the loop
+        loop = asyncio.get_running_loop()
+        stream_progress = StreamProgress(
+            lambda text: loop.call_soon_threadsafe(send_progress, text, 1),
+            interval=config.slack.progress_interval,
+            preview_chars=config.slack.progress_preview_chars
+        )
+
+        if article:
+            opener = thread.messages[0] if thread.messages[0].timestamp == message_ts else None
+            message_count = len(replies)
+            logger.info(f"Fetched {message_count} new replies since {article.last_ts}")
+            noun = f"new repl{'ies' if message_count != 1 else 'y'}"
+            send_progress(f":hourglass_flowing_sand: Read {message_count} {noun}, generating summary...")
+
+            with timed_phase(timings, "summarize"):
+                summary = await asyncio.to_thread(
+                    summarizer.summarize_delta, opener, replies, article.content, on_token=stream_progress
+                )
+            logger.info(f"Summary of new replies generated: {len(summary)} characters")
         else:
-            logger.error(f"Unknown AI provider: {provider}. Use 'gemini', 'claude', or 'bedrock'")
-            sys.exit(1)
+            message_count = len(thread.messages)
+            logger.info(f"Fetched {message_count} messages")
+            noun = f"message{'s' if message_count != 1 else ''}"
+            send_progress(f":hourglass_flowing_sand: Read {message_count} {noun}, generating summary...")
 
-        logger.info(f"Summary generated: {len(summary)} characters")
+            summary = None
+            models = summary_models(config, summarizer)
+            if summary_cache:
+                cache_keys = [
+                    summary_cache_key(thread.messages, provider_name, provider.model_name, PROMPT_VERSION)
+                    for provider_name, provider in models
+                ]
+                summary = await asyncio.to_thread(summary_cache.get_first, cache_keys)
 
-        # Create PR
-        logger.info("Creating pull request...")
-        pr_url = github_service.create_pull_request(
-            summary=summary,
-            channel_id=channel_id,
-            channel_name=thread.channel_name,
-            timestamp=message_ts,
-            workspace_id=thread.workspace_id,
-            workspace_name=config.slack.workspace_name,
-            last_message_ts=last_message_ts
-        )
+            if summary is not None:
+                logger.info(f"Reusing cached summary: {len(summary)} characters")
+            else:
+                def summarize() -> Tuple[str, Optional[SummaryProvider]]:
+                    summary = summarizer.summarize(thread, on_token=stream_progress)
+                    # Asked on the same thread, the router reports who answered this call
+                    answered = summarizer.answered_by() if isinstance(summarizer, ProviderRouter) else summarizer
+                    return summary, answered
+
+                with timed_phase(timings, "summarize"):
+                    summary, answered = await asyncio.to_thread(summarize)
+                logger.info(f"Summary generated: {len(summary)} characters")
+                provider_name = next((name for name, provider in models if provider is answered), None)
+                if summary_cache and provider_name:
+                    cache_key = summary_cache_key(thread.messages, provider_name, answered.model_name, PROMPT_VERSION)
+                    await asyncio.to_thread(summary_cache.put, cache_key, summary)
+
+        if stream_progress.time_to_first_token is not None:
+            timings["time_to_first_token"] = stream_progress.time_to_first_token
+        send_progress(":hourglass_flowing_sand: Summary generated, creating pull request...")
 
+        # Create PR on the repo state resolved in the background
+        logger.info("Creating pull request...")
+        with timed_phase(timings, "create_pull_request"):
+            base = await base_task
+            pending = PendingSummary(
+                summary=summary,
+                channel_id=channel_id,
+                channel_name=thread.channel_name,
+                timestamp=message_ts,
+                workspace_id=thread.workspace_id,
+                workspace_name=config.slack.workspace_name,
+                last_message_ts=last_message_ts,
+                article=article
+            )
+            if open_pull_request:
+                pr_url = await open_pull_request(pending, base)
+            else:
+                [pr_url] = await asyncio.to_thread(github_service.create_pull_requests, [pending], base)
+                if isinstance(pr_url, Exception):
+                    raise pr_url
         logger.info(f"✓ Pull request created: {pr_url}")
-        print(f"PR_URL={pr_url}")
 
-        # Update ephemeral message if response_url is available
         if response_url:
             logger.info("Updating ephemeral message...")
-            # Build message link
-            workspace_name = config.slack.workspace_name
-            message_id = message_ts.replace(".", "")
-            message_link = f"https://{workspace_name}.slack.com/archives/{channel_id}/p{message_id}" if workspace_name else None
-
-            message_text = f":white_check_mark: Summary generated from {message_count} message{'s' if message_count != 1 else ''}! Pull request created: {pr_url}"
-            slack_service.update_ephemeral_message(
-                response_url=response_url,
-                text=message_text,
-                message_link=message_link
-            )
         else:
             logger.warning("No response_url available, skipping ephemeral message update")
+        await send_final(
+            f":white_check_mark: Summary generated from {message_count} {noun}! Pull request created: {pr_url}"
+        )
+    finally:
+        base_task.cancel()
+        if article_task:
+            article_task.cancel()
+        if pending_updates:
+            await asyncio.gather(*pending_updates, return_exceptions=True)
+        logger.info("Phase timings: " + ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in timings.items()))
 
-        # Write to GitHub step summary if available
-        if os.getenv("GITHUB_STEP_SUMMARY"):
-            with open(os.getenv("GITHUB_STEP_SUMMARY"), "a") as f:
-                f.write(f"### Slack Thread Summarizer\n\n")
-                f.write(f"Successfully created pull request: {pr_url}\n")
+    return pr_url
+
+
+async def run(channel_id: str, message_ts: str) -> str:
+    """Run the summarizer pipeline for a single thread."""
+    config = AppConfig.load()
 
+    # Restore Slack metadata cached by previous runs
+    metadata_store = MetadataStore(
+        config.cache.metadata_path,
+        ttl=config.cache.metadata_ttl,
+        thread_ttl=config.cache.thread_ttl
+    )
+    metadata_store.load()
+    summary_cache = open_summary_cache(config)
+    kb_index = open_kb_index(config)
+    vector_index = open_vector_index(config)
+    try:
+        slack_service = SlackService(config.slack, metadata_store)
+        github_service = GitHubService(
+            config.github, metadata_store, kb_index, create_kb_mirror(config), vector_index
+        )
+        summarizer = create_summarizer(config)
+
+        with metrics.span("thread", channel_id=channel_id, message_ts=message_ts):
+            return await process_thread(
+                config,
+                slack_service,
+                summarizer,
+                github_service,
+                channel_id,
+                message_ts,
+                os.getenv("SLACK_RESPONSE_URL"),
+                summary_cache
+            )
+    finally:
+        close_summary_cache(summary_cache)
+        close_kb_index(kb_index)
+        close_vector_index(vector_index)
+        metadata_store.save()
+        metrics.emit(otel=config.metrics.otel, service_name=config.metrics.service_name)
+
+
+def main():
+    """Main function."""
+    logger.info("Starting Slack Thread Summarizer...")
+
+    if len(sys.argv) < 3:
+        logger.error("Usage: <channel_id> <message_ts>")
+        sys.exit(1)
+
+    channel_id = sys.argv[1]
+    message_ts = sys.argv[2]
+
+    logger.info(f"Processing thread: channel={channel_id}, message={message_ts}")
+
+    try:
+        pr_url = asyncio.run(run(channel_id, message_ts))
+    except EmptyThreadError:
+        sys.exit(1)
+    except NoNewRepliesError as e:
+        logger.info(f"Nothing to summarize: {e}")
+        return
     except Exception as e:
         logger.error(f"Failed to process thread: {e}", exc_info=True)
 
@@ -129,20 +471,26 @@ def main():
             try:
                 config = AppConfig.load()
                 slack_service = SlackService(config.slack)
-                workspace_name = config.slack.workspace_name
-                message_id = message_ts.replace(".", "")
-                message_link = f"https://{workspace_name}.slack.com/archives/{channel_id}/p{message_id}" if workspace_name else None
-
-                error_message = str(e)
                 slack_service.update_ephemeral_message(
                     response_url=response_url,
-                    text=f":x: Failed to process thread: {error_message}",
-                    message_link=message_link
+                    text=f":x: Failed to process thread: {e}",
+                    message_link=build_message_link(config.slack.workspace_name, channel_id, message_ts)
                 )
             except Exception as update_error:
                 logger.error(f"Failed to update ephemeral message with error: {update_error}")
 
         sys.exit(1)
+    else:
+        print(f"PR_URL={pr_url}")
+
+        # Write to GitHub step summary if available
+        if os.getenv("GITHUB_STEP_SUMMARY"):
+            with open(os.getenv("GITHUB_STEP_SUMMARY"), "a") as f:
+                f.write(f"### Slack Thread Summarizer\n\n")
+                f.write(f"Successfully created pull request: {pr_url}\n")
+    finally:
+        # Timings are worth seeing for failed runs too
+        metrics.write_step_summary()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""Persistent cache of Slack and GitHub metadata and per-thread summarizer state."""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+SECTIONS = ("workspace", "channels", "users", "threads", "repos")
+
+
+class MetadataStore:
+    """TTL-bounded key/value store for Slack metadata backed by a JSON file.
+
+    Entries are kept in memory and only written back to disk on ``save``, so
+    the store can be restored from and saved to the GitHub Actions cache
+    around a run. Without a path it acts as a process-local cache.
+
+    Thread state outlives Slack metadata by far, so the threads section has
+    its own TTL.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: int = 86400, thread_ttl: int = 90 * 86400):
+        """Initialize the store.
+
+        Args:
+            path: JSON file to persist entries to, or None for in-memory only
+            ttl: Seconds after which an entry is considered stale
+            thread_ttl: Seconds after which thread state is considered stale
+        """
+        self.path = path
+        self.ttl = ttl
+        self.thread_ttl = thread_ttl
+        self._entries: Dict[str, Dict[str, List[Any]]] = {section: {} for section in SECTIONS}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def load(self) -> None:
+        """Load entries from disk, dropping any that have expired."""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load metadata store {self.path}: {e}")
+            return
+
+        if data.get("version") != STORE_VERSION:
+            logger.debug(f"Ignoring metadata store with version {data.get('version')}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for section in SECTIONS:
+                self._entries[section] = {
+                    key: entry for key, entry in data.get(section, {}).items()
+                    if now - entry[0] <= self._ttl(section)
+                }
+        logger.debug(f"Loaded metadata store from {self.path}")
+
+    def save(self) -> None:
+        """Write entries back to disk if anything changed."""
+        if not self.path or not self._dirty:
+            return
+
+        now = time.time()
+        with self._lock:
+            data = {"version": STORE_VERSION}
+            for section in SECTIONS:
+                data[section] = {
+                    key: entry for key, entry in self._entries[section].items()
+                    if now - entry[0] <= self._ttl(section)
+                }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            logger.debug(f"Saved metadata store to {self.path}")
+        except OSError as e:
+            logger.warning(f"Could not save metadata store {self.path}: {e}")
+
+    def get_workspace_id(self) -> Optional[str]:
+        """Return the cached workspace ID."""
+        return self._get("workspace", "id")
+
+    def set_workspace_id(self, workspace_id: str) -> None:
+        """Cache the workspace ID."""
+        self._set("workspace", "id", workspace_id)
+
+    def get_channel_name(self, channel_id: str) -> Optional[str]:
+        """Return the cached name of a channel."""
+        return self._get("channels", channel_id)
+
+    def set_channel_name(self, channel_id: str, channel_name: str) -> None:
+        """Cache the name of a channel."""
+        self._set("channels", channel_id, channel_name)
+
+    def get_user_name(self, user_id: str) -> Optional[str]:
+        """Return the cached display name of a user."""
+        return self._get("users", user_id)
+
+    def set_user_name(self, user_id: str, display_name: str) -> None:
+        """Cache the display name of a user."""
+        self._set("users", user_id, display_name)
+
+    def get_default_branch(self, repo_full_name: str) -> Optional[str]:
+        """Return the cached default branch of a GitHub repository."""
+        return self._get("repos", repo_full_name)
+
+    def set_default_branch(self, repo_full_name: str, branch: str) -> None:
+        """Cache the default branch of a GitHub repository."""
+        self._set("repos", repo_full_name, branch)
+
+    def get_thread_state(self, channel_id: str, thread_ts: str) -> Optional[Dict[str, str]]:
+        """Return what was recorded about the last summary of a thread.
+
+        Returns:
+            Dict with ``last_ts``, the newest message summarized,
+            ``file_path``, the article it went into, and ``marker_ts``, the
+            message whose link the article has once that summary is merged.
+            ``merged_ts`` and ``merged_marker_ts`` are the same for the last
+            summary known to be merged when it was made, if any. None if
+            nothing was recorded.
+        """
+        return self._get("threads", f"{channel_id}/{thread_ts}")
+
+    def set_thread_state(
+        self,
+        channel_id: str,
+        thread_ts: str,
+        last_ts: str,
+        file_path: str,
+        marker_ts: Optional[str] = None,
+        merged_ts: Optional[str] = None,
+        merged_marker_ts: Optional[str] = None
+    ) -> None:
+        """Record the newest summarized message of a thread and its article.
+
+        Args:
+            channel_id: The channel ID
+            thread_ts: The thread timestamp
+            last_ts: Newest message the summary covers
+            file_path: Article the summary went into
+            marker_ts: Message linked from the article once the summary is
+                merged, defaults to the thread itself
+            merged_ts: last_ts of the last summary known to be merged
+            merged_marker_ts: marker_ts of that summary
+        """
+        self._set("threads", f"{channel_id}/{thread_ts}", {
+            "last_ts": last_ts,
+            "file_path": file_path,
+            "marker_ts": marker_ts or thread_ts,
+            "merged_ts": merged_ts,
+            "merged_marker_ts": merged_marker_ts
+        })
+
+    def _ttl(self, section: str) -> int:
+        """Return the TTL of a section."""
+        return self.thread_ttl if section == "threads" else self.ttl
+
+    def _get(self, section: str, key: str) -> Optional[Any]:
+        """Return a value if present and not expired."""
+        with self._lock:
+            entry = self._entries[section].get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self._ttl(section):
+            return None
+        return value
+
+    def _set(self, section: str, key: str, value: Any) -> None:
+        """Store a value and mark the store dirty."""
+        with self._lock:
+            self._entries[section][key] = [time.time(), value]
+            self._dirty = True
@@ -0,0 +1,231 @@
+"""Lightweight spans and counters for timing the pipeline and counting API usage."""
+
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_span_ids = itertools.count(1)
+# Span the code currently runs in; asyncio tasks and asyncio.to_thread inherit it
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """A timed unit of work, e.g. a pipeline phase or an API call."""
+    name: str
+    id: int
+    parent_id: Optional[int]
+    # Wall-clock start in nanoseconds since the epoch, for exporters
+    start_ns: int
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class Metrics:
+    """Thread-safe recorder of spans and counters for one run.
+
+    Spans nest: a span opened while another is active, on the same thread,
+    in an asyncio task or in asyncio.to_thread started from it, becomes its
+    child. Counters are plain sums keyed by name, e.g. "github.calls" or
+    "ai.tokens_in".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+        self.counters: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a span.
+
+        Args:
+            name: Span name, dotted by component, e.g. "slack.conversations_replies"
+            attributes: Extra details recorded with the span
+
+        Yields:
+            The span, whose attributes may be added to inside the block
+        """
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            id=next(_span_ids),
+            parent_id=parent.id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = e.__class__.__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add value to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Count, total and longest duration of the spans, by name, in order of first use."""
+        with self._lock:
+            spans = list(self.spans)
+        timings: Dict[str, Dict[str, float]] = {}
+        for span in sorted(spans, key=lambda span: span.start_ns):
+            timing = timings.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0, "errors": 0})
+            timing["count"] += 1
+            timing["total"] += span.duration
+            timing["max"] = max(timing["max"], span.duration)
+            timing["errors"] += span.error is not None
+        return timings
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the run as span timings and counters."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "timings": {
+                name: {key: round(value, 4) for key, value in timing.items()}
+                for name, timing in self.timings().items()
+            },
+            "counters": {name: round(value, 4) for name, value in sorted(counters.items())},
+        }
+
+    def to_json(self) -> str:
+        """The run summary as a single JSON line."""
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def to_markdown(self) -> str:
+        """The run summary as markdown tables, for the GitHub step summary."""
+        summary = self.to_dict()
+        lines = ["#### Timings", "", "| Span | Count | Total (s) | Max (s) | Errors |", "|---|---:|---:|---:|---:|"]
+        for name, timing in summary["timings"].items():
+            lines.append(
+                f"| {name} | {timing['count']:.0f} | {timing['total']:.2f} | {timing['max']:.2f} | {timing['errors']:.0f} |"
+            )
+        if summary["counters"]:
+            lines += ["", "#### Counters", "", "| Counter | Value |", "|---|---:|"]
+            lines += [f"| {name} | {value:g} |" for name, value in summary["counters"].items()]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        with self._lock:
+            self.spans = []
+            self.counters = {}
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics recorder, shared like the rate limiters."""
+    return _metrics
+
+
+def span(name: str, **attributes: Any):
+    """Time the enclosed block as a span of the process-wide recorder."""
+    return _metrics.span(name, **attributes)
+
+
+def count(name: str, value: float = 1) -> None:
+    """Add value to a counter of the process-wide recorder."""
+    _metrics.count(name, value)
+
+
+def emit(metrics: Optional[Metrics] = None, otel: bool = False, service_name: str = "slack-thread-summarizer") -> None:
+    """Report a run: log its metrics as a JSON line and optionally export them.
+
+    Args:
+        metrics: Recorder to report, defaults to the process-wide one
+        otel: Also export spans and counters over OpenTelemetry
+        service_name: OpenTelemetry service name
+    """
+    metrics = metrics or _metrics
+    logger.info(f"Metrics: {metrics.to_json()}")
+    if otel:
+        export_otel(metrics, service_name)
+
+
+def write_step_summary(metrics: Optional[Metrics] = None) -> None:
+    """Append the timing and counter tables to the GitHub step summary, if running in Actions."""
+    path = os.getenv("GITHUB_STEP_SUMMARY")
+    metrics = metrics or _metrics
+    if not path or not metrics.spans:
+        return
+    with open(path, "a") as f:
+        f.write("\n" + metrics.to_markdown())
+
+
+def export_otel(metrics: Metrics, service_name: str) -> None:
+    """Export recorded spans and counters with the OpenTelemetry SDK and OTLP over HTTP.
+
+    Spans are replayed with their recorded start times and durations, and
+    keep their nesting. The exporters read the standard OTEL_EXPORTER_OTLP_*
+    environment variables. The SDK is only imported here, so runs without
+    OpenTelemetry do not need it installed.
+    """
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.trace import Status, StatusCode
+    except ImportError as e:
+        logger.warning(f"Could not export metrics, OpenTelemetry is not installed: {e}")
+        return
+
+    with metrics._lock:
+        spans = sorted(metrics.spans, key=lambda span: span.start_ns)
+        counters = dict(metrics.counters)
+
+    resource = Resource.create({"service.name": service_name})
+    tracer_provider = TracerProvider(resource=resource)
+    tracer_provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    meter_provider = MeterProvider(resource=resource, metric_readers=[PeriodicExportingMetricReader(OTLPMetricExporter())])
+    try:
+        tracer = tracer_provider.get_tracer(__name__)
+        # Parents start before their children, so they exist by the time a child is replayed
+        exported: Dict[int, Any] = {}
+        for recorded in spans:
+            parent = exported.get(recorded.parent_id)
+            otel_span = tracer.start_span(
+                recorded.name,
+                context=trace.set_span_in_context(parent) if parent is not None else None,
+                attributes={key: value for key, value in recorded.attributes.items() if value is not None},
+                start_time=recorded.start_ns
+            )
+            if recorded.error:
+                otel_span.set_status(Status(StatusCode.ERROR, recorded.error))
+            otel_span.end(end_time=recorded.start_ns + int(recorded.duration * 1e9))
+            exported[recorded.id] = otel_span
+
+        meter = meter_provider.get_meter(__name__)
+        for name, value in counters.items():
+            meter.create_counter(name).add(value)
+    except Exception as e:
+        logger.warning(f"Could not export metrics over OpenTelemetry: {e}")
+    finally:
+        # Flushes what was recorded
+        tracer_provider.shutdown()
+        meter_provider.shutdown()
@@ -0,0 +1,294 @@
+"""Shared rate limiting and retry scheduling for outbound API calls."""
+
+import json
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional, TypeVar
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+# Statuses that mean the request was turned away unprocessed, so even a request that is not idempotent can be retried
+THROTTLED_STATUSES = {429}
+
+# GitHub asks clients to wait at least a minute after a secondary rate limit it gives no reset time for
+SECONDARY_RATE_LIMIT_DELAY = 60.0
+
+# AWS error codes returned when a request is throttled
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens refill at ``rate`` per second up to ``capacity``. A server asking
+    callers to back off pauses the bucket, so every caller sharing it waits
+    instead of each running into the limit on its own.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens, i.e. the allowed burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+def _headers(error: BaseException) -> Mapping[str, str]:
+    """Find the HTTP response headers attached to an SDK or urllib error."""
+    for owner in (error, getattr(error, "response", None)):
+        headers = getattr(owner, "headers", None)
+        if headers:
+            return {key.lower(): value for key, value in dict(headers).items()}
+    return {}
+
+
+def _status(error: BaseException) -> Optional[int]:
+    """Find the HTTP status code of an SDK or urllib error."""
+    for owner in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "status", "code"):
+            value = getattr(owner, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+
+def _is_secondary_rate_limit(error: BaseException) -> bool:
+    """Whether GitHub turned a request away for a secondary rate limit.
+
+    Such a 403 may come without any rate-limit headers, so it is recognized
+    by its message, found in the error or in the response body PyGithub and
+    the GraphQL client attach as ``data``.
+    """
+    data = getattr(error, "data", None)
+    if isinstance(data, (dict, list)):
+        data = json.dumps(data)
+    text = f"{error} {data or ''}".lower()
+    return "secondary rate limit" in text
+
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Return how long the server asked us to wait before retrying, if it did.
+
+    Understands ``Retry-After`` and GitHub's ``x-ratelimit-remaining`` and
+    ``x-ratelimit-reset`` headers. A GitHub secondary rate limit without
+    either asks for a minute.
+    """
+    headers = _headers(error)
+    if "retry-after" in headers:
+        return _parse_retry_after(headers["retry-after"])
+    if headers.get("x-ratelimit-remaining") == "0" and "x-ratelimit-reset" in headers:
+        try:
+            return max(0.0, float(headers["x-ratelimit-reset"]) - time.time())
+        except ValueError:
+            return None
+    if _status(error) == 403 and _is_secondary_rate_limit(error):
+        return SECONDARY_RATE_LIMIT_DELAY
+    return None
+
+
+def is_retryable(error: BaseException, idempotent: bool = True) -> bool:
+    """Whether an error is throttling or a transient failure worth retrying.
+
+    Errors are recognized by their attributes rather than their types, so
+    this works for Slack, PyGithub, the AI SDKs, botocore and urllib without
+    importing any of them.
+
+    A request that is not idempotent is only retried when it was throttled:
+    after a server error or a dropped connection the server may already have
+    acted on it, and sending it again would repeat that.
+
+    Args:
+        error: The error the request failed with
+        idempotent: Whether sending the request twice is harmless
+    """
+    status = _status(error)
+    if status in (RETRYABLE_STATUSES if idempotent else THROTTLED_STATUSES):
+        return True
+    if not idempotent and "retry-after" in _headers(error):
+        return True
+    if status == 403:
+        # GitHub reports primary and secondary rate limits as 403
+        headers = _headers(error)
+        return (
+            "retry-after" in headers
+            or headers.get("x-ratelimit-remaining") == "0"
+            or _is_secondary_rate_limit(error)
+        )
+
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError
+        return response.get("Error", {}).get("Code") in THROTTLING_CODES
+    if idempotent and status is None and getattr(error, "reason", None) is not None:
+        # urllib URLError without a response, e.g. a dropped connection
+        return True
+    return False
+
+
+class RateLimiter:
+    """Token-bucket rate limiter and retry scheduler for one service.
+
+    ``call`` waits for a token, runs the request and retries throttled or
+    transient failures. It waits as long as the server asked when a
+    ``Retry-After`` or rate-limit reset is given, and backs off
+    exponentially with jitter otherwise.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+    ):
+        """Initialize the limiter.
+
+        Args:
+            name: Service name used in log messages
+            rate: Requests per second
+            burst: Requests allowed at once, defaults to rate
+            max_retries: Retries before an error is re-raised
+            base_delay: First backoff delay in seconds
+            max_delay: Longest the limiter waits before a retry
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate, max(1.0, burst or rate))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def call(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        retryable: Optional[Callable[[], bool]] = None,
+        operation: Optional[str] = None,
+        idempotent: bool = True,
+        **kwargs: Any
+    ) -> T:
+        """Call func under the rate limit, retrying throttled and transient failures.
+
+        Each call is recorded as a span named after the service and
+        operation, and counted along with its retries and the time spent
+        waiting for the rate limit.
+
+        Args:
+            func: The request to make
+            retryable: Optional check run before each retry, e.g. to rule out
+                retrying a response that was already partly consumed
+            operation: Name of the request in metrics, defaults to func's name
+            idempotent: Whether sending the request twice is harmless; requests
+                that create something pass False, so that only throttling is
+                retried
+
+        Returns:
+            Whatever func returns
+        """
+        service = self.name.lower().replace(" ", "_")
+        operation = operation or getattr(func, "__name__", "call").lstrip("_")
+        attempt = 0
+        with metrics.span(f"{service}.{operation}") as span:
+            metrics.count(f"{service}.calls")
+            while True:
+                waited = self.bucket.acquire()
+                if waited:
+                    metrics.count(f"{service}.rate_limit_wait_seconds", waited)
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e, idempotent) or (retryable and not retryable()):
+                        raise
+                    delay = retry_after(e)
+                    if delay is not None:
+                        # The server told everyone when to come back
+                        delay = min(delay, self.max_delay)
+                        self.bucket.pause(delay)
+                    else:
+                        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                    attempt += 1
+                    span.attributes["retries"] = attempt
+                    metrics.count(f"{service}.retries")
+                    logger.warning(
+                        f"{self.name} request failed ({e.__class__.__name__}: {e}), "
+                        f"retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                    )
+                    time.sleep(delay)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, rate: float = 5.0, burst: Optional[float] = None, max_retries: int = 5) -> RateLimiter:
+    """Return the process-wide limiter for a service, creating it on first use.
+
+    Every client of a service shares its budget, so batch jobs running in
+    parallel are limited together. The settings of the first call win.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(name, rate, burst, max_retries)
+        return _limiters[name]
@@ -0,0 +1,166 @@
+"""Document model of knowledge base articles for merging new summaries into them."""
+
+import re
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+_KEYWORDS_MARKER = "**Keywords:**"
+_KEYWORDS_RE = re.compile(r"\*\*Keywords:\*\*\s*(.+)")
+_SOURCE_MARKER = "**Source"
+_SLACK_SOURCE = "- [Slack Thread]"
+MAX_KEYWORDS = 10
+
+
+@dataclass
+class Section:
+    """A "##" section of an article body, as offsets into the body."""
+    heading: str
+    start: int
+    end: int
+
+
+@dataclass
+class ArticleDocument:
+    """An article split into the parts a merge touches.
+
+    The body is kept as text and every other part refers to it by offset, so
+    parsing and rendering each take one pass over the article and an
+    unchanged body is copied into the merged article as a whole.
+    """
+    # Article without its sources section, stripped
+    body: str
+    title: Optional[str] = None
+    # Offset just past the title line, or -1 without a title
+    title_end: int = -1
+    keywords: List[str] = field(default_factory=list)
+    # Offsets of the keywords line in the body
+    keywords_span: Optional[Tuple[int, int]] = None
+    # Source list items, without their "- " bullet
+    sources: List[str] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, text: str) -> "ArticleDocument":
+        """Parse an article with one forward scan for each of its parts."""
+        body_end, sources = _split_sources(text)
+        body = text[:body_end].strip()
+        document = cls(body=body, sources=_parse_sources(sources) if sources else [])
+
+        title_start = 0 if body.startswith("#") else body.find("\n#") + 1
+        if title_start or body.startswith("#"):
+            document.title_end = _line_end(body, title_start)
+            document.title = body[title_start:document.title_end].lstrip("#").strip()
+        keywords = _KEYWORDS_RE.search(body)
+        if keywords:
+            document.keywords = [keyword.strip() for keyword in keywords.group(1).split(",")]
+            document.keywords_span = keywords.span()
+        return document
+
+    @cached_property
+    def sections(self) -> List[Section]:
+        """The "##" sections of the body, found on first use since merges do not need them."""
+        sections: List[Section] = []
+        # The title may itself be a "##" heading; sections start after it
+        position = self.body.find("\n## ", max(self.title_end, 0))
+        while position >= 0:
+            start = position + 1
+            heading_end = _line_end(self.body, start)
+            if sections:
+                sections[-1].end = start
+            sections.append(Section(heading=self.body[start + 3:heading_end].strip(), start=start, end=len(self.body)))
+            position = self.body.find("\n## ", heading_end)
+        return sections
+
+    def merge(self, new_summary: str, source_link: str) -> str:
+        """Append a new summary as additional context and render the article.
+
+        Keywords of the summary are merged into the article's, and the
+        summary's source is added to the source list unless it is already
+        there.
+        """
+        summary_keywords = _KEYWORDS_RE.search(new_summary)
+        new_keywords = [keyword.strip() for keyword in summary_keywords.group(1).split(",")] if summary_keywords else []
+        keywords = list(dict.fromkeys(self.keywords + new_keywords))[:MAX_KEYWORDS]
+        keywords_line = f"{_KEYWORDS_MARKER} {', '.join(keywords)}"
+
+        # Join slices of the body rather than rebuilding it for each edit
+        if self.keywords_span is not None:
+            start, end = self.keywords_span
+            parts = [self.body[:start], keywords_line, self.body[end:]]
+        elif keywords and 0 <= self.title_end < len(self.body):
+            parts = [self.body[:self.title_end], "\n\n", keywords_line, self.body[self.title_end:]]
+        else:
+            parts = [self.body]
+
+        sources = list(dict.fromkeys(self.sources + [f"[Slack Thread]({source_link})"]))
+        sources_section = (
+            f"**Source:** {sources[0]}" if len(sources) == 1
+            else "**Sources:**\n" + "\n".join(f"- {source}" for source in sources)
+        )
+        parts += ["\n\n## Additional Context\n\n", _summary_content(new_summary), "\n\n---\n\n", sources_section]
+        return "".join(parts)
+
+
+def _line_end(text: str, start: int) -> int:
+    """Offset of the end of the line starting at start."""
+    end = text.find("\n", start)
+    return len(text) if end < 0 else end
+
+
+def _split_sources(text: str) -> Tuple[int, Optional[str]]:
+    """Find the sources section: a "---" rule followed by a "**Source:**" or "**Sources:**" label.
+
+    Returns:
+        (offset where the section starts, its text after the label), or
+        (length of text, None) if the article has none
+    """
+    position = text.find(_SOURCE_MARKER)
+    while position >= 0:
+        label_end = position + len(_SOURCE_MARKER)
+        if text.startswith("s:**", label_end):
+            label_end += 4
+        elif text.startswith(":**", label_end):
+            label_end += 3
+        else:
+            label_end = -1
+
+        if 0 < label_end < len(text):
+            rule_end = position
+            while rule_end > 0 and text[rule_end - 1].isspace():
+                rule_end -= 1
+            if rule_end >= 3 and text.startswith("---", rule_end - 3):
+                return rule_end - 3, text[label_end:].strip()
+        position = text.find(_SOURCE_MARKER, position + 1)
+    return len(text), None
+
+
+def _parse_sources(sources: str) -> List[str]:
+    """Split the text of a sources section into list items."""
+    if sources.startswith(_SLACK_SOURCE):
+        # A list of sources; lines that are not items stay with the item above
+        return f"\n{sources}".split("\n- ")[1:]
+    if f"\n{_SLACK_SOURCE}" in sources:
+        return [
+            line.strip().removeprefix("- ")
+            for line in sources.split("\n")
+            if line.strip().startswith(_SLACK_SOURCE)
+        ]
+    if sources.startswith("["):
+        # A single source that is already a link
+        return [sources]
+    return [f"[Slack Thread]({sources})"]
+
+
+def _summary_content(summary: str) -> str:
+    """The summary from its first line that is neither a heading, the keywords line nor blank."""
+    offset = 0
+    for line in summary.split("\n"):
+        if not line.startswith("#") and _KEYWORDS_MARKER not in line and line.strip():
+            return summary[offset:]
+        offset += len(line) + 1
+    return summary
+
+
+def merge_articles(existing_content: str, new_summary: str, new_slack_link: str) -> str:
+    """Merge a new summary into an existing article."""
+    return ArticleDocument.parse(existing_content).merge(new_summary, new_slack_link)
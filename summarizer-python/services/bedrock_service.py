@@ -2,65 +2,63 @@
 
 import json
 import logging
+from typing import Iterator, Optional
 
 import boto3
 from botocore.config import Config
 
-from ..config import BedrockConfig
-from ..models import SlackThread
+from ..config import AIConfig, BedrockConfig
+from .provider import BaseSummaryService
 
 logger = logging.getLogger(__name__)
 
 
-class BedrockService:
+def _token_count(value) -> Optional[int]:
+    """Parse a token count reported in a header or invocation metrics, if present."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class BedrockService(BaseSummaryService):
     """Service for generating summaries using Amazon Bedrock."""
 
-    def __init__(self, config: BedrockConfig):
+    name = "Amazon Bedrock"
+
+    def __init__(self, config: BedrockConfig, ai_config: Optional[AIConfig] = None):
         """Initialize Bedrock service with configuration."""
+        super().__init__(ai_config or AIConfig(provider="bedrock"))
         self.config = config
+        self.model_name = config.model
 
-        # Configure boto3 client
+        # Configure boto3 client; throttling is retried by the shared limiter instead
         bedrock_config = Config(
             region_name=config.region,
-            retries={'max_attempts': 3, 'mode': 'adaptive'}
+            retries={'max_attempts': 0, 'mode': 'standard'}
         )
 
         self.client = boto3.client('bedrock-runtime', config=bedrock_config)
 
-    def summarize(self, thread: SlackThread) -> str:
-        """Generate a summary of the thread using Amazon Bedrock.
-
-        Args:
-            thread: The Slack thread to summarize
-
-        Returns:
-            Markdown-formatted summary
-        """
-        logger.debug(f"Generating summary for thread with {len(thread.messages)} messages using Bedrock")
-
-        thread_content = self._build_thread_content(thread)
-        prompt = self._build_prompt(thread_content)
-
+    def _generate(self, prompt: str) -> str:
+        """Send a prompt to Amazon Bedrock and return the generated text."""
         logger.debug(f"Sending request to Bedrock API with model: {self.config.model}")
 
         try:
-            # Build request body based on model type
-            if self.config.model.startswith("anthropic.claude"):
-                request_body = self._build_claude_request(prompt)
-            elif self.config.model.startswith("amazon.titan"):
-                request_body = self._build_titan_request(prompt)
-            elif self.config.model.startswith("meta.llama"):
-                request_body = self._build_llama_request(prompt)
-            else:
-                raise ValueError(f"Unsupported Bedrock model: {self.config.model}")
-
             response = self.client.invoke_model(
                 modelId=self.config.model,
-                body=json.dumps(request_body)
+                body=json.dumps(self._build_request(prompt))
             )
 
             response_body = json.loads(response['body'].read())
             summary = self._extract_response_text(response_body)
+            headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+            self._record_usage(
+                prompt,
+                summary,
+                _token_count(headers.get('x-amzn-bedrock-input-token-count')),
+                _token_count(headers.get('x-amzn-bedrock-output-token-count'))
+            )
 
             logger.debug(f"Generated summary: {len(summary)} characters")
             return summary
@@ -69,64 +67,54 @@ class BedrockService:
             logger.error(f"Error calling Bedrock API: {e}")
             raise
 
-    def _build_thread_content(self, thread: SlackThread) -> str:
-        """Build thread content string from messages."""
-        return "\n\n".join(message.text for message in thread.messages)
-
-    def _build_prompt(self, thread_content: str) -> str:
-        """Build the prompt for Bedrock."""
-        return f"""You are a technical documentation assistant. Your task is to transform a Slack conversation
-into a clear, well-structured knowledge base article in markdown format.
-
-Requirements:
-1. Create a clear, descriptive title based on the main topic discussed
-2. Identify 3-7 keywords/tags that represent the main topics, technologies, or concepts discussed
-3. Focus entirely on the technical content, concepts, and information shared
-4. Organize information into logical sections with proper headers
-5. Extract and preserve:
-   - Technical explanations and concepts
-   - Code snippets and examples
-   - Solutions to problems
-   - Best practices and recommendations
-   - Important links and references
-6. Remove conversational elements (greetings, acknowledgments, "thanks", etc.)
-7. Synthesize multiple related points into cohesive explanations
-8. Use proper markdown formatting (headers, lists, code blocks, etc.)
-9. Keep the tone professional and encyclopedic
-
-Do NOT include:
-- Who said what or when
-- Conversational back-and-forth
-- Off-topic discussion
-- Personal opinions unless they represent technical best practices
-
-Format the output as a complete markdown document with:
-- A descriptive title (# heading)
-- A keywords line IMMEDIATELY after the title in the format: **Keywords:** keyword1, keyword2, keyword3
-- An overview section explaining what this article covers
-- Logical subsections organizing the technical content
-- Code blocks for any code examples
-- Links to external resources if mentioned
-
-Example format:
-# How to Configure Redis for High Availability
-
-**Keywords:** redis, high-availability, clustering, replication, failover
-
-## Overview
-[content here]
-
-Here is the conversation to transform into a knowledge base article:
-
-{thread_content}
-
-Generate the knowledge base article:"""
+    def _stream(self, prompt: str) -> Iterator[str]:
+        """Stream a response from Amazon Bedrock, yielding text chunks."""
+        logger.debug(f"Streaming request to Bedrock API with model: {self.config.model}")
+
+        try:
+            response = self.client.invoke_model_with_response_stream(
+                modelId=self.config.model,
+                body=json.dumps(self._build_request(prompt))
+            )
+
+            parts = []
+            invocation_metrics = {}
+            for event in response['body']:
+                if 'chunk' not in event:
+                    continue
+                chunk = json.loads(event['chunk']['bytes'])
+                # The last chunk carries the token counts of the whole request
+                invocation_metrics = chunk.get('amazon-bedrock-invocationMetrics', invocation_metrics)
+                text = self._extract_stream_text(chunk)
+                if text:
+                    parts.append(text)
+                    yield text
+            self._record_usage(
+                prompt,
+                "".join(parts),
+                _token_count(invocation_metrics.get('inputTokenCount')),
+                _token_count(invocation_metrics.get('outputTokenCount'))
+            )
+
+        except Exception as e:
+            logger.error(f"Error calling Bedrock API: {e}")
+            raise
+
+    def _build_request(self, prompt: str) -> dict:
+        """Build the request body based on model type."""
+        if self.config.model.startswith("anthropic.claude"):
+            return self._build_claude_request(prompt)
+        elif self.config.model.startswith("amazon.titan"):
+            return self._build_titan_request(prompt)
+        elif self.config.model.startswith("meta.llama"):
+            return self._build_llama_request(prompt)
+        raise ValueError(f"Unsupported Bedrock model: {self.config.model}")
 
     def _build_claude_request(self, prompt: str) -> dict:
         """Build request body for Claude models."""
         return {
             "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4096,
+            "max_tokens": self.ai_config.max_output_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -140,7 +128,7 @@ Generate the knowledge base article:"""
         return {
             "inputText": prompt,
             "textGenerationConfig": {
-                "maxTokenCount": 4096,
+                "maxTokenCount": self.ai_config.max_output_tokens,
                 "temperature": 0.7,
                 "topP": 0.9
             }
@@ -150,28 +138,41 @@ Generate the knowledge base article:"""
         """Build request body for Llama models."""
         return {
             "prompt": prompt,
-            "max_gen_len": 4096,
+            "max_gen_len": self.ai_config.max_output_tokens,
             "temperature": 0.7,
             "top_p": 0.9
         }
 
     def _extract_response_text(self, response_body: dict) -> str:
-        """Extract text from response body based on model type."""
+        """Extract text from response body based on model type, empty if it has none."""
         if "content" in response_body:
             # Claude format
             content = response_body["content"]
             if isinstance(content, list) and len(content) > 0:
-                return content[0].get("text", "Failed to generate summary")
-            return "Failed to generate summary"
+                return content[0].get("text", "")
+            return ""
         elif "results" in response_body:
             # Titan format
             results = response_body["results"]
             if isinstance(results, list) and len(results) > 0:
-                return results[0].get("outputText", "Failed to generate summary")
-            return "Failed to generate summary"
+                return results[0].get("outputText", "")
+            return ""
         elif "generation" in response_body:
             # Llama format
-            return response_body.get("generation", "Failed to generate summary")
+            return response_body.get("generation", "")
         else:
             logger.warning(f"Unknown response format: {response_body.keys()}")
-            return "Failed to generate summary"
+            return ""
+
+    def _extract_stream_text(self, chunk: dict) -> str:
+        """Extract text from a streamed chunk based on model type."""
+        if chunk.get("type") == "content_block_delta":
+            # Claude format
+            return chunk.get("delta", {}).get("text", "")
+        elif "outputText" in chunk:
+            # Titan format
+            return chunk["outputText"]
+        elif "generation" in chunk:
+            # Llama format
+            return chunk["generation"]
+        return ""
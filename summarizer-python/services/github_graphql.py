@@ -0,0 +1,244 @@
+"""Minimal GitHub GraphQL client for knowledge base lookups and pull requests."""
+
+import base64
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from .. import metrics
+from ..rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+RESOLVE_QUERY = """
+query($owner: String!, $name: String!, $directory: String!{file_variables}) {{
+  repository(owner: $owner, name: $name) {{
+    id
+    defaultBranchRef {{
+      name
+      target {{ oid }}
+    }}
+    directory: object(expression: $directory) {{
+      ... on Tree {{
+        entries {{ name path type }}
+      }}
+    }}{file_fields}
+  }}
+}}
+"""
+
+READ_FILE_QUERY = """
+query($owner: String!, $name: String!, $expression: String!) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $expression) {
+      ... on Blob { text }
+    }
+  }
+}
+"""
+
+# Mutations in one document run in order, so the branch exists before the commit
+COMMIT_MUTATION = """
+mutation($ref: CreateRefInput!, $commit: CreateCommitOnBranchInput!) {
+  createRef(input: $ref) { ref { id name } }
+  createCommitOnBranch(input: $commit) { commit { oid } }
+}
+"""
+
+DELETE_REF_MUTATION = """
+mutation($input: DeleteRefInput!) {
+  deleteRef(input: $input) { clientMutationId }
+}
+"""
+
+PULL_REQUEST_MUTATION = """
+mutation($input: CreatePullRequestInput!) {
+  createPullRequest(input: $input) { pullRequest { url } }
+}
+"""
+
+
+class GitHubGraphQLError(Exception):
+    """Raised when a GraphQL request returns errors.
+
+    Rate-limited responses carry status 429 so the shared limiter retries them.
+    The data of the operations that succeeded, e.g. earlier mutations in the
+    same document, is kept in ``data``.
+    """
+
+    def __init__(self, errors: List[Dict[str, Any]], data: Optional[Dict[str, Any]] = None):
+        super().__init__("; ".join(error.get("message", str(error)) for error in errors))
+        self.errors = errors
+        self.data = data
+        self.status = 429 if any(error.get("type") == "RATE_LIMITED" for error in errors) else None
+
+
+class GitHubGraphQLClient:
+    """Runs the few GraphQL operations the summarizer needs.
+
+    Each method is one round trip to the API, which matters when runners are
+    far from GitHub.
+    """
+
+    def __init__(self, token: str, limiter: RateLimiter, url: str = GRAPHQL_URL):
+        """Initialize the client.
+
+        Args:
+            token: GitHub token
+            limiter: Rate limiter and retry scheduler for GitHub requests
+            url: GraphQL endpoint
+        """
+        self.token = token
+        self.limiter = limiter
+        self.url = url
+
+    def resolve(self, owner: str, name: str, directory: str, paths: Sequence[str] = ()) -> Dict[str, Any]:
+        """Fetch the repository ID, default branch, head OID, a directory listing and file contents.
+
+        Args:
+            owner: Repository owner
+            name: Repository name
+            directory: Directory on the default branch to list
+            paths: Files on the default branch to fetch along with the rest
+
+        Returns:
+            Dict with ``repository_id``, ``default_branch``, ``head_oid``,
+            ``entries``, a list of (name, path) for the files in directory,
+            and ``files``, the text of each path that exists
+        """
+        variables = {"owner": owner, "name": name, "directory": f"HEAD:{directory}"}
+        for index, path in enumerate(paths):
+            variables[f"file{index}"] = f"HEAD:{path}"
+        query = RESOLVE_QUERY.format(
+            file_variables="".join(f", $file{index}: String!" for index in range(len(paths))),
+            file_fields="".join(
+                f"\n    file{index}: object(expression: $file{index}) {{ ... on Blob {{ text }} }}"
+                for index in range(len(paths))
+            )
+        )
+
+        repository = self.execute(query, variables)["repository"]
+        tree = repository.get("directory") or {}
+        files = {}
+        for index, path in enumerate(paths):
+            blob = repository.get(f"file{index}")
+            if blob and blob.get("text") is not None:
+                files[path] = blob["text"]
+        return {
+            "repository_id": repository["id"],
+            "default_branch": repository["defaultBranchRef"]["name"],
+            "head_oid": repository["defaultBranchRef"]["target"]["oid"],
+            "entries": [
+                (entry["name"], entry["path"])
+                for entry in tree.get("entries") or []
+                if entry["type"] == "blob"
+            ],
+            "files": files,
+        }
+
+    def read_file(self, owner: str, name: str, ref: str, path: str) -> Optional[str]:
+        """Return the text of a file at ref, or None if it does not exist."""
+        data = self.execute(READ_FILE_QUERY, {"owner": owner, "name": name, "expression": f"{ref}:{path}"})
+        blob = data["repository"]["object"]
+        return blob["text"] if blob else None
+
+    def commit_file(
+        self,
+        repository_id: str,
+        repository_name: str,
+        branch: str,
+        head_oid: str,
+        path: str,
+        content: str,
+        message: str
+    ) -> str:
+        """Create a branch at head_oid and commit a file to it.
+
+        Both happen in one request. If the commit fails after the branch was
+        created, the branch is deleted again, so no empty branch is left
+        behind and a retry can create it anew.
+
+        Returns:
+            OID of the new commit
+        """
+        headline, _, body = message.partition("\n")
+        commit_message = {"headline": headline}
+        if body.strip():
+            commit_message["body"] = body.strip()
+        variables = {
+            "ref": {"repositoryId": repository_id, "name": f"refs/heads/{branch}", "oid": head_oid},
+            "commit": {
+                "branch": {"repositoryNameWithOwner": repository_name, "branchName": branch},
+                "expectedHeadOid": head_oid,
+                "message": commit_message,
+                "fileChanges": {
+                    "additions": [{"path": path, "contents": base64.b64encode(content.encode("utf-8")).decode("ascii")}]
+                },
+            },
+        }
+
+        def commit() -> Dict[str, Any]:
+            try:
+                return self._post(COMMIT_MUTATION, variables)
+            except GitHubGraphQLError as e:
+                ref = ((e.data or {}).get("createRef") or {}).get("ref")
+                if ref:
+                    self._delete_ref(ref["id"], branch)
+                raise
+
+        data = self.limiter.call(commit, operation="graphql", idempotent=False)
+        return data["createCommitOnBranch"]["commit"]["oid"]
+
+    def _delete_ref(self, ref_id: str, branch: str) -> None:
+        """Delete a branch left without its commit, logging rather than raising on failure."""
+        try:
+            self.execute(DELETE_REF_MUTATION, {"input": {"refId": ref_id}}, idempotent=False)
+            logger.info(f"Deleted branch {branch} after its commit failed")
+        except Exception as e:
+            logger.warning(f"Could not delete branch {branch} after its commit failed: {e}")
+
+    def create_pull_request(self, repository_id: str, base: str, head: str, title: str, body: str) -> str:
+        """Open a pull request and return its URL."""
+        data = self.execute(PULL_REQUEST_MUTATION, {
+            "input": {"repositoryId": repository_id, "baseRefName": base, "headRefName": head, "title": title, "body": body}
+        }, idempotent=False)
+        return data["createPullRequest"]["pullRequest"]["url"]
+
+    def execute(self, query: str, variables: Dict[str, Any], idempotent: bool = True) -> Dict[str, Any]:
+        """Run a query or mutation under the rate limit and return its data.
+
+        Mutations pass idempotent=False, so they are only retried when throttled.
+        """
+        return self.limiter.call(self._post, query, variables, operation="graphql", idempotent=idempotent)
+
+    def _post(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single GraphQL request."""
+        req = Request(
+            self.url,
+            data=json.dumps({"query": query, "variables": variables}).encode("utf-8"),
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Content-Type": "application/json"
+            },
+            method="POST"
+        )
+        metrics.count("github.bytes_sent", len(req.data))
+        try:
+            with urlopen(req) as response:
+                body = response.read()
+        except HTTPError as e:
+            # Kept like PyGithub's data, so the limiter can tell a secondary rate limit from the message
+            e.data = e.read().decode("utf-8", errors="replace")
+            logger.debug(f"GraphQL request failed with HTTP {e.code}: {e.data}")
+            raise
+        metrics.count("github.bytes_received", len(body))
+
+        payload = json.loads(body)
+        if payload.get("errors"):
+            raise GitHubGraphQLError(payload["errors"], payload.get("data"))
+        return payload["data"]
+
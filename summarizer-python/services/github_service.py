@@ -2,22 +2,375 @@
 
 import logging
 import re
-from typing import Optional
+import tarfile
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.request import urlopen
 
-from github import Github, GithubException
+from github import Github, GithubException, InputGitTreeElement
 
+from .. import metrics
 from ..config import GitHubConfig
+from ..kb_index import KBIndex, parse_article
+from ..kb_mirror import KBMirror
+from ..metadata_store import MetadataStore
+from ..rate_limit import get_limiter
+from .article import merge_articles
+from .github_graphql import GitHubGraphQLClient
+
+if TYPE_CHECKING:
+    # Needs NumPy, which is only installed when the vector index is used
+    from ..vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+KB_DIRECTORY = "knowledge-base"
+
+# Changed articles above which the index is rebuilt from a tarball instead of fetched one by one
+MAX_INCREMENTAL_CHANGES = 100
+
+
+def is_article(path: str) -> bool:
+    """Whether a repository path is a knowledge base article."""
+    directory, _, name = path.rpartition("/")
+    return directory == KB_DIRECTORY and name.endswith(".md")
+
+
+@dataclass
+class RepoBase:
+    """Knowledge base repository state that a pull request is built on."""
+    repo: Any
+    default_branch: str
+    base_sha: str
+    # Head commit of the default branch (a PyGithub GitCommit), the parent of new commits
+    base_commit: Any = None
+    # Only set when resolved over GraphQL
+    repository_id: Optional[str] = None
+    # (name, path) of the knowledge base articles, when listed along with the base
+    articles: Optional[List[Tuple[str, str]]] = None
+    # Text of files fetched along with the base, by path
+    files: Dict[str, str] = field(default_factory=dict)
+    # Whether the base commit is in the local mirror, so files can be read and committed there
+    local: bool = False
+
+
+def links_to_message(content: str, message_ts: str) -> bool:
+    """Whether an article links to a Slack message, in any of the link formats."""
+    return message_ts.replace(".", "") in content or message_ts in content
+
+
+@dataclass
+class ThreadArticle:
+    """An article previously written from a thread, as merged on the default branch."""
+    file_path: str
+    content: str
+    # Newest message the merged article covers
+    last_ts: str
+    # Message whose link in the article shows the summary up to last_ts was merged
+    marker_ts: Optional[str] = None
+
+
+@dataclass
+class PendingSummary:
+    """A generated summary waiting to be added to the knowledge base."""
+    summary: str
+    channel_id: str
+    channel_name: str
+    timestamp: str
+    workspace_id: Optional[str]
+    workspace_name: str
+    last_message_ts: Optional[str] = None
+    # Article previously written from this thread, which the summary extends
+    article: Optional[ThreadArticle] = None
+
 
 class GitHubService:
     """Service for creating pull requests on GitHub."""
 
-    def __init__(self, config: GitHubConfig):
+    def __init__(
+        self,
+        config: GitHubConfig,
+        metadata_store: Optional[MetadataStore] = None,
+        kb_index: Optional[KBIndex] = None,
+        mirror: Optional[KBMirror] = None,
+        vector_index: Optional["VectorIndex"] = None
+    ):
         """Initialize GitHub service with configuration."""
         self.config = config
-        self.github = Github(config.token)
+        # Retries are left to the shared limiter, which also honors GitHub's rate-limit headers
+        self.github = Github(config.token, retry=None)
+        self.metadata_store = metadata_store
+        self.limiter = get_limiter("GitHub", config.rate_limit, max_retries=config.max_retries)
+        self.graphql = GitHubGraphQLClient(config.token, self.limiter) if config.use_graphql else None
+        self.kb_index = kb_index
+        self.mirror = mirror
+        self.vector_index = vector_index
+        self._index_lock = threading.Lock()
+
+    def resolve_base(self, prefetch: Sequence[str] = ()) -> RepoBase:
+        """Resolve the knowledge base repo, its default branch and head commit.
+
+        This does not depend on the summary, so callers can run it while the
+        summary is still being generated. With the default branch cached,
+        this is a single request: the branch response already carries the
+        head commit and its tree, so new commits need no further lookups.
+
+        Over GraphQL, the same single request also lists the knowledge base
+        and fetches the files in prefetch. With a local mirror, a single git
+        fetch replaces all of these. The knowledge base indexes, if any, are
+        brought up to the head commit here as well.
+
+        Args:
+            prefetch: Paths of files likely to be read later, e.g. the
+                thread's previous article; only used over GraphQL
+        """
+        full_name = f"{self.config.repo_owner}/{self.config.repo_name}"
+        base = None
+        if self.mirror:
+            try:
+                base = self._resolve_base_mirror(full_name)
+            except Exception as e:
+                logger.warning(f"Could not update the knowledge base mirror, using the API: {e}")
+        if base is None and self.graphql:
+            base = self._resolve_base_graphql(full_name, prefetch)
+        elif base is None:
+            base = self._resolve_base_rest(full_name)
+        if self._indexes():
+            self.sync_index(base)
+        return base
+
+    def _resolve_base_rest(self, full_name: str) -> RepoBase:
+        """Resolve the base with one request when the default branch is cached."""
+        default_branch = self.metadata_store.get_default_branch(full_name) if self.metadata_store else None
+        head = None
+        if default_branch:
+            repo = self.github.get_repo(full_name, lazy=True)
+            try:
+                head = self.limiter.call(repo.get_branch, default_branch).commit
+            except GithubException as e:
+                if e.status != 404:
+                    raise
+                logger.info(f"Cached default branch {default_branch} of {full_name} is gone, looking it up again")
+
+        if head is None:
+            repo = self.limiter.call(self.github.get_repo, full_name)
+            default_branch = repo.default_branch
+            if self.metadata_store:
+                self.metadata_store.set_default_branch(full_name, default_branch)
+            head = self.limiter.call(repo.get_branch, default_branch).commit
+
+        logger.debug(f"Resolved {full_name}@{default_branch} at {head.sha}")
+        return RepoBase(repo=repo, default_branch=default_branch, base_sha=head.sha, base_commit=head.commit)
+
+    def _resolve_base_mirror(self, full_name: str) -> RepoBase:
+        """Fast-forward the local mirror and list the knowledge base from it."""
+        default_branch, head_sha = self.mirror.sync()
+        if self.metadata_store:
+            self.metadata_store.set_default_branch(full_name, default_branch)
+        articles = [
+            (path.rpartition("/")[2], path)
+            for path in self.mirror.list_files(head_sha, KB_DIRECTORY)
+            if is_article(path)
+        ]
+        logger.debug(f"Resolved {full_name}@{default_branch} at {head_sha} with {len(articles)} articles from the mirror")
+        return RepoBase(
+            repo=self.github.get_repo(full_name, lazy=True),
+            default_branch=default_branch,
+            base_sha=head_sha,
+            articles=articles,
+            local=True
+        )
+
+    def _resolve_base_graphql(self, full_name: str, prefetch: Sequence[str]) -> RepoBase:
+        """Resolve the base, knowledge base listing and prefetched files in one query."""
+        result = self.graphql.resolve(self.config.repo_owner, self.config.repo_name, KB_DIRECTORY, prefetch)
+        if self.metadata_store:
+            self.metadata_store.set_default_branch(full_name, result["default_branch"])
+        logger.debug(
+            f"Resolved {full_name}@{result['default_branch']} at {result['head_oid']} "
+            f"with {len(result['entries'])} articles over GraphQL"
+        )
+        return RepoBase(
+            repo=self.github.get_repo(full_name, lazy=True),
+            default_branch=result["default_branch"],
+            base_sha=result["head_oid"],
+            repository_id=result["repository_id"],
+            articles=result["entries"],
+            files=result["files"]
+        )
+
+    def sync_index(self, base: RepoBase) -> bool:
+        """Bring the knowledge base indexes up to the base commit.
+
+        Only articles changed since the commit an index was built from are
+        fetched, once for all indexes built from the same commit. An index
+        is rebuilt from a tarball of the repo when it is new, the history was
+        rewritten or too many articles changed.
+
+        Returns:
+            Whether every index reflects the base commit
+        """
+        full_name = f"{self.config.repo_owner}/{self.config.repo_name}"
+        indexes = self._indexes()
+        with self._index_lock:
+            stale: Dict[Tuple[Optional[str], Optional[str]], List[Any]] = {}
+            for index in indexes:
+                state = index.state()
+                if state != (full_name, base.base_sha):
+                    stale.setdefault(state, []).append(index)
+
+            for (indexed_repo, indexed_commit), group in stale.items():
+                try:
+                    changes = None
+                    if indexed_repo == full_name and indexed_commit:
+                        changes = self._changed_articles(base, indexed_commit)
+                    if changes is None:
+                        articles = self._download_articles(base)
+                        logger.info(f"Rebuilding knowledge base indexes from {len(articles)} articles at {base.base_sha}")
+                        for index in group:
+                            index.update(full_name, base.base_sha, articles, rebuild=True)
+                    else:
+                        changed, removed = changes
+                        logger.info(
+                            f"Updating knowledge base indexes to {base.base_sha}: "
+                            f"{len(changed)} articles changed, {len(removed)} removed"
+                        )
+                        articles = self._read_articles(base, changed)
+                        for index in group:
+                            index.update(full_name, base.base_sha, articles, removed)
+                except Exception as e:
+                    logger.warning(f"Could not update knowledge base index: {e}")
+            return all(index.state()[1] == base.base_sha for index in indexes)
+
+    def _indexes(self) -> List[Any]:
+        """The knowledge base indexes in use, in order of preference for matching."""
+        return [index for index in (self.vector_index, self.kb_index) if index is not None]
+
+    def _changed_articles(self, base: RepoBase, since: str) -> Optional[Tuple[List[str], List[str]]]:
+        """List articles changed and removed between since and the base commit.
+
+        Returns:
+            (changed paths, removed paths), or None if the index has to be
+            rebuilt instead
+        """
+        if base.local:
+            if not self.mirror.has_commit(since):
+                return None
+            changes = self.mirror.changed_files(since, base.base_sha, KB_DIRECTORY)
+            return (
+                [path for status, path in changes if status != "D" and is_article(path)],
+                [path for status, path in changes if status == "D" and is_article(path)]
+            )
+
+        try:
+            comparison = self.limiter.call(base.repo.compare, since, base.base_sha)
+            files = self.limiter.call(list, comparison.files, operation="compare_files")
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            logger.info(f"Indexed commit {since} is gone from the knowledge base repo")
+            return None
+        if comparison.status not in ("ahead", "identical"):
+            logger.info(f"Knowledge base history changed since {since} ({comparison.status})")
+            return None
+
+        changed: List[str] = []
+        removed: List[str] = []
+        for file in files:
+            if file.status == "renamed" and is_article(file.previous_filename):
+                removed.append(file.previous_filename)
+            if not is_article(file.filename):
+                continue
+            if file.status == "removed":
+                removed.append(file.filename)
+            else:
+                changed.append(file.filename)
+        if len(changed) > MAX_INCREMENTAL_CHANGES:
+            return None
+        return changed, removed
+
+    def _read_articles(self, base: RepoBase, paths: List[str]) -> List[Tuple[str, str]]:
+        """Read articles at the base commit, one request each unless they are in the mirror."""
+        if base.local:
+            return list(self.mirror.read_many(base.base_sha, paths).items())
+        return [
+            (path, self.limiter.call(base.repo.get_contents, path, ref=base.base_sha).decoded_content.decode("utf-8"))
+            for path in paths
+        ]
+
+    def _download_articles(self, base: RepoBase) -> List[Tuple[str, str]]:
+        """Read every article at the base commit, from the mirror or a tarball of the repo."""
+        if base.local:
+            return self._read_articles(base, [path for _, path in base.articles])
+
+        url = self.limiter.call(base.repo.get_archive_link, "tarball", base.base_sha)
+
+        def download() -> List[Tuple[str, str]]:
+            articles = []
+            with urlopen(url) as response, tarfile.open(fileobj=response, mode="r|gz") as archive:
+                for member in archive:
+                    # Paths are prefixed with an "<owner>-<repo>-<sha>/" directory
+                    path = member.name.partition("/")[2]
+                    if member.isfile() and is_article(path):
+                        data = archive.extractfile(member).read()
+                        metrics.count("github.bytes_received", len(data))
+                        articles.append((path, data.decode("utf-8", errors="replace")))
+            return articles
+
+        return self.limiter.call(download, operation="download_tarball")
+
+    def previous_summary(self, channel_id: str, thread_ts: str) -> Optional[Dict[str, str]]:
+        """Return the recorded state of the last pull request made for a thread."""
+        if not self.metadata_store:
+            return None
+        return self.metadata_store.get_thread_state(channel_id, thread_ts)
+
+    def load_thread_article(self, channel_id: str, thread_ts: str, base: Optional[RepoBase] = None) -> Optional[ThreadArticle]:
+        """Load the article previously written from a thread.
+
+        The article only counts once its pull request is merged, i.e. the
+        default branch has the file and it links to the message that pull
+        request added as a source. If the last pull request is still open,
+        the article is taken as of the last summary known to be merged, so
+        the replies that pull request covers are summarized again rather
+        than skipped.
+
+        Returns:
+            ThreadArticle, or None if the thread has no merged article
+        """
+        state = self.previous_summary(channel_id, thread_ts)
+        if not state:
+            return None
+
+        base = base or self.resolve_base(prefetch=[state["file_path"]])
+        try:
+            content = self._read_file(base, state["file_path"])
+        except GithubException as e:
+            logger.info(f"Previous article {state['file_path']} is not on {base.default_branch}: {e.status}")
+            return None
+        if content is None:
+            logger.info(f"Previous article {state['file_path']} is not on {base.default_branch}")
+            return None
+
+        # State recorded before markers were kept only knows the thread's own link
+        marker_ts = state.get("marker_ts") or thread_ts
+        if links_to_message(content, marker_ts):
+            return ThreadArticle(
+                file_path=state["file_path"], content=content, last_ts=state["last_ts"], marker_ts=marker_ts
+            )
+
+        merged_ts, merged_marker_ts = state.get("merged_ts"), state.get("merged_marker_ts")
+        if merged_ts and merged_marker_ts and links_to_message(content, merged_marker_ts):
+            logger.info(
+                f"Last pull request for this thread is not merged, using its article as of {merged_ts}"
+            )
+            return ThreadArticle(
+                file_path=state["file_path"], content=content, last_ts=merged_ts, marker_ts=merged_marker_ts
+            )
+
+        logger.info(f"Previous article {state['file_path']} does not link to this thread yet")
+        return None
 
     def create_pull_request(
         self,
@@ -27,7 +380,9 @@ class GitHubService:
         timestamp: str,
         workspace_id: Optional[str],
         workspace_name: str,
-        last_message_ts: Optional[str] = None
+        last_message_ts: Optional[str] = None,
+        base: Optional[RepoBase] = None,
+        article: Optional[ThreadArticle] = None
     ) -> str:
         """Create a pull request with the summary.
 
@@ -37,137 +392,335 @@ class GitHubService:
             channel_name: Slack channel name
             timestamp: Message timestamp
             workspace_id: Slack workspace ID
+            base: Pre-resolved repository state, resolved here if omitted
+            article: Article previously written from this thread; the summary
+                is then a section covering newer replies and is merged into it
 
         Returns:
             URL of the created pull request
         """
-        logger.info(f"Creating PR for summary from channel {channel_name}")
-
-        repo = self.github.get_repo(f"{self.config.repo_owner}/{self.config.repo_name}")
-        default_branch = repo.default_branch
-
-        # Extract title from summary for filename and branch
-        title = self._extract_title(summary)
-        sanitized_title = self._sanitize_for_filename(title)
-
-        # Search for existing file with similar topic
-        existing_file_path = self._search_existing_article(repo, sanitized_title, default_branch)
+        pending = PendingSummary(
+            summary=summary,
+            channel_id=channel_id,
+            channel_name=channel_name,
+            timestamp=timestamp,
+            workspace_id=workspace_id,
+            workspace_name=workspace_name,
+            last_message_ts=last_message_ts,
+            article=article
+        )
+        result = self.create_pull_requests([pending], base)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-        is_update = existing_file_path is not None
-        file_path = existing_file_path if existing_file_path else f"knowledge-base/{sanitized_title}.md"
+    def create_pull_requests(
+        self,
+        summaries: Sequence[PendingSummary],
+        base: Optional[RepoBase] = None
+    ) -> List[Union[str, Exception]]:
+        """Create pull requests for several summaries, one per target article.
+
+        Each summary is matched to the article it would extend on its own:
+        the thread's previous article, an existing article on the same topic,
+        or a new file named after its title. Summaries with the same target
+        are merged into it in memory, in the order given, and land in a
+        single commit and pull request, so threads on the same topic no
+        longer open conflicting pull requests against the same file.
 
-        # Create a unique branch name
-        branch_name = f"{self.config.branch_prefix}{sanitized_title}-{timestamp.replace('.', '-')}"
-        logger.debug(f"Branch name: {branch_name}")
+        Args:
+            summaries: Summaries to add to the knowledge base
+            base: Pre-resolved repository state, resolved here if omitted
 
-        # Get the base branch reference
-        base_ref = repo.get_git_ref(f"heads/{default_branch}")
-        base_sha = base_ref.object.sha
+        Returns:
+            For each summary, in order, the URL of the pull request it went
+            into, or the exception that failed that pull request
+        """
+        base = base or self.resolve_base()
+
+        groups: Dict[str, List[PendingSummary]] = {}
+        existing: Dict[str, bool] = {}
+        for pending in summaries:
+            if pending.article:
+                # The summary only covers new replies, so it goes into the thread's own article
+                file_path = pending.article.file_path
+                is_update = True
+            else:
+                sanitized_title = self._sanitize_for_filename(self._extract_title(pending.summary))
+                # Search for existing file with similar topic
+                file_path = self._search_existing_article(base, sanitized_title, pending.summary)
+                is_update = file_path is not None
+                file_path = file_path or f"{KB_DIRECTORY}/{sanitized_title}.md"
+            groups.setdefault(file_path, []).append(pending)
+            existing[file_path] = existing.get(file_path, False) or is_update
+
+        results: Dict[int, Union[str, Exception]] = {}
+        for file_path, group in groups.items():
+            if len(group) > 1:
+                logger.info(f"Consolidating {len(group)} summaries into {file_path}")
+            try:
+                pr_url = self._create_article_pull_request(base, file_path, existing[file_path], group)
+            except Exception as e:
+                logger.error(f"Failed to create pull request for {file_path}: {e}")
+                pr_url = e
+            for pending in group:
+                results[id(pending)] = pr_url
+        return [results[id(pending)] for pending in summaries]
 
-        # Create new branch
-        try:
-            repo.create_git_ref(f"refs/heads/{branch_name}", base_sha)
-            logger.debug(f"Created branch {branch_name} from {base_sha}")
-        except Exception as e:
-            logger.error(f"Failed to create branch: {e}")
-            raise
+    def _create_article_pull_request(
+        self,
+        base: RepoBase,
+        file_path: str,
+        is_update: bool,
+        group: List[PendingSummary]
+    ) -> str:
+        """Merge summaries into one article, commit it on a new branch and open a pull request.
 
-        # Build Slack links
-        slack_link = self._build_slack_link(workspace_id, channel_id, timestamp, workspace_name)
-        last_message_link = self._build_slack_link(workspace_id, channel_id, last_message_ts, workspace_name) if last_message_ts else slack_link
+        Returns:
+            URL of the created pull request
+        """
+        first = group[0]
+        logger.info(f"Creating PR for summary from channel {first.channel_name}")
+        base_sha = base.base_sha
 
-        # Prepare content based on whether we're updating or creating
-        if is_update:
+        content = first.article.content if first.article else None
+        if content is None and is_update:
             logger.info(f"Found existing article at {file_path}, will extend it")
             try:
-                existing_content = repo.get_contents(file_path, ref=default_branch).decoded_content.decode('utf-8')
+                content = self._read_file(base, file_path) or ""
             except Exception as e:
                 logger.warning(f"Could not read existing file, will create new: {e}")
-                existing_content = ""
-
-            if existing_content:
-                final_content = self._merge_articles(existing_content, summary, slack_link)
-            else:
-                final_content = f"""{summary}
+                content = ""
+
+        for pending in group:
+            slack_link = self._build_slack_link(pending.workspace_id, pending.channel_id, pending.timestamp, pending.workspace_name)
+            if pending.article:
+                logger.info(f"Adding new replies to the thread's article at {file_path}")
+                last_message_link = self._build_slack_link(
+                    pending.workspace_id, pending.channel_id, pending.last_message_ts, pending.workspace_name
+                ) if pending.last_message_ts else slack_link
+                content = self._merge_articles(content, pending.summary, last_message_link)
+            elif content:
+                content = self._merge_articles(content, pending.summary, slack_link)
+            elif is_update:
+                content = f"""{pending.summary}
 
 ---
 
 **Sources:**
 - [Slack Thread]({slack_link})"""
-        else:
-            final_content = f"""{summary}
+            else:
+                content = f"""{pending.summary}
 
 ---
 
 **Source:** [Slack Thread]({slack_link})"""
 
-        # Create or update file
+        # The thread's own article keeps its title; otherwise the first summary names the change
+        title = self._extract_title(first.article.content if first.article else first.summary)
+        sanitized_title = self._sanitize_for_filename(title)
+
+        # Create a unique branch name; follow-up runs on a thread are told apart by their newest message
+        branch_ts = first.last_message_ts if first.article and first.last_message_ts else first.timestamp
+        branch_name = f"{self.config.branch_prefix}{sanitized_title}-{branch_ts.replace('.', '-')}"
+        logger.debug(f"Branch name: {branch_name}")
+
+        # Commit the file and create the branch pointing at the commit
         commit_message = f"{'Update' if is_update else 'Add'} KB article: {title}"
+        if len(group) > 1:
+            commit_message += f"\n\nConsolidates summaries of {len(group)} Slack threads."
         try:
-            existing_file = repo.get_contents(file_path, ref=branch_name)
-            logger.debug("File exists in new branch, updating")
-            repo.update_file(
-                path=file_path,
-                message=commit_message,
-                content=final_content,
-                sha=existing_file.sha,
-                branch=branch_name
-            )
-        except GithubException:
-            logger.debug("Creating new file in branch")
-            repo.create_file(
-                path=file_path,
-                message=commit_message,
-                content=final_content,
-                branch=branch_name
-            )
+            commit_sha = self._commit_file(base, branch_name, file_path, content, commit_message)
+            logger.debug(f"Created branch {branch_name} at {commit_sha} on top of {base_sha}")
+        except Exception as e:
+            logger.error(f"Failed to create branch: {e}")
+            raise
 
         # Create pull request
         pr_title = f"{'Update' if is_update else 'Add'} KB article: {title}"
-        body = f"""## {'Updated' if is_update else 'New'} Knowledge Base Article from Slack
+        body = self._pull_request_body(group, file_path, is_update)
+        pr_url = self._open_pull_request(base, pr_title, body, branch_name)
+
+        logger.info(f"Pull request created: {pr_url}")
+
+        if self.metadata_store:
+            for pending in group:
+                # Extending the thread's article adds a link to its newest message, otherwise to the thread
+                self.metadata_store.set_thread_state(
+                    pending.channel_id,
+                    pending.timestamp,
+                    pending.last_message_ts or pending.timestamp,
+                    file_path,
+                    marker_ts=(pending.last_message_ts or pending.timestamp) if pending.article else pending.timestamp,
+                    merged_ts=pending.article.last_ts if pending.article else None,
+                    merged_marker_ts=pending.article.marker_ts if pending.article else None
+                )
+        return pr_url
+
+    def _pull_request_body(self, group: List[PendingSummary], file_path: str, is_update: bool) -> str:
+        """Describe the threads a pull request adds to an article."""
+        if len(group) > 1:
+            threads = []
+            for pending in group:
+                slack_link = self._build_slack_link(pending.workspace_id, pending.channel_id, pending.timestamp, pending.workspace_name)
+                action = "new replies" if pending.article else "summary"
+                threads.append(f"- [Slack Thread]({slack_link}) in #{pending.channel_name} ({action})")
+            threads_list = "\n".join(threads)
+            return f"""## {'Updated' if is_update else 'New'} Knowledge Base Article from Slack
+
+**Sources:**
+{threads_list}
+**Action:** {'Extended existing article' if is_update else 'Created new article'} with {len(group)} Slack threads on the same topic
+
+This PR {'updates an existing' if is_update else 'adds a new'} knowledge base article generated from several Slack threads, consolidated into one change.
+
+### File
+- `{file_path}`"""
+
+        pending = group[0]
+        slack_link = self._build_slack_link(pending.workspace_id, pending.channel_id, pending.timestamp, pending.workspace_name)
+        last_message_link = self._build_slack_link(
+            pending.workspace_id, pending.channel_id, pending.last_message_ts, pending.workspace_name
+        ) if pending.last_message_ts else slack_link
+        return f"""## {'Updated' if is_update else 'New'} Knowledge Base Article from Slack
 
 **Source:** [Slack Thread]({slack_link})
 **Latest Message:** [Jump to conversation]({last_message_link})
-**Channel:** #{channel_name}
-**Action:** {'Extended existing article with new information' if is_update else 'Created new article'}
+**Channel:** #{pending.channel_name}
+**Action:** {'Added replies posted since the last summary' if pending.article else 'Extended existing article with new information' if is_update else 'Created new article'}
 
 This PR {'updates an existing' if is_update else 'adds a new'} knowledge base article generated from a Slack thread.
 
 ### File
 - `{file_path}`"""
 
-        pr = repo.create_pull(
-            title=pr_title,
+    def _read_file(self, base: RepoBase, file_path: str) -> Optional[str]:
+        """Read a file on the default branch, preferring a copy fetched with the base.
+
+        Returns:
+            File content, or None if the mirror or GraphQL has no such file;
+            over REST a missing file raises GithubException instead
+        """
+        if file_path in base.files:
+            return base.files[file_path]
+        if base.local:
+            return self.mirror.read(base.base_sha, file_path)
+        if self.graphql:
+            return self.graphql.read_file(
+                self.config.repo_owner, self.config.repo_name, base.default_branch, file_path
+            )
+        data = self.limiter.call(base.repo.get_contents, file_path, ref=base.default_branch).decoded_content
+        metrics.count("github.bytes_received", len(data))
+        return data.decode("utf-8")
+
+    def _commit_file(self, base: RepoBase, branch_name: str, file_path: str, content: str, message: str) -> str:
+        """Commit a file on top of the base commit and create a branch for it.
+
+        The file content goes inline into a tree built on the base commit's
+        tree, so the blob, tree, commit and branch take three requests, and
+        no empty branch is left behind if one of them fails.
+
+        Over GraphQL, the branch and commit are created by a single request.
+        With a local mirror, the commit is made locally and pushed.
+
+        Returns:
+            SHA of the new commit
+        """
+        if base.local:
+            return self.mirror.commit_file(base.base_sha, branch_name, file_path, content, message)
+        if base.repository_id:
+            return self.graphql.commit_file(
+                base.repository_id,
+                f"{self.config.repo_owner}/{self.config.repo_name}",
+                branch_name,
+                base.base_sha,
+                file_path,
+                content,
+                message
+            )
+
+        repo = base.repo
+        metrics.count("github.bytes_sent", len(content.encode("utf-8")))
+        base_commit = base.base_commit or self.limiter.call(repo.get_git_commit, base.base_sha)
+        tree = self.limiter.call(
+            repo.create_git_tree,
+            [InputGitTreeElement(path=file_path, mode="100644", type="blob", content=content)],
+            base_tree=base_commit.tree,
+            idempotent=False
+        )
+        commit = self.limiter.call(repo.create_git_commit, message, tree, [base_commit], idempotent=False)
+        self.limiter.call(repo.create_git_ref, f"refs/heads/{branch_name}", commit.sha, idempotent=False)
+        return commit.sha
+
+    def _open_pull_request(self, base: RepoBase, title: str, body: str, branch_name: str) -> str:
+        """Open a pull request from branch_name into the default branch and return its URL."""
+        if base.repository_id:
+            return self.graphql.create_pull_request(base.repository_id, base.default_branch, branch_name, title, body)
+        pr = self.limiter.call(
+            base.repo.create_pull,
+            title=title,
             body=body,
             head=branch_name,
-            base=default_branch
+            base=base.default_branch,
+            idempotent=False
         )
-
-        logger.info(f"Pull request created: {pr.html_url}")
         return pr.html_url
 
-    def _search_existing_article(self, repo, sanitized_title: str, branch: str) -> Optional[str]:
-        """Search for existing article with same/similar topic."""
+    def _search_existing_article(self, base: RepoBase, sanitized_title: str, summary: str) -> Optional[str]:
+        """Search for existing article with same/similar topic.
+
+        With an up-to-date vector index, the article whose embedding is most
+        similar to the whole summary is extended if it clears the similarity
+        threshold. With an up-to-date keyword index, articles are ranked by
+        how well their title, keywords and body match the summary's title and
+        keywords. Otherwise the knowledge base is listed and matched by
+        filename.
+        """
+        index = next((index for index in self._indexes() if index.state()[1] == base.base_sha), None)
+        if index is not None:
+            exact_path = f"{KB_DIRECTORY}/{sanitized_title}.md"
+            if index.contains(exact_path):
+                logger.debug(f"Found exact match: {exact_path}")
+                return exact_path
+
+            if index is self.vector_index:
+                matches = self.vector_index.search(summary, k=1)
+                threshold = self.config.similarity_threshold
+            else:
+                title, keywords, _ = parse_article(summary)
+                matches = self.kb_index.search(f"{title}\n{keywords}", limit=1)
+                threshold = self.config.match_min_score
+            if matches and matches[0][1] >= threshold:
+                logger.debug(f"Found similar match: {matches[0][0]} (score {matches[0][1]:.2f})")
+                return matches[0][0]
+            if matches:
+                logger.debug(f"Closest article {matches[0][0]} scored {matches[0][1]:.2f}, creating a new one")
+            return None
+
         try:
-            contents = repo.get_contents("knowledge-base", ref=branch)
+            if base.articles is not None:
+                articles = base.articles
+            else:
+                contents = self.limiter.call(base.repo.get_contents, KB_DIRECTORY, ref=base.default_branch)
+                articles = [(content.name, content.path) for content in contents]
 
             # Look for exact match
-            for content in contents:
-                if content.name == f"{sanitized_title}.md":
-                    logger.debug(f"Found exact match: {content.path}")
-                    return content.path
+            for name, path in articles:
+                if name == f"{sanitized_title}.md":
+                    logger.debug(f"Found exact match: {path}")
+                    return path
 
             # Look for similar titles (fuzzy match)
             title_words = [w for w in sanitized_title.split("-") if len(w) > 3]
-            for content in contents:
-                existing_title = content.name.removesuffix(".md")
+            for name, path in articles:
+                existing_title = name.removesuffix(".md")
                 existing_words = [w for w in existing_title.split("-") if len(w) > 3]
 
                 # If they share 50%+ of significant words, consider it a match
                 common_words = set(title_words) & set(existing_words)
                 if len(common_words) >= min(len(title_words), len(existing_words)) // 2:
-                    logger.debug(f"Found similar match: {content.path}")
-                    return content.path
+                    logger.debug(f"Found similar match: {path}")
+                    return path
 
             return None
         except Exception as e:
@@ -176,88 +729,13 @@ This PR {'updates an existing' if is_update else 'adds a new'} knowledge base ar
 
     def _merge_articles(self, existing_content: str, new_summary: str, new_slack_link: str) -> str:
         """Merge new content into existing article."""
-        # Extract existing sources section
-        sources_regex = re.compile(r"---\s*\*\*Source[s]?:\*\*(.+)$", re.DOTALL)
-        existing_sources_match = sources_regex.search(existing_content)
-        existing_sources = existing_sources_match.group(1).strip() if existing_sources_match else ""
-
-        # Remove sources section from existing content
-        content_without_sources = sources_regex.sub("", existing_content).strip()
-
-        # Extract keywords from new summary and merge with existing
-        new_keywords_regex = re.compile(r"\*\*Keywords:\*\*\s*(.+)")
-        new_keywords_match = new_keywords_regex.search(new_summary)
-        new_keywords = [k.strip() for k in new_keywords_match.group(1).split(",")] if new_keywords_match else []
-
-        existing_keywords_match = new_keywords_regex.search(content_without_sources)
-        existing_keywords = [k.strip() for k in existing_keywords_match.group(1).split(",")] if existing_keywords_match else []
-
-        # Merge keywords (deduplicate)
-        merged_keywords = list(dict.fromkeys(existing_keywords + new_keywords))[:10]
-
-        # Update keywords line in existing content
-        if existing_keywords_match and merged_keywords:
-            content_with_updated_keywords = content_without_sources.replace(
-                existing_keywords_match.group(0),
-                f"**Keywords:** {', '.join(merged_keywords)}"
-            )
-        elif merged_keywords:
-            # Add keywords after title if not present
-            lines = content_without_sources.split("\n")
-            title_index = next((i for i, line in enumerate(lines) if line.startswith("#")), -1)
-            if title_index >= 0 and title_index + 1 < len(lines):
-                lines.insert(title_index + 1, "")
-                lines.insert(title_index + 2, f"**Keywords:** {', '.join(merged_keywords)}")
-                content_with_updated_keywords = "\n".join(lines)
-            else:
-                content_with_updated_keywords = content_without_sources
-        else:
-            content_with_updated_keywords = content_without_sources
-
-        # Extract main content from new summary (without title and keywords)
-        new_summary_lines = new_summary.split("\n")
-        new_content_start = next(
-            (i for i, line in enumerate(new_summary_lines)
-             if not line.startswith("#") and "**Keywords:**" not in line and line.strip()),
-            0
-        )
-        new_content = "\n".join(new_summary_lines[new_content_start:]) if new_content_start >= 0 else new_summary
-
-        # Build new sources list
-        sources_list = []
-
-        # Parse existing sources
-        if existing_sources:
-            if existing_sources.startswith("- [Slack Thread]"):
-                sources_list.append(existing_sources.removeprefix("- "))
-            elif "\n- [Slack Thread]" in existing_sources:
-                for line in existing_sources.split("\n"):
-                    if line.strip().startswith("- [Slack Thread]"):
-                        sources_list.append(line.strip().removeprefix("- "))
-            else:
-                sources_list.append(f"[Slack Thread]({existing_sources})")
-
-        # Add new source
-        sources_list.append(f"[Slack Thread]({new_slack_link})")
-
-        sources_section = (
-            f"**Source:** {sources_list[0]}" if len(sources_list) == 1
-            else f"**Sources:**\n" + "\n".join(f"- {s}" for s in sources_list)
-        )
-
-        return f"""{content_with_updated_keywords}
-
-## Additional Context
-
-{new_content}
-
----
-
-{sources_section}"""
+        return merge_articles(existing_content, new_summary, new_slack_link)
 
     def _build_slack_link(self, workspace_id: Optional[str], channel_id: str, timestamp: str, workspace_name: str) -> str:
         """Build Slack deep link."""
         message_id = timestamp.replace(".", "")
+        if not workspace_id and self.metadata_store:
+            workspace_id = self.metadata_store.get_workspace_id()
         if workspace_name:
             return f"https://{workspace_name}.slack.com/archives/{channel_id}/p{message_id}"
         if workspace_id:
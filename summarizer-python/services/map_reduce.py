@@ -0,0 +1,177 @@
+"""Hierarchical map-reduce summarization for threads larger than one prompt."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from ..models import SlackMessage
+from .token_budget import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+MAP_PROMPT = """You are a technical documentation assistant. Below is part {index} of {count} of a long Slack
+conversation. Extract detailed technical notes from this part as a markdown bullet list.
+
+Preserve:
+- Technical explanations and concepts
+- Code snippets and examples (as code blocks)
+- Problems, their causes and their solutions
+- Best practices and recommendations
+- Important links and references
+
+Leave out greetings, acknowledgments, off-topic discussion and who said what.
+Do not add a title or a keywords line.
+
+Conversation part {index} of {count}:
+
+{content}
+
+Technical notes:"""
+
+CONDENSE_PROMPT = """You are a technical documentation assistant. Below are technical notes taken from
+consecutive parts of a long Slack conversation. Merge them into a single, shorter markdown bullet
+list. Remove repetition but keep every distinct technical fact, code snippet and link.
+Do not add a title or a keywords line.
+
+{content}
+
+Merged technical notes:"""
+
+NOTES_HEADER = (
+    "The conversation was too long to include verbatim. Below are technical notes taken from "
+    "consecutive parts of it, in order:"
+)
+NOTES_TRUNCATED_MARKER = "[The remaining notes are omitted]"
+
+# Tokens the prompts add around their content
+MAP_PROMPT_TOKENS = estimate_tokens(MAP_PROMPT.format(index=0, count=0, content=""))
+CONDENSE_PROMPT_TOKENS = estimate_tokens(CONDENSE_PROMPT.format(content=""))
+
+
+def chunk_messages(messages: List[SlackMessage], max_tokens: int) -> List[List[SlackMessage]]:
+    """Split messages into consecutive chunks that each fit max_tokens.
+
+    Chunks break on message boundaries only. A single message larger than
+    max_tokens gets a chunk of its own and is cut down to fit.
+    """
+    chunks: List[List[SlackMessage]] = []
+    current: List[SlackMessage] = []
+    current_tokens = 0
+
+    for message in messages:
+        tokens = estimate_tokens(message.text) + 1
+        if tokens > max_tokens:
+            message = SlackMessage(
+                user=message.user,
+                username=message.username,
+                text=truncate_to_tokens(message.text, max_tokens - 1),
+                timestamp=message.timestamp
+            )
+            tokens = estimate_tokens(message.text) + 1
+
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(message)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class MapReduceSummarizer:
+    """Summarizes a thread that does not fit in one prompt.
+
+    The map step extracts notes from each chunk of messages in parallel, the
+    notes are condensed further if they still do not fit, and the reduce step
+    turns them into the final article with the provider's regular prompt.
+    Notes that cannot be condensed to fit are cut down, so no prompt goes
+    over the budget.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str], str],
+        build_prompt: Callable[[str], str],
+        max_tokens: int,
+        concurrency: int = 4,
+        reduce_generate: Optional[Callable[[str], str]] = None
+    ):
+        """Initialize the summarizer.
+
+        Args:
+            generate: Sends a prompt to the model and returns the generated text
+            build_prompt: Builds the final article prompt from thread content
+            max_tokens: Token budget for the content of a single prompt
+            concurrency: Maximum number of model calls in flight
+            reduce_generate: Used instead of generate for the final call, e.g. to stream it
+        """
+        self.generate = generate
+        self.build_prompt = build_prompt
+        self.max_tokens = max_tokens
+        self.concurrency = max(1, concurrency)
+        self.reduce_generate = reduce_generate or generate
+
+    def summarize(self, messages: List[SlackMessage]) -> str:
+        """Generate a knowledge base article from all messages.
+
+        Args:
+            messages: Thread messages in chronological order
+
+        Returns:
+            Markdown-formatted summary
+        """
+        chunks = chunk_messages(messages, self.max_tokens - MAP_PROMPT_TOKENS)
+        logger.info(f"Summarizing {len(messages)} messages in {len(chunks)} chunks")
+
+        notes = self._map([
+            MAP_PROMPT.format(
+                index=index,
+                count=len(chunks),
+                content="\n\n".join(message.text for message in chunk)
+            )
+            for index, chunk in enumerate(chunks, start=1)
+        ])
+
+        # Condense the notes until they fit in the final prompt
+        while len(notes) > 1 and estimate_tokens("\n\n".join([NOTES_HEADER] + notes)) > self.max_tokens:
+            groups = self._group(notes)
+            if len(groups) == len(notes):
+                break
+            logger.info(f"Condensing {len(notes)} notes into {len(groups)}")
+            # A note too large to share a prompt is in a group of its own, cut down to fit
+            notes = self._map([
+                CONDENSE_PROMPT.format(
+                    content=truncate_to_tokens("\n\n".join(group), self.max_tokens - CONDENSE_PROMPT_TOKENS)
+                )
+                for group in groups
+            ])
+
+        content = "\n\n".join([NOTES_HEADER] + notes)
+        if estimate_tokens(content) > self.max_tokens:
+            logger.warning("The notes could not be condensed to fit the token budget, cutting them down")
+            content = truncate_to_tokens(content, self.max_tokens, NOTES_TRUNCATED_MARKER)
+        return self.reduce_generate(self.build_prompt(content))
+
+    def _map(self, prompts: List[str]) -> List[str]:
+        """Run prompts with bounded concurrency, preserving order."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(self.generate, prompts))
+
+    def _group(self, notes: List[str]) -> List[List[str]]:
+        """Group consecutive notes so each condense prompt fits the token budget."""
+        max_tokens = self.max_tokens - CONDENSE_PROMPT_TOKENS
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for note in notes:
+            tokens = estimate_tokens(note) + 1
+            if current and current_tokens + tokens > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(note)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
@@ -0,0 +1,75 @@
+"""Progress reporting for streamed summaries."""
+
+import logging
+import time
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StreamProgress:
+    """Token consumer that tracks time to first token and reports progress.
+
+    Pass an instance as ``on_token`` to a provider's ``summarize``. It calls
+    ``report`` with a short status message at most once per interval, which
+    shows the end of the summary written so far when preview_chars is set.
+    """
+
+    def __init__(self, report: Callable[[str], None], interval: float = 5.0, preview_chars: int = 0):
+        """Initialize the consumer.
+
+        Args:
+            report: Called with a progress message
+            interval: Minimum seconds between progress messages
+            preview_chars: Characters of the partial summary quoted in each
+                progress message, or 0 to only report its length
+        """
+        self.report = report
+        self.interval = interval
+        self.preview_chars = preview_chars
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.characters = 0
+        self._parts: List[str] = []
+        self._last_report = self.started
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from creation until the first streamed text, if any arrived."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def text(self) -> str:
+        """The summary streamed so far."""
+        return "".join(self._parts)
+
+    def preview(self) -> str:
+        """The end of the summary streamed so far, as a Slack quote of at most preview_chars characters.
+
+        A cut preview starts at a line boundary where the kept text has one.
+        """
+        text = self.text.strip()
+        if len(text) > self.preview_chars:
+            text = text[-self.preview_chars:]
+            newline = text.find("\n")
+            if 0 <= newline < len(text) - 1:
+                text = text[newline + 1:]
+            text = f"…\n{text}"
+        return "\n".join(f"> {line}" for line in text.split("\n"))
+
+    def __call__(self, text: str) -> None:
+        now = time.monotonic()
+        if self.first_token_at is None:
+            self.first_token_at = now
+            logger.info(f"Time to first token: {self.time_to_first_token:.2f}s")
+
+        self.characters += len(text)
+        self._parts.append(text)
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            message = f":writing_hand: Writing summary... {self.characters} characters so far"
+            if self.preview_chars and self.text.strip():
+                message += f"\n\n{self.preview()}"
+            self.report(message)
@@ -0,0 +1,109 @@
+"""Prompt templates shared by all summary providers."""
+
+from .token_budget import estimate_tokens
+
+# Bump whenever the prompts change so cached summaries are regenerated
+PROMPT_VERSION = "1"
+
+SUMMARY_PROMPT_PREFIX = """You are a technical documentation assistant. Your task is to transform a Slack conversation
+into a clear, well-structured knowledge base article in markdown format.
+
+Requirements:
+1. Create a clear, descriptive title based on the main topic discussed
+2. Identify 3-7 keywords/tags that represent the main topics, technologies, or concepts discussed
+3. Focus entirely on the technical content, concepts, and information shared
+4. Organize information into logical sections with proper headers
+5. Extract and preserve:
+   - Technical explanations and concepts
+   - Code snippets and examples
+   - Solutions to problems
+   - Best practices and recommendations
+   - Important links and references
+6. Remove conversational elements (greetings, acknowledgments, "thanks", etc.)
+7. Synthesize multiple related points into cohesive explanations
+8. Use proper markdown formatting (headers, lists, code blocks, etc.)
+9. Keep the tone professional and encyclopedic
+
+Do NOT include:
+- Who said what or when
+- Conversational back-and-forth
+- Off-topic discussion
+- Personal opinions unless they represent technical best practices
+
+Format the output as a complete markdown document with:
+- A descriptive title (# heading)
+- A keywords line IMMEDIATELY after the title in the format: **Keywords:** keyword1, keyword2, keyword3
+- An overview section explaining what this article covers
+- Logical subsections organizing the technical content
+- Code blocks for any code examples
+- Links to external resources if mentioned
+
+Example format:
+# How to Configure Redis for High Availability
+
+**Keywords:** redis, high-availability, clustering, replication, failover
+
+## Overview
+[content here]
+
+Here is the conversation to transform into a knowledge base article:
+
+"""
+
+SUMMARY_PROMPT_SUFFIX = """
+
+Generate the knowledge base article:"""
+
+# The template is fixed, so its token cost is computed once at import time
+SUMMARY_PROMPT_TOKENS = estimate_tokens(SUMMARY_PROMPT_PREFIX + SUMMARY_PROMPT_SUFFIX)
+
+
+def build_summary_prompt(thread_content: str) -> str:
+    """Build the knowledge base article prompt for the given thread content."""
+    return SUMMARY_PROMPT_PREFIX + thread_content + SUMMARY_PROMPT_SUFFIX
+
+
+DELTA_PROMPT_PREFIX = """You are a technical documentation assistant. A knowledge base article was already written
+from a Slack conversation, and the conversation has since received new replies. Write a section that
+adds the technical information from the new replies to the article.
+
+Requirements:
+1. Only cover information that is not already in the article
+2. Do not repeat the article title or add a keywords line
+3. Start with one or two sentences on what the new replies add, then organize the details under "###" headers
+4. Preserve code snippets, solutions, recommendations and links from the new replies
+5. Remove conversational elements (greetings, acknowledgments, "thanks", etc.)
+
+Existing article:
+
+"""
+
+DELTA_PROMPT_THREAD = """
+
+Original question that started the conversation:
+
+"""
+
+DELTA_PROMPT_REPLIES = """
+
+New replies:
+
+"""
+
+DELTA_PROMPT_SUFFIX = """
+
+Generate the new section:"""
+
+DELTA_PROMPT_TOKENS = estimate_tokens(
+    DELTA_PROMPT_PREFIX + DELTA_PROMPT_THREAD + DELTA_PROMPT_REPLIES + DELTA_PROMPT_SUFFIX
+)
+
+
+def build_delta_prompt(existing_article: str, opener: str, replies_content: str) -> str:
+    """Build the prompt for a section covering replies added since the article was written."""
+    return (
+        DELTA_PROMPT_PREFIX + existing_article
+        + DELTA_PROMPT_THREAD + opener
+        + DELTA_PROMPT_REPLIES + replies_content
+        + DELTA_PROMPT_SUFFIX
+    )
@@ -0,0 +1,260 @@
+"""Summary provider interface, shared base class and lazy registry."""
+
+import importlib
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Protocol, Tuple
+
+from .. import metrics
+from ..config import AIConfig, AppConfig
+from ..models import SlackMessage, SlackThread
+from ..rate_limit import get_limiter
+from .map_reduce import MapReduceSummarizer
+from .prompts import DELTA_PROMPT_TOKENS, SUMMARY_PROMPT_TOKENS, build_delta_prompt, build_summary_prompt
+from .token_budget import TokenBudget, estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Ends an existing article that was cut down to fit a delta prompt
+ARTICLE_TRUNCATED_MARKER = "[The rest of the article is omitted]"
+
+
+class EmptySummaryError(Exception):
+    """Raised when a model answers without any text."""
+
+
+class SummaryProvider(Protocol):
+    """Anything that can turn a Slack thread into a knowledge base article."""
+
+    name: str
+    model_name: str
+
+    def summarize(self, thread: SlackThread, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate a markdown summary of the thread.
+
+        If on_token is given, the article text is passed to it as it streams in.
+        """
+        ...
+
+    def summarize_delta(
+        self,
+        opener: Optional[SlackMessage],
+        replies: List[SlackMessage],
+        existing_article: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Generate a markdown section covering replies newer than an existing article."""
+        ...
+
+
+class BaseSummaryService:
+    """Shared prompt building, token budgeting and map-reduce for providers.
+
+    Subclasses implement ``_generate``, which sends a finished prompt to the
+    model and returns the generated text, and ``_stream``, which yields the
+    text as the model produces it.
+    """
+
+    name = "AI"
+    model_name = ""
+
+    def __init__(self, ai_config: AIConfig):
+        """Initialize the token budget from the AI configuration."""
+        self.ai_config = ai_config
+
+        # Budget the thread content so the whole prompt stays within max_input_tokens
+        self.token_budget = TokenBudget(ai_config.max_input_tokens - SUMMARY_PROMPT_TOKENS)
+        self.limiter = get_limiter(self.name, ai_config.rate_limit, max_retries=ai_config.max_retries)
+
+    def summarize(self, thread: SlackThread, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate a summary of the thread.
+
+        Args:
+            thread: The Slack thread to summarize
+            on_token: Optional consumer of the article text as it streams in
+
+        Returns:
+            Markdown-formatted summary
+        """
+        logger.debug(f"Generating summary for thread with {len(thread.messages)} messages using {self.name}")
+
+        if on_token and self.ai_config.stream:
+            generate_article = lambda prompt: self._generate_streaming(prompt, on_token)
+        else:
+            generate_article = self._call_model
+
+        if self.ai_config.map_reduce and not self.token_budget.fits(thread.messages):
+            logger.info("Thread exceeds the token budget, summarizing it in chunks")
+            return MapReduceSummarizer(
+                self._call_model,
+                build_summary_prompt,
+                self.token_budget.max_tokens,
+                self.ai_config.map_concurrency,
+                reduce_generate=generate_article
+            ).summarize(thread.messages)
+
+        with metrics.span("ai.build_prompt"):
+            thread_content = self._build_thread_content(thread)
+            prompt = build_summary_prompt(thread_content)
+        return generate_article(prompt)
+
+    def summarize_delta(
+        self,
+        opener: Optional[SlackMessage],
+        replies: List[SlackMessage],
+        existing_article: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Generate a section covering replies added since an article was written.
+
+        Only the new replies are sent in full, with the existing article and
+        the thread opener as context, so re-running a long thread costs a
+        fraction of summarizing it again. An article too long to leave room
+        for the replies within max_input_tokens is cut down to its leading
+        lines.
+
+        Args:
+            opener: The message that started the thread, if available
+            replies: Replies newer than the existing article
+            existing_article: Markdown of the article written from the thread
+            on_token: Optional consumer of the section text as it streams in
+
+        Returns:
+            Markdown section without a title or keywords line
+        """
+        with metrics.span("ai.build_prompt"):
+            max_tokens = self.ai_config.max_input_tokens
+            # The opener and a share of the replies are guaranteed room; the article gets the rest
+            opener_text = truncate_to_tokens(opener.text if opener else "", max_tokens // 4)
+            replies_tokens = sum(estimate_tokens(reply.text) + TokenBudget.SEPARATOR_TOKENS for reply in replies)
+            article_budget = max(
+                0,
+                max_tokens - DELTA_PROMPT_TOKENS - estimate_tokens(opener_text) - min(replies_tokens, max_tokens // 4)
+            )
+            article = truncate_to_tokens(existing_article, article_budget, ARTICLE_TRUNCATED_MARKER)
+            if article != existing_article:
+                logger.info(f"Cut the existing article down to {article_budget} tokens to fit the prompt")
+            budget = TokenBudget(max_tokens - DELTA_PROMPT_TOKENS - estimate_tokens(opener_text) - estimate_tokens(article))
+            selected = budget.fit(replies)
+            if selected.dropped:
+                logger.info(f"Dropped {len(selected.dropped)} of {len(replies)} new replies to fit the token budget")
+
+            prompt = build_delta_prompt(
+                article,
+                opener_text,
+                "\n\n".join(message.text for message in selected.messages)
+            )
+        if on_token and self.ai_config.stream:
+            return self._generate_streaming(prompt, on_token)
+        return self._call_model(prompt)
+
+    def _call_model(self, prompt: str) -> str:
+        """Generate text under the provider's rate limit, retrying throttled requests.
+
+        Raises:
+            EmptySummaryError: If the model returned no text
+        """
+        text = self.limiter.call(self._generate, prompt)
+        if not text:
+            raise EmptySummaryError(f"{self.name} returned no text")
+        return text
+
+    def _generate(self, prompt: str) -> str:
+        """Send a prompt to the model and return the generated text, empty if there is none."""
+        raise NotImplementedError
+
+    def _record_usage(
+        self,
+        prompt: str,
+        text: str,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None
+    ) -> None:
+        """Count the tokens a request used, estimating any the model did not report."""
+        metrics.count("ai.tokens_in", input_tokens if input_tokens is not None else estimate_tokens(prompt))
+        metrics.count("ai.tokens_out", output_tokens if output_tokens is not None else estimate_tokens(text))
+
+    def _stream(self, prompt: str) -> Iterator[str]:
+        """Send a prompt to the model and yield the text as it is generated."""
+        yield self._generate(prompt)
+
+    def _generate_streaming(self, prompt: str, on_token: Callable[[str], None]) -> str:
+        """Stream a response, passing each piece of text to on_token.
+
+        A throttled request is retried only until the first text has been
+        passed on, so on_token never sees a response twice.
+
+        Raises:
+            EmptySummaryError: If the model streamed no text
+        """
+        parts = []
+
+        def stream() -> None:
+            for text in self._stream(prompt):
+                if text:
+                    on_token(text)
+                    parts.append(text)
+
+        self.limiter.call(stream, retryable=lambda: not parts)
+        if not parts:
+            raise EmptySummaryError(f"{self.name} returned no text")
+        summary = "".join(parts)
+        logger.debug(f"Generated summary: {len(summary)} characters")
+        return summary
+
+    def _build_thread_content(self, thread: SlackThread) -> str:
+        """Build thread content string from the messages that fit the token budget."""
+        budget = self.token_budget.fit(thread.messages)
+        if budget.dropped:
+            logger.info(
+                f"Dropped {len(budget.dropped)} of {len(thread.messages)} messages "
+                f"(~{budget.dropped_tokens} tokens) to fit the {self.token_budget.max_tokens} token budget"
+            )
+        return "\n\n".join(message.text for message in budget.messages)
+
+
+# Provider name -> (module, class name, AppConfig attribute holding its config).
+# Modules are imported on first use so only the selected provider's SDK loads.
+_PROVIDERS: Dict[str, Tuple[str, str, str]] = {
+    "claude": (".claude_service", "ClaudeService", "claude"),
+    "gemini": (".gemini_service", "GeminiService", "gemini"),
+    "bedrock": (".bedrock_service", "BedrockService", "bedrock"),
+}
+
+
+def register_provider(name: str, module: str, class_name: str, config_attr: str) -> None:
+    """Register a provider to be loaded lazily by create_provider.
+
+    Args:
+        name: Provider name used in AI_PROVIDER
+        module: Module path, absolute or relative to this package
+        class_name: Provider class in the module
+        config_attr: AppConfig attribute passed as the provider's config
+    """
+    _PROVIDERS[name] = (module, class_name, config_attr)
+
+
+def available_providers() -> Tuple[str, ...]:
+    """Names of all registered providers."""
+    return tuple(_PROVIDERS)
+
+
+def create_provider(name: str, config: AppConfig, ai_config: Optional[AIConfig] = None) -> SummaryProvider:
+    """Import and construct the named provider.
+
+    Args:
+        name: Provider name, e.g. "gemini"
+        config: Application configuration
+        ai_config: AI settings, defaults to config.ai
+
+    Returns:
+        The provider instance
+    """
+    try:
+        module_name, class_name, config_attr = _PROVIDERS[name.lower()]
+    except KeyError:
+        names = "', '".join(_PROVIDERS)
+        raise ValueError(f"Unknown AI provider: {name}. Use '{names}'") from None
+
+    module = importlib.import_module(module_name, __package__)
+    provider_class = getattr(module, class_name)
+    return provider_class(getattr(config, config_attr), ai_config or config.ai)
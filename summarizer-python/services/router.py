@@ -0,0 +1,258 @@
+"""Failover and hedged requests across several summary providers."""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from ..models import SlackMessage, SlackThread
+from .provider import SummaryProvider
+
+logger = logging.getLogger(__name__)
+
+# Latency samples needed before a provider's p95 replaces the configured hedge delay
+MIN_HEDGE_SAMPLES = 5
+
+
+class ProviderTimeoutError(Exception):
+    """Raised when a provider does not answer within its timeout."""
+
+
+class _AttemptCancelled(Exception):
+    """Raised inside a streaming attempt that lost to another provider."""
+
+
+@dataclass
+class ProviderStats:
+    """Latency and error counts of one provider."""
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    abandoned: int = 0
+    wins: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency of successful calls, or None without samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class _TokenRelay:
+    """Passes streamed text on from the first attempt of a request that produced any."""
+
+    def __init__(self, consumer: Optional[Callable[[str], None]]):
+        self.consumer = consumer
+        self.leader: Optional["_Attempt"] = None
+        self._lock = threading.Lock()
+
+    def forward(self, attempt: "_Attempt", text: str) -> None:
+        with self._lock:
+            if self.leader is None:
+                self.leader = attempt
+        if self.leader is attempt and self.consumer:
+            self.consumer(text)
+
+    def release(self, attempt: "_Attempt") -> None:
+        """Let another attempt lead once the current leader has failed."""
+        with self._lock:
+            if self.leader is attempt:
+                self.leader = None
+
+
+class _Attempt:
+    """A provider call running on a daemon thread.
+
+    Provider SDK calls cannot be interrupted, so a call that times out or
+    loses a hedge is abandoned: its result is discarded and, if it is
+    streaming, the stream is stopped at its next chunk.
+    """
+
+    def __init__(self, provider: SummaryProvider, call: Callable[..., str], relay: _TokenRelay):
+        self.provider = provider
+        self.future: Future = Future()
+        self.started = time.monotonic()
+        self._cancelled = threading.Event()
+        self._call = call
+        self._relay = relay
+        threading.Thread(target=self._run, name=f"provider-{provider.name}", daemon=True).start()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _on_token(self, text: str) -> None:
+        if self._cancelled.is_set():
+            raise _AttemptCancelled()
+        self._relay.forward(self, text)
+
+    def _run(self) -> None:
+        try:
+            self.future.set_result(self._call(self.provider, self._on_token))
+        except BaseException as e:
+            self.future.set_exception(e)
+
+
+class ProviderRouter:
+    """Summary provider that routes calls over an ordered list of providers.
+
+    Providers are tried in order. One that fails or does not answer within
+    ``timeout`` seconds is abandoned for the next. With hedging enabled, the
+    next provider is also started once the current one has taken longer than
+    its p95 latency, and whichever answers first wins.
+    """
+
+    def __init__(
+        self,
+        providers: List[SummaryProvider],
+        timeout: float = 300.0,
+        hedge: bool = False,
+        hedge_after: float = 30.0
+    ):
+        """Initialize the router.
+
+        Args:
+            providers: Providers in order of preference
+            timeout: Seconds to wait for a provider before failing over
+            hedge: Whether to start the next provider while one is slow
+            hedge_after: Seconds before hedging until a provider has enough
+                latency samples for its p95
+        """
+        if not providers:
+            raise ValueError("ProviderRouter needs at least one provider")
+        self.providers = providers
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.name = " -> ".join(provider.name for provider in providers)
+        self.model_name = ",".join(provider.model_name for provider in providers)
+        self.stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+        self._lock = threading.Lock()
+        self._answered = threading.local()
+
+    def summarize(self, thread: SlackThread, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Generate a summary with the first provider that answers."""
+        return self._route(lambda provider, attempt_on_token: provider.summarize(thread, on_token=attempt_on_token), on_token)
+
+    def summarize_delta(
+        self,
+        opener: Optional[SlackMessage],
+        replies: List[SlackMessage],
+        existing_article: str,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Generate a section for new replies with the first provider that answers."""
+        return self._route(
+            lambda provider, attempt_on_token: provider.summarize_delta(
+                opener, replies, existing_article, on_token=attempt_on_token
+            ),
+            on_token
+        )
+
+    def answered_by(self) -> Optional[SummaryProvider]:
+        """The provider that answered the last call routed on the current thread.
+
+        Concurrent callers each see their own, so the answer can be tied to
+        the provider and model that produced it, e.g. in the summary cache.
+        """
+        return getattr(self._answered, "provider", None)
+
+    def hedge_delay(self, provider: SummaryProvider) -> float:
+        """Seconds to wait on a provider before hedging with the next one."""
+        stats = self.stats[provider.name]
+        if len(stats.latencies) >= MIN_HEDGE_SAMPLES:
+            return min(stats.p95(), self.timeout)
+        return min(self.hedge_after, self.timeout)
+
+    def log_stats(self) -> None:
+        """Log latency and error counts per provider."""
+        for name, stats in self.stats.items():
+            p95 = stats.p95()
+            logger.info(
+                f"Provider {name}: {stats.calls} calls, {stats.wins} answered, {stats.errors} errors, "
+                f"{stats.timeouts} timeouts, {stats.abandoned} abandoned after a hedge, p95 latency {f'{p95:.2f}s' if p95 is not None else 'n/a'}"
+            )
+
+    def _route(self, call: Callable[[SummaryProvider, Callable[[str], None]], str], on_token: Optional[Callable[[str], None]]) -> str:
+        """Run call over the providers until one of them answers."""
+        relay = _TokenRelay(on_token)
+        self._answered.provider = None
+        queue = list(self.providers)
+        running: List[_Attempt] = []
+        last_error: Optional[BaseException] = None
+
+        try:
+            while queue or running:
+                if not running:
+                    running.append(self._start(queue.pop(0), call, relay))
+
+                # Wait until an attempt times out or, when hedging, the newest one is slow
+                deadline = min(attempt.started for attempt in running) + self.timeout
+                hedge_at = None
+                if self.hedge and queue:
+                    newest = running[-1]
+                    hedge_at = newest.started + self.hedge_delay(newest.provider)
+                    deadline = min(deadline, hedge_at)
+                done, _ = wait(
+                    [attempt.future for attempt in running],
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED
+                )
+
+                for attempt in [attempt for attempt in running if attempt.future in done]:
+                    running.remove(attempt)
+                    error = attempt.future.exception()
+                    if error is None:
+                        self._record(attempt)
+                        self._answered.provider = attempt.provider
+                        for loser in running:
+                            logger.info(f"{attempt.provider.name} answered first, abandoning {loser.provider.name}")
+                            loser.cancel()
+                            self._record(loser, abandoned=True)
+                        return attempt.future.result()
+                    self._record(attempt, error)
+                    relay.release(attempt)
+                    last_error = error
+                    logger.warning(f"{attempt.provider.name} failed: {error}")
+
+                now = time.monotonic()
+                for attempt in [attempt for attempt in running if now - attempt.started >= self.timeout]:
+                    running.remove(attempt)
+                    attempt.cancel()
+                    relay.release(attempt)
+                    last_error = ProviderTimeoutError(f"{attempt.provider.name} did not answer within {self.timeout:g}s")
+                    self._record(attempt, last_error)
+                    logger.warning(f"{last_error}, failing over")
+
+                if running and queue and hedge_at is not None and now >= hedge_at:
+                    logger.info(f"{running[-1].provider.name} is slow, hedging with {queue[0].name}")
+                    running.append(self._start(queue.pop(0), call, relay))
+        finally:
+            self.log_stats()
+
+        raise last_error
+
+    def _start(self, provider: SummaryProvider, call: Callable[..., str], relay: _TokenRelay) -> _Attempt:
+        """Start a provider call in the background."""
+        logger.info(f"Generating summary with {provider.name}")
+        return _Attempt(provider, call, relay)
+
+    def _record(self, attempt: _Attempt, error: Optional[BaseException] = None, abandoned: bool = False) -> None:
+        """Record the outcome of an attempt in its provider's stats."""
+        elapsed = time.monotonic() - attempt.started
+        with self._lock:
+            stats = self.stats[attempt.provider.name]
+            stats.calls += 1
+            if abandoned:
+                stats.abandoned += 1
+            elif error is None:
+                stats.wins += 1
+                stats.latencies.append(elapsed)
+            elif isinstance(error, ProviderTimeoutError):
+                stats.timeouts += 1
+            else:
+                stats.errors += 1
@@ -2,26 +2,45 @@
 
 import json
 import logging
-from typing import List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
 from urllib.request import Request, urlopen
 from urllib.error import URLError
 
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
+from .. import metrics
 from ..config import SlackConfig
+from ..metadata_store import MetadataStore
 from ..models import SlackMessage, SlackThread
+from ..rate_limit import get_limiter
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class IncompleteThreadError(Exception):
+    """Raised when a thread's replies stop being available part way through pagination."""
+
+
+# Workspace and channel metadata rarely change, so by default it is cached in
+# a store shared by every SlackService in the process
+_default_metadata_store = MetadataStore()
+
 
 class SlackService:
     """Service for interacting with Slack API."""
 
-    def __init__(self, config: SlackConfig):
+    def __init__(self, config: SlackConfig, metadata_store: Optional[MetadataStore] = None):
         """Initialize Slack service with configuration."""
         self.config = config
         self.client = WebClient(token=config.bot_token)
+        self.metadata_store = metadata_store or _default_metadata_store
+        # Shared by every SlackService in the process so parallel jobs stay within one budget
+        self.limiter = get_limiter("Slack", config.rate_limit, max_retries=config.max_retries)
 
     def update_ephemeral_message(self, response_url: str, text: str, message_link: Optional[str] = None) -> None:
         """Update an ephemeral message using the response URL.
@@ -48,91 +67,233 @@ class SlackService:
         )
 
         try:
-            with urlopen(req) as response:
-                logger.debug(f"Updated ephemeral message: {response.status}")
+            metrics.count("slack.bytes_sent", len(req.data))
+            status = self.limiter.call(self._post, req, operation="update_ephemeral_message")
+            logger.debug(f"Updated ephemeral message: {status}")
         except URLError as e:
             logger.error(f"Failed to update ephemeral message: {e}")
 
-    def fetch_thread(self, channel_id: str, thread_ts: str) -> SlackThread:
+    @staticmethod
+    def _post(req: Request) -> int:
+        """Send a request and return its HTTP status."""
+        with urlopen(req) as response:
+            return response.status
+
+    def fetch_thread(self, channel_id: str, thread_ts: str, oldest: Optional[str] = None) -> SlackThread:
         """Fetch a thread from Slack.
 
+        The channel join, workspace lookup, channel lookup and replies fetch
+        are independent, so they are issued concurrently.
+
         Args:
             channel_id: The channel ID
             thread_ts: The thread timestamp
+            oldest: Only fetch replies newer than this timestamp
 
         Returns:
-            SlackThread containing all messages
+            SlackThread containing all messages, or the parent message and the
+            replies newer than oldest
+
+        Raises:
+            IncompleteThreadError: If the replies could only be fetched in part
         """
         logger.debug(f"Fetching thread {thread_ts} from channel {channel_id}")
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            join_future = executor.submit(self._timed, self._join_channel, channel_id)
+            workspace_future = executor.submit(self._timed, self._get_workspace_id)
+            channel_future = executor.submit(self._timed, self._get_channel_name, channel_id)
+            messages_future = executor.submit(self._timed, self._fetch_messages, channel_id, thread_ts, oldest)
+
+            joined, join_elapsed = join_future.result()
+            workspace_id, workspace_elapsed = workspace_future.result()
+            channel_name, channel_elapsed = channel_future.result()
+            messages, messages_elapsed = messages_future.result()
+
+        # The replies request may have raced ahead of the join on a channel
+        # the bot was not a member of yet, so retry it once now that we are in
+        if not messages and joined:
+            messages, retry_elapsed = self._timed(self._fetch_messages, channel_id, thread_ts, oldest)
+            messages_elapsed += retry_elapsed
 
-        # Try to join the channel if it's public
+        elapsed = time.monotonic() - started
+        sequential = join_elapsed + workspace_elapsed + channel_elapsed + messages_elapsed
+        logger.info(
+            f"Fetched thread with {len(messages)} messages in {elapsed:.2f}s "
+            f"(sequential calls would take {sequential:.2f}s)"
+        )
+
+        return SlackThread(
+            channel_id=channel_id,
+            channel_name=channel_name,
+            thread_ts=thread_ts,
+            messages=messages,
+            workspace_id=workspace_id
+        )
+
+    def _join_channel(self, channel_id: str) -> bool:
+        """Try to join the channel if it's public.
+
+        Returns:
+            True if the bot joined the channel during this call
+        """
         try:
-            join_response = self.client.conversations_join(channel=channel_id)
-            if join_response["ok"]:
+            join_response = self.limiter.call(self.client.conversations_join, channel=channel_id)
+            if join_response["ok"] and join_response.get("warning") != "already_in_channel":
                 logger.debug(f"Joined channel {channel_id}")
+                return True
         except SlackApiError as e:
             if e.response["error"] != "already_in_channel":
                 logger.debug(f"Could not join channel {channel_id}: {e.response['error']}")
+        return False
+
+    def _get_workspace_id(self) -> Optional[str]:
+        """Get the workspace/team ID, cached across invocations."""
+        cached = self.metadata_store.get_workspace_id()
+        if cached is not None:
+            return cached
 
-        # Get workspace/team info
-        workspace_id = None
         try:
-            team_info = self.client.team_info()
+            team_info = self.limiter.call(self.client.team_info)
             workspace_id = team_info["team"]["id"]
         except Exception as e:
             logger.debug(f"Could not get team info: {e}")
+            return None
+
+        self.metadata_store.set_workspace_id(workspace_id)
+        return workspace_id
+
+    def _get_channel_name(self, channel_id: str) -> str:
+        """Get the channel name, cached across invocations."""
+        cached = self.metadata_store.get_channel_name(channel_id)
+        if cached is not None:
+            return cached
 
-        # Get channel info
-        channel_name = channel_id
         try:
-            channel_info = self.client.conversations_info(channel=channel_id)
+            channel_info = self.limiter.call(self.client.conversations_info, channel=channel_id)
             if channel_info["ok"]:
                 channel_name = channel_info["channel"]["name"]
+                self.metadata_store.set_channel_name(channel_id, channel_name)
+                return channel_name
         except SlackApiError as e:
             logger.warning(f"Failed to get channel info: {e.response['error']}")
+        return channel_id
 
-        # Get thread messages
-        try:
-            replies_response = self.client.conversations_replies(
-                channel=channel_id,
-                ts=thread_ts
-            )
-
-            if not replies_response["ok"]:
-                logger.error(f"Failed to fetch thread: {replies_response.get('error', 'unknown error')}")
-                return SlackThread(
-                    channel_id=channel_id,
-                    channel_name=channel_name,
-                    thread_ts=thread_ts,
-                    messages=[],
-                    workspace_id=workspace_id
+    def _fetch_messages(self, channel_id: str, thread_ts: str, oldest: Optional[str] = None) -> List[SlackMessage]:
+        """Fetch all thread messages, following pagination cursors.
+
+        The summary prompt needs the whole thread, so the pages are collected
+        before anything downstream runs.
+        """
+        messages = []
+        for batch in self.iter_thread_messages(channel_id, thread_ts, oldest=oldest):
+            messages.extend(batch)
+        logger.debug(f"Fetched {len(messages)} messages from thread")
+        return messages
+
+    @staticmethod
+    def _timed(func: Callable[..., T], *args) -> Tuple[T, float]:
+        """Call func and return its result with the elapsed wall-clock time."""
+        started = time.monotonic()
+        result = func(*args)
+        return result, time.monotonic() - started
+
+    def iter_thread_messages(
+        self,
+        channel_id: str,
+        thread_ts: str,
+        page_size: Optional[int] = None,
+        max_messages: Optional[int] = None,
+        oldest: Optional[str] = None
+    ) -> Iterator[List[SlackMessage]]:
+        """Yield thread messages page by page.
+
+        Follows ``response_metadata.next_cursor`` so long threads are not
+        truncated. A thread that cannot be fetched at all yields nothing, but
+        one that fails after its first page raises instead of passing on a
+        silently truncated thread.
+
+        Args:
+            channel_id: The channel ID
+            thread_ts: The thread timestamp
+            page_size: Messages requested per page (defaults to config)
+            max_messages: Cap on total messages yielded (defaults to config)
+            oldest: Only fetch replies newer than this timestamp
+
+        Yields:
+            Lists of SlackMessage, one per page
+
+        Raises:
+            IncompleteThreadError: If a page after the first could not be fetched
+        """
+        page_size = page_size or self.config.page_size
+        max_messages = max_messages or self.config.max_messages
+
+        # Slack still returns the parent message first, which gives the new
+        # replies their context
+        extra_args = {"oldest": oldest} if oldest else {}
+        cursor = None
+        fetched = 0
+        pages = 0
+        while True:
+            remaining = max_messages - fetched
+            try:
+                replies_response = self.limiter.call(
+                    self.client.conversations_replies,
+                    channel=channel_id,
+                    ts=thread_ts,
+                    limit=min(page_size, remaining),
+                    cursor=cursor,
+                    **extra_args
                 )
+            except SlackApiError as e:
+                error = e.response["error"]
+            else:
+                error = None if replies_response["ok"] else replies_response.get("error", "unknown error")
 
-            messages = []
-            for message in replies_response["messages"]:
-                messages.append(SlackMessage(
-                    user=message.get("user", "unknown"),
-                    username="",  # Not needed for knowledge base
-                    text=message.get("text", ""),
-                    timestamp=message["ts"]
-                ))
-
-            logger.debug(f"Fetched {len(messages)} messages from thread")
-
-            return SlackThread(
-                channel_id=channel_id,
-                channel_name=channel_name,
-                thread_ts=thread_ts,
-                messages=messages,
-                workspace_id=workspace_id
-            )
+            if error:
+                if pages:
+                    raise IncompleteThreadError(
+                        f"Failed to fetch thread {thread_ts} after {fetched} messages: {error}"
+                    )
+                logger.error(f"Failed to fetch thread: {error}")
+                return
+            pages += 1
 
-        except SlackApiError as e:
-            logger.error(f"Failed to fetch thread: {e.response['error']}")
-            return SlackThread(
-                channel_id=channel_id,
-                channel_name=channel_name,
-                thread_ts=thread_ts,
-                messages=[],
-                workspace_id=workspace_id
-            )
+            # Slack repeats the parent message at the top of every page
+            raw_messages = [
+                message for message in replies_response["messages"]
+                if fetched == 0 or message["ts"] != thread_ts
+            ]
+            batch = [self._to_slack_message(message) for message in raw_messages[:remaining]]
+            fetched += len(batch)
+            if batch:
+                yield batch
+
+            cursor = (replies_response.get("response_metadata") or {}).get("next_cursor")
+            if fetched >= max_messages and (cursor or len(raw_messages) > len(batch)):
+                logger.warning(f"Thread {thread_ts} exceeds {max_messages} messages, remaining replies were skipped")
+                return
+            if not cursor:
+                return
+
+    def _to_slack_message(self, message: dict) -> SlackMessage:
+        """Convert a raw Slack API message to a SlackMessage."""
+        user = message.get("user", "unknown")
+
+        # Messages carry the author's profile, so display names are learned
+        # for free instead of with a users_info call per author
+        profile = message.get("user_profile") or {}
+        display_name = profile.get("display_name") or profile.get("real_name")
+        if display_name:
+            self.metadata_store.set_user_name(user, display_name)
+        else:
+            display_name = self.metadata_store.get_user_name(user) or ""
+
+        return SlackMessage(
+            user=user,
+            username=display_name,
+            text=message.get("text", ""),
+            timestamp=message["ts"]
+        )
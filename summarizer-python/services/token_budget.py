@@ -0,0 +1,159 @@
+"""Prompt-size budgeting for long Slack threads."""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List
+
+from ..models import SlackMessage
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9_\-]{3,}")
+_LINK_RE = re.compile(r"<?https?://\S+")
+_CODE_FENCE = "```"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in text without a tokenizer.
+
+    Counts words and punctuation, and falls back to roughly four characters
+    per token for dense text such as URLs and code. Both approximations
+    overshoot real BPE tokenizers slightly, which is the safe direction for
+    a budget.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_RE.findall(text)), math.ceil(len(text) / 4))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "") -> str:
+    """Cut text down to its leading lines that fit within max_tokens.
+
+    Args:
+        text: Text to shorten, e.g. an article passed as context
+        max_tokens: Maximum estimated tokens of the result
+        marker: Line appended when text is cut, counted within max_tokens
+
+    Returns:
+        text unchanged if it fits, otherwise its leading lines, the part of
+        the next line that fits, and marker
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Estimating line by line, plus one for each newline, never undercounts the whole
+    remaining = max_tokens - (estimate_tokens(marker) + 1 if marker else 0)
+    lines = []
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if cost > remaining:
+            # Longest prefix of the line that still fits
+            low, high = 0, len(line)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate_tokens(line[:middle]) + 1 <= remaining:
+                    low = middle
+                else:
+                    high = middle - 1
+            if low:
+                lines.append(line[:low])
+            break
+        lines.append(line)
+        remaining -= cost
+    if marker:
+        lines.append(marker)
+    return "\n".join(lines)
+
+
+def information_score(text: str) -> float:
+    """Score how much reusable technical content a message carries.
+
+    Distinct longer words dominate the score, with bonuses for code blocks
+    and links. Short acknowledgments such as "thanks!" score close to zero.
+    """
+    words = {word.lower() for word in _WORD_RE.findall(text)}
+    score = float(len(words))
+    score += 10 * (text.count(_CODE_FENCE) // 2)
+    score += 3 * len(_LINK_RE.findall(text))
+    return score
+
+
+@dataclass
+class BudgetResult:
+    """Messages selected to fit a token budget."""
+    messages: List[SlackMessage]
+    dropped: List[SlackMessage] = field(default_factory=list)
+    tokens: int = 0
+    dropped_tokens: int = 0
+
+
+class TokenBudget:
+    """Selects the messages of a thread that fit within a token budget.
+
+    The thread opener is always kept. The remaining budget goes to the
+    replies with the most information per token, and the kept messages are
+    returned in their original order.
+    """
+
+    # Separator tokens between messages in the prompt
+    SEPARATOR_TOKENS = 1
+
+    def __init__(self, max_tokens: int):
+        """Initialize the budget.
+
+        Args:
+            max_tokens: Maximum estimated tokens for the thread content
+        """
+        self.max_tokens = max_tokens
+
+    def fits(self, messages: List[SlackMessage]) -> bool:
+        """Whether all messages fit within the budget."""
+        return sum(estimate_tokens(message.text) + self.SEPARATOR_TOKENS for message in messages) <= self.max_tokens
+
+    def fit(self, messages: List[SlackMessage]) -> BudgetResult:
+        """Select messages that fit within the budget.
+
+        Args:
+            messages: Thread messages in chronological order
+
+        Returns:
+            BudgetResult with the kept and dropped messages
+        """
+        costs = [estimate_tokens(message.text) + self.SEPARATOR_TOKENS for message in messages]
+        total = sum(costs)
+        if total <= self.max_tokens or not messages:
+            return BudgetResult(messages=list(messages), tokens=total)
+
+        # The opener frames the whole thread, so it is kept even if it has to
+        # be cut down to fit on its own
+        opener = messages[0]
+        if costs[0] > self.max_tokens:
+            opener = SlackMessage(
+                user=opener.user,
+                username=opener.username,
+                text=truncate_to_tokens(opener.text, self.max_tokens - self.SEPARATOR_TOKENS),
+                timestamp=opener.timestamp
+            )
+            costs[0] = self.max_tokens
+
+        remaining = self.max_tokens - costs[0]
+        ranked = sorted(
+            range(1, len(messages)),
+            key=lambda i: information_score(messages[i].text) / costs[i],
+            reverse=True
+        )
+
+        kept = {0}
+        for i in ranked:
+            if costs[i] <= remaining:
+                kept.add(i)
+                remaining -= costs[i]
+
+        selected = [opener] + [messages[i] for i in range(1, len(messages)) if i in kept]
+        dropped = [messages[i] for i in range(1, len(messages)) if i not in kept]
+        tokens = self.max_tokens - remaining
+        return BudgetResult(
+            messages=selected,
+            dropped=dropped,
+            tokens=tokens,
+            dropped_tokens=total - sum(costs[i] for i in kept)
+        )
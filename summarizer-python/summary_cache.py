@@ -0,0 +1,175 @@
+"""Content-addressed cache of generated summaries."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .models import SlackMessage
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a message for hashing so whitespace-only edits still hit."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def summary_cache_key(messages: List[SlackMessage], provider: str, model: str, prompt_version: str) -> str:
+    """Build the cache key of a summary.
+
+    The key hashes everything the generated article depends on: the
+    normalized message texts, the provider, the model and the prompt version.
+    """
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "prompt_version": prompt_version,
+        "messages": [normalize_text(message.text) for message in messages]
+    }, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """LRU summary cache backed by SQLite, bounded by total size in bytes.
+
+    The database lives in the cache directory so it can be restored from and
+    saved to the GitHub Actions cache around a run. Without a path it acts as
+    a process-local cache. Hit and miss counts are persisted alongside the
+    entries so the hit ratio covers all runs sharing the cache.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 50 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            path: SQLite file to persist entries to, or None for in-memory only
+            max_bytes: Total size of stored summaries above which the least
+                recently used ones are evicted
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        """Open the database, creating its schema if needed."""
+        try:
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY, summary TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at);"
+                "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open summary cache {self.path}: {e}")
+            return
+        self._conn = conn
+        logger.debug(f"Opened summary cache {self.path or ':memory:'}")
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.commit()
+                self._conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not close summary cache {self.path}: {e}")
+            self._conn = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached summary for key, counting a hit or a miss."""
+        return self.get_first([key])
+
+    def get_first(self, keys: List[str]) -> Optional[str]:
+        """Return the cached summary of the first key that has one, counting one hit or miss for all."""
+        with self._lock:
+            if self._conn is None or not keys:
+                return None
+            try:
+                rows = dict(self._conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({', '.join('?' * len(keys))})", keys
+                ).fetchall())
+                key = next((key for key in keys if key in rows), None)
+                if key is not None:
+                    self._conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._increment("hits" if key is not None else "misses")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Summary cache lookup failed: {e}")
+                return None
+        return rows[key] if key is not None else None
+
+    def put(self, key: str, summary: str) -> None:
+        """Store a summary and evict the least recently used ones over max_bytes."""
+        size = len(summary.encode("utf-8"))
+        if size > self.max_bytes:
+            logger.debug(f"Summary of {size} bytes exceeds the cache size, not caching it")
+            return
+
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries (key, summary, size, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, summary, size, now, now)
+                )
+                self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not store summary in cache: {e}")
+
+    def hit_ratio(self) -> Optional[float]:
+        """Fraction of lookups that hit, or None before the first lookup."""
+        hits, misses = self.stats()
+        total = hits + misses
+        return hits / total if total else None
+
+    def stats(self) -> Tuple[int, int]:
+        """Return the (hits, misses) counts recorded in the cache."""
+        with self._lock:
+            if self._conn is None:
+                return 0, 0
+            counts = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+        return counts.get("hits", 0), counts.get("misses", 0)
+
+    def _increment(self, name: str) -> None:
+        """Increment a persisted counter. Callers hold the lock."""
+        self._conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,)
+        )
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits. Callers hold the lock."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM summaries ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} summaries from the cache")
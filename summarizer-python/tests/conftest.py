@@ -0,0 +1,14 @@
+"""Shared test setup.
+
+The package directory is named summarizer-python, which is not a valid
+module name, so pytest cannot import the tests as part of the package. The
+tests import it under the alias ``summarizer`` instead; its modules use
+relative imports, so they all load under the alias.
+"""
+
+import importlib
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.modules.setdefault("summarizer", importlib.import_module("summarizer-python"))
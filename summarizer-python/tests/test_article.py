@@ -0,0 +1,128 @@
+"""The article document model, checked against the regex-based merge it replaced."""
+
+import random
+import re
+
+import pytest
+
+from summarizer.benchmarks.merge import legacy_merge_articles, synthetic_summary
+from summarizer.services.article import MAX_KEYWORDS, ArticleDocument, merge_articles
+
+PARITY_CASES = 1000
+
+_DOUBLE_LINK_RE = re.compile(r"\[Slack Thread\]\(\[Slack Thread\]\((.*)\)\)")
+
+_WORDS = "redis cluster failover replica sentinel kubernetes pod memory latency postgres vacuum index".split()
+
+FIXTURES = [
+    # Article with the single source it was created with
+    (
+        "# Redis Failover\n\n**Keywords:** redis, sentinel\n\n## Overview\n\nSentinel promotes a replica.\n\n---\n\n"
+        "**Source:** [Slack Thread](https://ws.slack.com/archives/C1/p1)",
+        "# Redis Sentinel\n\n**Keywords:** sentinel, quorum\n\n## Quorum\n\nUse an odd number of sentinels.",
+    ),
+    # Article extended before, with a source list
+    (
+        "# Redis Failover\n\n**Keywords:** redis, sentinel, quorum\n\nBody.\n\n## Additional Context\n\nMore.\n\n---\n\n"
+        "**Sources:**\n- [Slack Thread](https://ws.slack.com/archives/C1/p1)\n- [Slack Thread](https://ws.slack.com/archives/C1/p2)",
+        "# Redis\n\n**Keywords:** redis, timeouts\n\nTune down-after-milliseconds.",
+    ),
+    # Neither keywords nor sources
+    ("# Terraform State\n\nUse remote state with locking.", "## Locking\n\nA DynamoDB table holds the locks."),
+    # No title and a bare source link
+    ("Plain notes without a heading.\n\n---\n**Source:** https://example.com", "# Notes\n\n**Keywords:** notes\n\nMore notes."),
+    # Title only, and a summary without content
+    ("# Title", "# Only a title\n\n**Keywords:** a, b"),
+    # Horizontal rules that do not start the sources section
+    ("# Rules\n\nAbove\n\n---\n\nBelow\n\n---\n\n**Source:** [Slack Thread](x)", "# Rules\n\nText"),
+]
+
+
+def random_article(rng: random.Random) -> str:
+    """Write an article with a random mix of title, keywords, sections and sources."""
+    parts = []
+    if rng.random() < 0.9:
+        parts.append(f"{'#' * rng.randint(1, 2)} {' '.join(rng.sample(_WORDS, 3))}")
+    if rng.random() < 0.8:
+        parts.append(f"**Keywords:** {', '.join(rng.sample(_WORDS, rng.randint(1, 6)))}")
+    for _ in range(rng.randint(0, 5)):
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, 30)))
+        parts.append(rng.choice([f"## {rng.choice(_WORDS)}\n\n{words}", f"{words}\n\n---", words]))
+    text = "\n\n".join(parts)
+
+    # Links are unique; the legacy merge kept duplicates that the document model drops
+    links = [f"https://ws.slack.com/archives/C1/p{rng.randrange(10 ** 9)}" for _ in range(rng.randint(0, 4))]
+    if len(links) == 1:
+        text += f"\n\n---\n\n**Source:** {rng.choice([links[0], f'[Slack Thread]({links[0]})'])}"
+    elif links:
+        text += "\n\n---\n\n**Sources:**\n" + "\n".join(f"- [Slack Thread]({link})" for link in links)
+    return text
+
+
+def legacy_merge(existing: str, summary: str, link: str) -> str:
+    """The legacy merge's output, without its double link around a single source that was already a link."""
+    return _DOUBLE_LINK_RE.sub(r"[Slack Thread](\1)", legacy_merge_articles(existing, summary, link))
+
+
+@pytest.mark.parametrize("existing, summary", FIXTURES)
+def test_fixtures_match_the_legacy_merge(existing, summary):
+    link = "https://ws.slack.com/archives/C1/p99"
+
+    assert merge_articles(existing, summary, link) == legacy_merge(existing, summary, link)
+
+
+def test_random_articles_match_the_legacy_merge():
+    rng = random.Random(0)
+    for i in range(PARITY_CASES):
+        existing, summary = random_article(rng), synthetic_summary(i, rng)
+        link = f"https://ws.slack.com/archives/C2/p{i}"
+
+        assert merge_articles(existing, summary, link) == legacy_merge(existing, summary, link), existing
+
+
+def test_merging_a_source_twice_lists_it_once():
+    existing, summary = FIXTURES[0]
+    link = "https://ws.slack.com/archives/C1/p99"
+
+    merged = merge_articles(merge_articles(existing, summary, link), summary, link)
+
+    assert ArticleDocument.parse(merged).sources == [
+        "[Slack Thread](https://ws.slack.com/archives/C1/p1)",
+        f"[Slack Thread]({link})",
+    ]
+
+
+def test_a_single_source_link_is_not_wrapped_again():
+    existing = "# Title\n\nBody.\n\n---\n\n**Source:** [Slack Thread](https://ws.slack.com/archives/C1/p1)"
+
+    merged = merge_articles(existing, "# Title\n\nMore.", "https://ws.slack.com/archives/C1/p2")
+
+    assert "[Slack Thread]([Slack Thread]" not in merged
+    assert merged.endswith(
+        "**Sources:**\n- [Slack Thread](https://ws.slack.com/archives/C1/p1)\n"
+        "- [Slack Thread](https://ws.slack.com/archives/C1/p2)"
+    )
+
+
+def test_keywords_are_deduplicated_and_capped():
+    existing = f"# Title\n\n**Keywords:** {', '.join(_WORDS[:8])}\n\nBody."
+    summary = f"# Title\n\n**Keywords:** {', '.join(_WORDS[4:])}\n\nMore."
+
+    document = ArticleDocument.parse(merge_articles(existing, summary, "https://ws.slack.com/archives/C1/p2"))
+
+    assert document.keywords == _WORDS[:MAX_KEYWORDS]
+
+
+def test_repeated_merges_keep_every_summary_and_source():
+    rng = random.Random(1)
+    summaries = [synthetic_summary(i, rng) for i in range(30)]
+    article = summaries[0] + "\n\n---\n\n**Source:** [Slack Thread](https://ws.slack.com/archives/C1/p0)"
+    for i in range(1, 30):
+        article = merge_articles(article, summaries[i], f"https://ws.slack.com/archives/C1/p{i}")
+
+    document = ArticleDocument.parse(article)
+    assert document.title == "Topic 0"
+    assert document.sources == [f"[Slack Thread](https://ws.slack.com/archives/C1/p{i})" for i in range(30)]
+    assert [section.heading for section in document.sections].count("Additional Context") == 29
+    # The first section of each added summary is retitled, but its text is kept
+    assert all(summary.split("\n\n")[-2] in document.body for summary in summaries)
@@ -0,0 +1,79 @@
+"""Repo state shared by the jobs of a batch, against a fake GitHub service."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from summarizer.batch import BatchJob, PullRequestBatcher, resolve_batch_base
+
+JOBS = [BatchJob(channel_id="C1", message_ts=f"1700000000.00010{i}") for i in range(3)]
+
+
+class FakeGitHubService:
+    """Counts base resolutions and opens one pull request per summary."""
+
+    def __init__(self, previous: Optional[Dict[str, Dict[str, str]]] = None, fail: bool = False):
+        self.previous = previous or {}
+        self.fail = fail
+        self.resolved: List[List[str]] = []
+        self.opened_on: List[object] = []
+
+    def previous_summary(self, channel_id: str, thread_ts: str) -> Optional[Dict[str, str]]:
+        return self.previous.get(thread_ts)
+
+    def resolve_base(self, prefetch=()):
+        self.resolved.append(list(prefetch))
+        if self.fail:
+            raise RuntimeError("GitHub is down")
+        return SimpleNamespace(base_sha=f"sha-{len(self.resolved)}")
+
+    def create_pull_requests(self, summaries, base):
+        self.opened_on.append(base)
+        return [f"https://github.com/o/kb/pull/{i}" for i in range(len(summaries))]
+
+
+def config(incremental: bool = True):
+    return SimpleNamespace(ai=SimpleNamespace(incremental=incremental))
+
+
+def test_base_is_resolved_once_with_every_previous_article():
+    github = FakeGitHubService(previous={
+        JOBS[0].message_ts: {"file_path": "knowledge-base/a.md"},
+        JOBS[2].message_ts: {"file_path": "knowledge-base/a.md"},
+    })
+
+    base = asyncio.run(resolve_batch_base(config(), github, JOBS))
+
+    assert base.base_sha == "sha-1"
+    assert github.resolved == [["knowledge-base/a.md"]]
+
+
+def test_failed_batch_base_leaves_it_to_the_jobs():
+    github = FakeGitHubService(fail=True)
+
+    assert asyncio.run(resolve_batch_base(config(incremental=False), github, JOBS)) is None
+
+
+def test_batcher_opens_pull_requests_on_the_batch_base():
+    github = FakeGitHubService()
+    base = SimpleNamespace(base_sha="batch-sha")
+
+    async def run():
+        batcher = PullRequestBatcher(github, 3, base)
+        batcher.skip()
+        return await asyncio.gather(*(batcher.submit(SimpleNamespace(article=None)) for _ in range(2)))
+
+    assert asyncio.run(run()) == ["https://github.com/o/kb/pull/0", "https://github.com/o/kb/pull/1"]
+    assert github.resolved == []
+    assert github.opened_on == [base]
+
+
+def test_batcher_without_a_batch_base_resolves_one_when_flushing():
+    github = FakeGitHubService()
+
+    async def run():
+        batcher = PullRequestBatcher(github, 1)
+        return await batcher.submit(SimpleNamespace(article=SimpleNamespace(file_path="knowledge-base/a.md")))
+
+    assert asyncio.run(run()) == "https://github.com/o/kb/pull/0"
+    assert github.resolved == [["knowledge-base/a.md"]]
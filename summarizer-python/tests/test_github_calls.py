@@ -0,0 +1,201 @@
+"""GitHub API calls per pull request, counted against a fake GitHub."""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+from github import GithubException
+
+from summarizer.config import GitHubConfig
+from summarizer.metadata_store import MetadataStore
+from summarizer.rate_limit import RateLimiter
+from summarizer.services.github_service import GitHubService, PendingSummary, ThreadArticle
+
+EXISTING_PATH = "knowledge-base/redis-failover.md"
+EXISTING_ARTICLE = (
+    "# Redis Failover\n\n**Keywords:** redis\n\nSentinel promotes a replica.\n\n---\n\n"
+    "**Source:** [Slack Thread](https://ws.slack.com/archives/C1/p1700000000000100)"
+)
+
+
+class FakeRepo:
+    """Records every REST call PyGithub would send for the knowledge base repo."""
+
+    def __init__(self, files: Dict[str, str]):
+        self.files = files
+        self.default_branch = "main"
+        self.calls: List[str] = []
+        # Errors create_pull raises, one per call, before it succeeds
+        self.pull_errors: List[Exception] = []
+
+    def get_branch(self, branch: str):
+        self.calls.append("get_branch")
+        # The branch's commit carries the git commit, and with it the tree
+        return SimpleNamespace(commit=SimpleNamespace(sha="base-sha", commit=SimpleNamespace(tree="base-tree")))
+
+    def get_contents(self, path: str, ref: Optional[str] = None):
+        self.calls.append("get_contents")
+        if path == "knowledge-base":
+            return [SimpleNamespace(name=name.rpartition("/")[2], path=name) for name in self.files]
+        return SimpleNamespace(decoded_content=self.files[path].encode("utf-8"))
+
+    def create_git_tree(self, elements, base_tree=None):
+        self.calls.append("create_git_tree")
+        return SimpleNamespace(sha="tree-sha")
+
+    def create_git_commit(self, message, tree, parents):
+        self.calls.append("create_git_commit")
+        return SimpleNamespace(sha="commit-sha")
+
+    def create_git_ref(self, ref: str, sha: str):
+        self.calls.append("create_git_ref")
+
+    def create_pull(self, title: str, body: str, head: str, base: str):
+        self.calls.append("create_pull")
+        if self.pull_errors:
+            raise self.pull_errors.pop(0)
+        return SimpleNamespace(html_url="https://github.com/o/kb/pull/1")
+
+
+class FakeGithub:
+    """Hands out the fake repo; only a non-lazy get_repo is a request."""
+
+    def __init__(self, repo: FakeRepo):
+        self.repo = repo
+
+    def get_repo(self, full_name: str, lazy: bool = False):
+        if not lazy:
+            self.repo.calls.append("get_repo")
+        return self.repo
+
+
+class FakeGraphQL:
+    """Answers the GraphQL client's documents and records which operation each one was."""
+
+    def __init__(self, files: Dict[str, str]):
+        self.files = files
+        self.calls: List[str] = []
+
+    def post(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        if "createCommitOnBranch" in query:
+            self.calls.append("commit")
+            return {"createRef": {"ref": {"id": "ref-id", "name": "branch"}}, "createCommitOnBranch": {"commit": {"oid": "commit-sha"}}}
+        if "createPullRequest" in query:
+            self.calls.append("create_pull_request")
+            return {"createPullRequest": {"pullRequest": {"url": "https://github.com/o/kb/pull/1"}}}
+        if "defaultBranchRef" in query:
+            self.calls.append("resolve")
+            repository = {
+                "id": "repo-id",
+                "defaultBranchRef": {"name": "main", "target": {"oid": "base-sha"}},
+                "directory": {"entries": [
+                    {"name": path.rpartition("/")[2], "path": path, "type": "blob"} for path in self.files
+                ]},
+            }
+            for name, expression in variables.items():
+                if name.startswith("file"):
+                    repository[name] = {"text": self.files.get(expression.partition(":")[2])}
+            return {"repository": repository}
+        self.calls.append("read_file")
+        return {"repository": {"object": {"text": self.files.get(variables["expression"].partition(":")[2])}}}
+
+
+def make_service(use_graphql: bool = False, cached_branch: bool = True):
+    files = {EXISTING_PATH: EXISTING_ARTICLE}
+    store = MetadataStore()
+    if cached_branch:
+        store.set_default_branch("o/kb", "main")
+    service = GitHubService(GitHubConfig(token="t", repo_owner="o", repo_name="kb", use_graphql=use_graphql), store)
+    service.limiter = RateLimiter("GitHub test", rate=1000, max_retries=0)
+    repo = FakeRepo(files)
+    service.github = FakeGithub(repo)
+    fake = None
+    if use_graphql:
+        fake = FakeGraphQL(files)
+        service.graphql.limiter = service.limiter
+        service.graphql._post = fake.post
+    return service, repo, fake
+
+
+def pending(summary: str, article: Optional[ThreadArticle] = None) -> PendingSummary:
+    return PendingSummary(
+        summary=summary,
+        channel_id="C1",
+        channel_name="general",
+        timestamp="1700000000.000100",
+        workspace_id=None,
+        workspace_name="ws",
+        last_message_ts="1700000000.000300",
+        article=article
+    )
+
+
+NEW_SUMMARY = "# Terraform State Locking\n\n**Keywords:** terraform\n\nUse a DynamoDB table."
+UPDATE_SUMMARY = "# Redis Failover\n\n**Keywords:** sentinel\n\nUse an odd number of sentinels."
+
+
+@pytest.mark.parametrize("summary, cached_branch, expected", [
+    # Branch, listing, tree, commit, ref and pull request
+    (NEW_SUMMARY, True, ["get_branch", "get_contents", "create_git_tree", "create_git_commit", "create_git_ref", "create_pull"]),
+    # Reading the article it extends adds one request
+    (UPDATE_SUMMARY, True, [
+        "get_branch", "get_contents", "get_contents", "create_git_tree", "create_git_commit", "create_git_ref", "create_pull"
+    ]),
+    # Without the default branch cached, the repo is looked up first
+    (NEW_SUMMARY, False, [
+        "get_repo", "get_branch", "get_contents", "create_git_tree", "create_git_commit", "create_git_ref", "create_pull"
+    ]),
+], ids=["new article", "update", "cold"])
+def test_rest_calls_per_pull_request(summary, cached_branch, expected):
+    service, repo, _ = make_service(cached_branch=cached_branch)
+
+    [result] = service.create_pull_requests([pending(summary)], service.resolve_base())
+
+    assert result == "https://github.com/o/kb/pull/1"
+    assert repo.calls == expected
+
+
+@pytest.mark.parametrize("summary, expected", [
+    # The listing comes with the base, and the branch with the commit
+    (NEW_SUMMARY, ["resolve", "commit", "create_pull_request"]),
+    # Reading the article it extends adds one request
+    (UPDATE_SUMMARY, ["resolve", "read_file", "commit", "create_pull_request"]),
+], ids=["new article", "update"])
+def test_graphql_calls_per_pull_request(summary, expected):
+    service, repo, graphql = make_service(use_graphql=True)
+
+    [result] = service.create_pull_requests([pending(summary)], service.resolve_base())
+
+    assert result == "https://github.com/o/kb/pull/1"
+    assert graphql.calls == expected
+    assert repo.calls == []
+
+
+def test_graphql_prefetches_the_threads_article():
+    service, repo, graphql = make_service(use_graphql=True)
+
+    base = service.resolve_base(prefetch=[EXISTING_PATH])
+    service.metadata_store.set_thread_state("C1", "1700000000.000100", "1700000000.000200", EXISTING_PATH)
+    article = service.load_thread_article("C1", "1700000000.000100", base)
+    service.create_pull_requests([pending("## New replies\n\nQuorum is two.", article)], base)
+
+    assert article is not None
+    assert graphql.calls == ["resolve", "commit", "create_pull_request"]
+    assert repo.calls == []
+
+
+@pytest.mark.parametrize("error, retried", [
+    # GitHub may have opened the pull request before failing, so it is not sent again
+    (GithubException(502, {"message": "Bad Gateway"}, {}), False),
+    # A throttled request was turned away unprocessed
+    (GithubException(429, {"message": "Too Many Requests"}, {"retry-after": "0"}), True),
+], ids=["server error", "throttled"])
+def test_create_pull_is_only_retried_when_throttled(error, retried):
+    service, repo, _ = make_service()
+    service.limiter = RateLimiter("GitHub test", rate=1000, max_retries=2, base_delay=0)
+    repo.pull_errors = [error]
+
+    [result] = service.create_pull_requests([pending(NEW_SUMMARY)], service.resolve_base())
+
+    assert repo.calls.count("create_pull") == (2 if retried else 1)
+    assert (result == "https://github.com/o/kb/pull/1") if retried else (result is error)
@@ -0,0 +1,33 @@
+"""Article parsing for the knowledge base index."""
+
+from summarizer.kb_index import parse_article, weighted_terms
+from summarizer.services.article import ArticleDocument, merge_articles
+
+ARTICLE = (
+    "# Redis Failover\n\n**Keywords:** redis, sentinel\n\n## Overview\n\nSentinel promotes a replica.\n\n---\n\n"
+    "**Sources:**\n- [Slack Thread](https://ws.slack.com/archives/C1/p1)\n- [Slack Thread](https://ws.slack.com/archives/C1/p2)"
+)
+
+
+def test_parts_match_the_article_document():
+    title, keywords, body = parse_article(ARTICLE)
+    document = ArticleDocument.parse(ARTICLE)
+
+    assert title == document.title == "Redis Failover"
+    assert keywords.split(", ") == document.keywords
+    assert body.strip() == "## Overview\n\nSentinel promotes a replica."
+
+
+def test_merged_article_keeps_sources_out_of_the_terms():
+    summary = "# Redis\n\n**Keywords:** quorum\n\nUse three sentinels."
+    merged = merge_articles(ARTICLE, summary, "https://ws.slack.com/archives/C1/p3")
+
+    terms = weighted_terms(merged)
+
+    assert "slack" not in terms
+    assert terms["quorum"] == 2.0
+    assert terms["failover"] == 3.0
+
+
+def test_article_without_title_or_keywords():
+    assert parse_article("Plain notes.\n\n---\n**Source:** https://example.com") == ("", "", "Plain notes.")
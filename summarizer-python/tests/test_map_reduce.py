@@ -0,0 +1,79 @@
+"""Prompt sizes in MapReduceSummarizer against a fake model."""
+
+from typing import List
+
+from summarizer.models import SlackMessage
+from summarizer.services.map_reduce import NOTES_TRUNCATED_MARKER, MapReduceSummarizer, chunk_messages
+from summarizer.services.token_budget import estimate_tokens
+
+MAX_TOKENS = 400
+
+
+def message(index: int, words: int) -> SlackMessage:
+    return SlackMessage(
+        user="U1",
+        username="alice",
+        text=" ".join(f"word{index}" for _ in range(words)),
+        timestamp=f"1700000000.{index:06d}"
+    )
+
+
+class FakeModel:
+    """Records prompts and answers each with a note of a fixed size."""
+
+    def __init__(self, note_words: int):
+        self.note_words = note_words
+        self.prompts: List[str] = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return "- " + " ".join("note" for _ in range(self.note_words))
+
+
+def summarize(messages: List[SlackMessage], note_words: int):
+    model = FakeModel(note_words)
+    final: List[str] = []
+
+    def reduce_generate(prompt: str) -> str:
+        final.append(prompt)
+        return "# Article"
+
+    summarizer = MapReduceSummarizer(
+        model.generate, lambda content: content, MAX_TOKENS, concurrency=2, reduce_generate=reduce_generate
+    )
+    assert summarizer.summarize(messages) == "# Article"
+    return model.prompts, final[0]
+
+
+def test_every_prompt_fits_the_budget():
+    prompts, final = summarize([message(i, 40) for i in range(40)], note_words=30)
+
+    assert len(prompts) > 10
+    assert all(estimate_tokens(prompt) <= MAX_TOKENS for prompt in prompts)
+    assert estimate_tokens(final) <= MAX_TOKENS
+
+
+def test_message_too_large_for_a_prompt_is_cut_down():
+    prompts, final = summarize([message(0, 5000)], note_words=10)
+
+    assert len(prompts) == 1
+    assert "word0" in prompts[0]
+    assert estimate_tokens(prompts[0]) <= MAX_TOKENS
+
+
+def test_notes_that_cannot_be_condensed_are_cut_down():
+    # Every note fills a prompt on its own, so no two can be condensed together
+    prompts, final = summarize([message(i, 300) for i in range(3)], note_words=1000)
+
+    assert len(prompts) == 3
+    assert estimate_tokens(final) <= MAX_TOKENS
+    assert final.endswith(NOTES_TRUNCATED_MARKER)
+
+
+def test_chunks_break_on_message_boundaries():
+    messages = [message(i, 10) for i in range(10)]
+
+    chunks = chunk_messages(messages, 35)
+
+    assert [message for chunk in chunks for message in chunk] == messages
+    assert all(sum(estimate_tokens(message.text) + 1 for message in chunk) <= 35 for chunk in chunks)
@@ -0,0 +1,52 @@
+"""Progress messages for streamed summaries."""
+
+from typing import List
+
+from summarizer.services.progress import StreamProgress
+
+SUMMARY = "# Redis Failover\n\n**Keywords:** redis\n\n## Overview\n\nSentinel promotes a replica."
+
+
+def stream(progress: StreamProgress, text: str, chunk: int = 8) -> None:
+    for start in range(0, len(text), chunk):
+        progress(text[start:start + chunk])
+
+
+def test_reports_the_summary_written_so_far():
+    messages: List[str] = []
+    progress = StreamProgress(messages.append, interval=0, preview_chars=500)
+
+    stream(progress, SUMMARY)
+
+    assert progress.text == SUMMARY
+    assert messages[-1] == (
+        f":writing_hand: Writing summary... {len(SUMMARY)} characters so far\n\n"
+        "> # Redis Failover\n> \n> **Keywords:** redis\n> \n> ## Overview\n> \n> Sentinel promotes a replica."
+    )
+
+
+def test_long_preview_keeps_the_last_whole_lines():
+    progress = StreamProgress(lambda message: None, interval=0, preview_chars=40)
+
+    stream(progress, SUMMARY)
+
+    assert progress.preview() == "> …\n> \n> Sentinel promotes a replica."
+
+
+def test_preview_can_be_turned_off():
+    messages: List[str] = []
+    progress = StreamProgress(messages.append, interval=0)
+
+    stream(progress, SUMMARY)
+
+    assert messages[-1] == f":writing_hand: Writing summary... {len(SUMMARY)} characters so far"
+
+
+def test_reports_at_most_once_per_interval():
+    messages: List[str] = []
+    progress = StreamProgress(messages.append, interval=60, preview_chars=500)
+
+    stream(progress, SUMMARY)
+
+    assert messages == []
+    assert progress.time_to_first_token is not None
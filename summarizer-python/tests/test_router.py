@@ -0,0 +1,109 @@
+"""Failover, timeouts and hedging in ProviderRouter against fake providers."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+import pytest
+
+from summarizer.models import SlackMessage, SlackThread
+from summarizer.services.router import ProviderRouter, ProviderTimeoutError
+
+THREAD = SlackThread(
+    channel_id="C1",
+    channel_name="general",
+    thread_ts="1700000000.000100",
+    messages=[SlackMessage(user="U1", username="alice", text="How do I rotate the keys?", timestamp="1700000000.000100")]
+)
+
+
+class FakeProvider:
+    """Answers after a delay, streaming its answer in two pieces, or raises."""
+
+    def __init__(self, name: str, delay: float = 0.0, error: Optional[Exception] = None):
+        self.name = name
+        self.model_name = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def summarize(self, thread: SlackThread, on_token: Optional[Callable[[str], None]] = None) -> str:
+        self.calls += 1
+        # Wait out the delay, unless the test lets the call finish early
+        self.release.wait(self.delay)
+        if self.error:
+            raise self.error
+        answer = f"# Answer from {self.name}"
+        if on_token:
+            on_token(answer[:8])
+            on_token(answer[8:])
+        return answer
+
+    def summarize_delta(self, opener, replies, existing_article, on_token=None) -> str:
+        return self.summarize(THREAD, on_token)
+
+
+def test_fails_over_when_the_primary_raises():
+    primary = FakeProvider("primary", error=RuntimeError("overloaded"))
+    secondary = FakeProvider("secondary")
+    router = ProviderRouter([primary, secondary])
+
+    assert router.summarize(THREAD) == "# Answer from secondary"
+    assert router.answered_by() is secondary
+    assert router.stats["primary"].errors == 1
+    assert router.stats["secondary"].wins == 1
+
+
+def test_fails_over_when_the_primary_times_out():
+    primary = FakeProvider("primary", delay=5.0)
+    secondary = FakeProvider("secondary")
+    router = ProviderRouter([primary, secondary], timeout=0.1)
+
+    started = time.monotonic()
+    assert router.summarize(THREAD) == "# Answer from secondary"
+    assert time.monotonic() - started < 2.0
+    assert router.stats["primary"].timeouts == 1
+    primary.release.set()
+
+
+def test_hedge_wins_over_a_slow_primary():
+    primary = FakeProvider("primary", delay=5.0)
+    secondary = FakeProvider("secondary")
+    router = ProviderRouter([primary, secondary], timeout=10.0, hedge=True, hedge_after=0.05)
+    tokens: List[str] = []
+
+    assert router.summarize(THREAD, on_token=tokens.append) == "# Answer from secondary"
+    assert "".join(tokens) == "# Answer from secondary"
+    assert router.stats["primary"].abandoned == 1
+    assert router.stats["secondary"].wins == 1
+    primary.release.set()
+
+
+def test_primary_answering_first_is_not_hedged():
+    primary = FakeProvider("primary")
+    secondary = FakeProvider("secondary")
+    router = ProviderRouter([primary, secondary], hedge=True, hedge_after=5.0)
+
+    assert router.summarize(THREAD) == "# Answer from primary"
+    assert secondary.calls == 0
+
+
+def test_raises_the_last_error_when_every_provider_fails():
+    router = ProviderRouter([
+        FakeProvider("primary", error=RuntimeError("overloaded")),
+        FakeProvider("secondary", error=ValueError("bad request"))
+    ])
+
+    with pytest.raises(ValueError, match="bad request"):
+        router.summarize(THREAD)
+    assert router.answered_by() is None
+
+
+def test_raises_a_timeout_when_the_last_provider_times_out():
+    slow = FakeProvider("slow", delay=5.0)
+    router = ProviderRouter([FakeProvider("primary", error=RuntimeError("overloaded")), slow], timeout=0.1)
+
+    with pytest.raises(ProviderTimeoutError):
+        router.summarize_delta(None, [], "")
+    slow.release.set()
@@ -0,0 +1,133 @@
+"""Thread pagination in SlackService against a fake Slack client."""
+
+from typing import Dict, List, Optional
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from summarizer.config import SlackConfig
+from summarizer.metadata_store import MetadataStore
+from summarizer.rate_limit import RateLimiter
+from summarizer.services.slack_service import IncompleteThreadError, SlackService
+
+THREAD_TS = "1700000000.000100"
+
+
+def message(ts: str, text: Optional[str] = None) -> Dict[str, str]:
+    return {"ts": ts, "user": "U1", "text": text or f"message {ts}"}
+
+
+def reply_ts(index: int) -> str:
+    return f"1700000000.{index + 200:06d}"
+
+
+class FakeSlackClient:
+    """Serves conversations_replies from pages, repeating the parent on each like Slack does.
+
+    A page given as a string is returned as an ``ok: false`` response with
+    that error, one given as an exception is raised.
+    """
+
+    def __init__(self, pages: List):
+        self.pages = pages
+        self.calls: List[Dict] = []
+
+    def conversations_replies(self, channel: str, ts: str, limit: int, cursor: Optional[str] = None, **kwargs):
+        self.calls.append({"channel": channel, "ts": ts, "limit": limit, "cursor": cursor, **kwargs})
+        index = int(cursor) if cursor else 0
+        page = self.pages[index]
+        if isinstance(page, Exception):
+            raise page
+        if isinstance(page, str):
+            return {"ok": False, "error": page}
+        next_cursor = str(index + 1) if index + 1 < len(self.pages) else ""
+        return {
+            "ok": True,
+            "messages": [message(THREAD_TS, "parent")] + [message(ts) for ts in page][:limit],
+            "response_metadata": {"next_cursor": next_cursor},
+        }
+
+
+def make_service(pages: List, page_size: int = 3, max_messages: int = 100) -> SlackService:
+    service = SlackService(
+        SlackConfig(bot_token="xoxb-test", workspace_name="test", page_size=page_size, max_messages=max_messages),
+        MetadataStore()
+    )
+    service.client = FakeSlackClient(pages)
+    # The process-wide Slack limiter allows one request a second
+    service.limiter = RateLimiter("Slack test", rate=1000, max_retries=0)
+    return service
+
+
+def fetch(service: SlackService, **kwargs) -> List[str]:
+    return [
+        message.timestamp
+        for batch in service.iter_thread_messages("C1", THREAD_TS, **kwargs)
+        for message in batch
+    ]
+
+
+def test_follows_cursors_across_pages():
+    pages = [[reply_ts(0), reply_ts(1)], [reply_ts(2), reply_ts(3)], [reply_ts(4)]]
+    service = make_service(pages)
+
+    assert fetch(service) == [THREAD_TS] + [reply_ts(i) for i in range(5)]
+    assert [call["cursor"] for call in service.client.calls] == [None, "1", "2"]
+
+
+def test_parent_is_yielded_once():
+    service = make_service([[reply_ts(0)], [reply_ts(1)], [reply_ts(2)]])
+
+    timestamps = fetch(service)
+
+    assert timestamps.count(THREAD_TS) == 1
+    assert timestamps[0] == THREAD_TS
+
+
+def test_oldest_is_passed_on_every_page():
+    service = make_service([[reply_ts(0)], [reply_ts(1)]])
+
+    fetch(service, oldest=reply_ts(0))
+
+    assert [call["oldest"] for call in service.client.calls] == [reply_ts(0)] * 2
+
+
+def test_max_messages_caps_the_thread():
+    pages = [[reply_ts(i) for i in range(page * 2, page * 2 + 2)] for page in range(5)]
+    service = make_service(pages, max_messages=4)
+
+    timestamps = fetch(service)
+
+    assert timestamps == [THREAD_TS, reply_ts(0), reply_ts(1), reply_ts(2)]
+    # The second page only asks for what is left, and no third is requested
+    assert [call["limit"] for call in service.client.calls] == [3, 1]
+
+
+def test_error_on_first_page_yields_nothing():
+    service = make_service(["channel_not_found"])
+
+    assert fetch(service) == []
+
+
+@pytest.mark.parametrize("failure", [
+    "ratelimited",
+    SlackApiError("internal_error", {"ok": False, "error": "internal_error"}),
+])
+def test_error_after_first_page_raises(failure):
+    service = make_service([[reply_ts(0)], [reply_ts(1)], failure])
+    batches = service.iter_thread_messages("C1", THREAD_TS)
+
+    assert [message.timestamp for message in next(batches)] == [THREAD_TS, reply_ts(0)]
+    assert [message.timestamp for message in next(batches)] == [reply_ts(1)]
+    with pytest.raises(IncompleteThreadError, match="after 3 messages"):
+        next(batches)
+
+
+def test_fetch_thread_does_not_return_a_truncated_thread():
+    service = make_service([[reply_ts(0)], "internal_error"])
+    service.client.conversations_join = lambda channel: {"ok": True, "warning": "already_in_channel"}
+    service.client.team_info = lambda: {"team": {"id": "T1"}}
+    service.client.conversations_info = lambda channel: {"ok": True, "channel": {"name": "general"}}
+
+    with pytest.raises(IncompleteThreadError):
+        service.fetch_thread("C1", THREAD_TS)
@@ -0,0 +1,262 @@
+"""Memory-mapped vector index of knowledge base articles for semantic matching."""
+
+import importlib
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .kb_index import weighted_terms
+
+logger = logging.getLogger(__name__)
+
+# Bump when the file layout changes so persisted indexes are rebuilt
+INDEX_VERSION = "1"
+
+# Turns texts into an (n, dim) array of embeddings
+EmbeddingFunction = Callable[[Sequence[str]], np.ndarray]
+
+_EMBEDDERS: Dict[str, Tuple[str, str]] = {
+    "hashing": (__name__, "HashingEmbedder"),
+}
+
+
+class HashingEmbedder:
+    """Bag-of-words embedding by feature hashing.
+
+    Needs no model: each index term is hashed to one of dim buckets with a
+    sign, weighted by where it appears in the article and damped
+    logarithmically so long, often extended articles are not dominated by
+    their most repeated words.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            terms = weighted_terms(text)
+            if not terms:
+                continue
+            hashes = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in terms), dtype=np.int64, count=len(terms))
+            weights = 1.0 + np.log(np.fromiter(terms.values(), dtype=np.float64, count=len(terms)))
+            signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+            np.add.at(vectors[row], hashes % self.dim, signs * weights)
+        return vectors
+
+
+def register_embedder(name: str, module: str, factory: str) -> None:
+    """Register an embedding function.
+
+    Args:
+        name: Name used in KB_EMBEDDER
+        module: Absolute module path
+        factory: Callable in the module that takes no arguments and returns
+            an EmbeddingFunction
+    """
+    _EMBEDDERS[name] = (module, factory)
+
+
+def create_embedder(name: str) -> EmbeddingFunction:
+    """Import and construct a registered embedder or one given as "module:factory"."""
+    if name in _EMBEDDERS:
+        module_name, factory_name = _EMBEDDERS[name]
+    elif ":" in name:
+        module_name, factory_name = name.split(":", 1)
+    else:
+        names = "', '".join(_EMBEDDERS)
+        raise ValueError(f"Unknown embedder: {name}. Use '{names}' or 'module:factory'")
+    return getattr(importlib.import_module(module_name), factory_name)()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving all-zero rows alone."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+
+class VectorIndex:
+    """Knowledge base article embeddings in a memory-mapped NumPy matrix.
+
+    Row i of the matrix holds the unit-length embedding of the article at
+    paths[i], so a lookup is one matrix-vector product. Rows of deleted
+    articles are zeroed and reused. Like the other caches, the files live in
+    the cache directory and the index records the commit it reflects so it
+    can be updated with only the articles changed since.
+    """
+
+    def __init__(self, directory: str, embedder: EmbeddingFunction, embedder_name: str = "hashing"):
+        """Initialize the index.
+
+        Args:
+            directory: Directory holding the matrix and its metadata
+            embedder: Embedding function for articles and queries
+            embedder_name: Name of the embedder; a different one rebuilds the index
+        """
+        self.directory = directory
+        self.embedder = embedder
+        self.embedder_name = embedder_name
+        self._lock = threading.Lock()
+        self._meta: Dict = {}
+        self._paths: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+
+    @property
+    def vectors_path(self) -> str:
+        """File holding the embedding matrix."""
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def meta_path(self) -> str:
+        """File holding the article path of each row and the indexed commit."""
+        return os.path.join(self.directory, "meta.json")
+
+    def open(self) -> None:
+        """Load the index from disk if it was built by this version and embedder."""
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read vector index metadata {self.meta_path}: {e}")
+            return
+        if meta.get("version") != INDEX_VERSION or meta.get("embedder") != self.embedder_name:
+            logger.info("Vector index was built by another version or embedder, it will be rebuilt")
+            return
+
+        try:
+            capacity = os.path.getsize(self.vectors_path) // (4 * meta["dim"])
+            if capacity < len(meta["paths"]):
+                raise ValueError(f"matrix holds {capacity} rows, expected {len(meta['paths'])}")
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, meta["dim"]))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not open vector index {self.vectors_path}: {e}")
+            return
+        self._meta = meta
+        self._paths = meta["paths"]
+        self._rows = {path: row for row, path in enumerate(self._paths) if path is not None}
+        logger.debug(f"Opened vector index with {len(self._rows)} articles")
+
+    def close(self) -> None:
+        """Flush the matrix to disk."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+
+    @property
+    def size(self) -> int:
+        """Number of indexed articles."""
+        return len(self._rows)
+
+    def state(self) -> Tuple[Optional[str], Optional[str]]:
+        """Return the (repository, commit) the index was last built from."""
+        with self._lock:
+            return self._meta.get("repo"), self._meta.get("commit")
+
+    def contains(self, path: str) -> bool:
+        """Whether an article is in the index."""
+        return path in self._rows
+
+    def update(
+        self,
+        repo: str,
+        commit: str,
+        articles: Iterable[Tuple[str, str]],
+        removed: Iterable[str] = (),
+        rebuild: bool = False
+    ) -> None:
+        """Embed articles and record the commit the index now reflects.
+
+        Args:
+            repo: Full name of the knowledge base repository
+            commit: Commit the given changes bring the index up to
+            articles: (path, content) of added or modified articles
+            removed: Paths of deleted articles
+            rebuild: Drop everything indexed so far first
+        """
+        articles = list(articles)
+        embeddings = _normalize(self.embedder([content for _, content in articles])) if articles else None
+
+        with self._lock:
+            if rebuild or self._vectors is None:
+                self._reset(embeddings.shape[1] if embeddings is not None else self._meta.get("dim"))
+            for path in removed:
+                row = self._rows.pop(path, None)
+                if row is not None:
+                    self._vectors[row] = 0
+                    self._paths[row] = None
+
+            if embeddings is not None:
+                free_rows = [row for row, path in enumerate(self._paths) if path is None]
+                for (path, _), vector in zip(articles, embeddings):
+                    row = self._rows.get(path)
+                    if row is None:
+                        row = free_rows.pop() if free_rows else len(self._paths)
+                        if row == len(self._paths):
+                            self._paths.append(None)
+                            self._ensure_capacity(len(self._paths))
+                        self._rows[path] = row
+                        self._paths[row] = path
+                    self._vectors[row] = vector
+
+            self._meta.update(repo=repo, commit=commit, paths=self._paths)
+            self._save()
+        logger.debug(f"{'Rebuilt' if rebuild else 'Updated'} vector index at {commit}: {len(articles)} articles embedded")
+
+    def search(self, text: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Find the articles most similar to text.
+
+        Returns:
+            Up to k (path, cosine similarity) pairs, most similar first
+        """
+        query = _normalize(self.embedder([text]))[0]
+        with self._lock:
+            if self._vectors is None or not self._rows:
+                return []
+            similarities = np.asarray(self._vectors[:len(self._paths)] @ query)
+            k = min(k, len(similarities))
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top])]
+            return [(self._paths[row], float(similarities[row])) for row in top if self._paths[row] is not None]
+
+    def _reset(self, dim: Optional[int]) -> None:
+        """Start an empty index. Callers hold the lock."""
+        self._vectors = None
+        self._paths = []
+        self._rows = {}
+        self._meta = {"version": INDEX_VERSION, "embedder": self.embedder_name, "dim": dim}
+        if dim is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.vectors_path, "wb"):
+                pass
+            self._ensure_capacity(0)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the matrix file to hold at least rows rows. Callers hold the lock."""
+        capacity = self._vectors.shape[0] if self._vectors is not None else 0
+        if self._vectors is not None and rows <= capacity:
+            return
+        dim = self._meta["dim"]
+        new_capacity = max(rows, 2 * capacity, 64)
+        if self._vectors is not None:
+            self._vectors.flush()
+        os.truncate(self.vectors_path, new_capacity * dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(new_capacity, dim))
+
+    def _save(self) -> None:
+        """Flush the matrix and atomically replace the metadata. Callers hold the lock."""
+        if self._vectors is not None:
+            self._vectors.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self.meta_path)